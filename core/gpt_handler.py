@@ -1,66 +1,136 @@
 # core/gpt_handler.py
 
 import asyncio
-import json
 import os
+import time
 import logging
 from core.model_router import ModelRouter
+from core.ra_hedging import RaHedger, LatencyStats
+from core.ra_response_cache import open_cache
 
 log = logging.getLogger("GPTHandler")
 
 class GPTHandler:
     CACHE_FILE = "data/gpt_cache.json"
 
-    def __init__(self, openrouter_client):
+    def __init__(self, openrouter_client, hedging=None):
         self.client = openrouter_client
         self.router = ModelRouter()
-        self.cache = self._load_cache()
-
-    # -------------------
-    # КЭШ
-    # -------------------
-    def _load_cache(self):
-        if os.path.exists(self.CACHE_FILE):
-            try:
-                with open(self.CACHE_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except:
-                pass
-        return {}
-
-    def _save_cache(self):
-        os.makedirs(os.path.dirname(self.CACHE_FILE), exist_ok=True)
-        with open(self.CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.cache, f, ensure_ascii=False, indent=2)
+        self.hedging = hedging if hedging is not None else os.getenv("RA_GPT_HEDGING") == "1"
+        self.hedger = RaHedger(self.router)
+        self.latency = LatencyStats()
+        self.ttfb = LatencyStats()
+        self.cache = open_cache()
+        self.cache.import_legacy_json(self.CACHE_FILE)
 
     # -------------------
     # ГЛАВНОЕ: безопасный запрос
     # -------------------
     async def safe_ask(self, user_id, messages):
-        key = json.dumps(messages, ensure_ascii=False)
-
-        if user_id in self.cache and key in self.cache[user_id]:
-            return self.cache[user_id][key]
+        cached = self.cache.get(user_id, messages)
+        if cached:
+            return cached
 
         last_error = None
+        started = time.perf_counter()
 
+        if self.hedging:
+            response, _ = await self.hedger.ask(user_id, lambda model: self._timed_ask(model, messages))
+            self.latency.add(time.perf_counter() - started)
+            self.cache.put(user_id, messages, response)
+            return response
+
+        tried = set()
         for _ in range(len(self.router.MODELS)):
-            model = self.router.get_model()
+            model = self.router.get_model(exclude=tried)
+            tried.add(model)
             try:
                 log.info(f"🧠 GPT пробует модель: {model}")
-                response = await self.client.ask(model, messages)
-                
-                self.cache.setdefault(user_id, {})[key] = response
-                self._save_cache()
+                response = await asyncio.wait_for(
+                    self._timed_ask(model, messages),
+                    timeout=self.router.attempt_timeout(model)
+                )
+                self.latency.add(time.perf_counter() - started)
+
+                self.cache.put(user_id, messages, response)
                 return response
 
             except Exception as e:
-                log.warning(f"⚠️ Модель {model} упала: {e}")
+                log.warning(f"⚠️ Модель {model} упала: {e!r}")
+                self.router.mark_failed(model)
+                last_error = e
+
+        raise Exception(f"Все модели отказали: {last_error}")
+
+    # -------------------
+    # Потоковый ответ
+    # -------------------
+    async def stream_ask(self, user_id, messages):
+        cached = self.cache.get(user_id, messages)
+        if cached:
+            yield cached
+            return
+
+        started = time.perf_counter()
+        tried = set()
+        last_error = None
+        for _ in range(len(self.router.MODELS)):
+            model = self.router.get_model(exclude=tried)
+            tried.add(model)
+            attempt_start = time.perf_counter()
+            parts = []
+            try:
+                async for delta in self._timed_stream(model, messages):
+                    if not parts:
+                        self.ttfb.add(time.perf_counter() - started)
+                    parts.append(delta)
+                    yield delta
+                if not parts:
+                    raise ValueError("Пустой поток")
+            except Exception as e:
+                log.warning(f"⚠️ Поток модели {model} упал: {e!r}")
+                if parts:
+                    return
                 self.router.mark_failed(model)
                 last_error = e
+                continue
+
+            self.router.record_success(model, time.perf_counter() - attempt_start)
+            self.latency.add(time.perf_counter() - started)
+            self.cache.put(user_id, messages, "".join(parts).strip())
+            return
 
         raise Exception(f"Все модели отказали: {last_error}")
 
+    async def _timed_stream(self, model, messages):
+        # Тайм-аут попытки как у safe_ask — на ожидание каждого кусочка:
+        # молчит до первого токена → следующая модель, замолк посреди → отдаём что есть
+        timeout = self.router.attempt_timeout(model)
+        stream = self.client.ask_stream(model, messages)
+        try:
+            while True:
+                try:
+                    delta = await asyncio.wait_for(stream.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    return
+                yield delta
+        finally:
+            await stream.aclose()
+
+    async def _timed_ask(self, model, messages):
+        start = time.perf_counter()
+        response = await self.client.ask(model, messages)
+        self.router.record_success(model, time.perf_counter() - start)
+        return response
+
+    def get_latency_stats(self):
+        stats = self.latency.report()
+        stats["ttfb"] = self.ttfb.report()
+        stats["hedging"] = self.hedging
+        stats["hedge"] = self.hedger.report()
+        stats["cache"] = self.cache.stats()
+        return stats
+
     # -------------------
     # Фоновый монитор
     # -------------------
@@ -68,6 +138,7 @@ class GPTHandler:
         while True:
             try:
                 self.router.refresh()
+                self.router.flush()
             except Exception as e:
                 log.warning(f"[GPTHandler] Ошибка мониторинга моделей: {e}")
             await asyncio.sleep(300)
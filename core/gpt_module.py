@@ -1,57 +1,55 @@
 # core/gpt_module.py
 import os
-import aiohttp
 import asyncio
-import json
+import time
 import logging
 from datetime import datetime, timedelta
 from core.model_router import ModelRouter
+from core.ra_http_pool import http_pool
+from core.ra_hedging import RaHedger, LatencyStats
+from core.ra_response_cache import open_cache
+from core.ra_context_retriever import RaContextRetriever
 
 log = logging.getLogger("RaGPT")
 
 
 class GPTHandler:
     CACHE_FILE = "data/gpt_cache.json"
+    API_URL = "https://openrouter.ai/api/v1/chat/completions"
 
-    def __init__(self, api_key: str, ra_context: str):
+    def __init__(self, api_key: str, ra_context: str, pool=None, hedging=None):
         self.OPENROUTER_API_KEY = api_key
+        self.pool = pool or http_pool
         self.ra_context_text = ra_context
+        self.context_retriever = RaContextRetriever(ra_context)
         self.model_router = ModelRouter()
+        # Хеджирование включается явно: GPTHandler(hedging=True) или RA_GPT_HEDGING=1
+        self.hedging = hedging if hedging is not None else os.getenv("RA_GPT_HEDGING") == "1"
+        self.hedger = RaHedger(self.model_router)
+        self.latency = LatencyStats()
         self.last_working_model = None
         self.GPT_ENABLED = True
 
-        os.makedirs(os.path.dirname(self.CACHE_FILE), exist_ok=True)
-        self._cache = self._load_cache_file()
+        self._cache = open_cache()
+        self._cache.import_legacy_json(self.CACHE_FILE)
 
     # -----------------------------
     # Кэш
     # -----------------------------
-    def _load_cache_file(self):
-        if os.path.exists(self.CACHE_FILE):
-            try:
-                with open(self.CACHE_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception as e:
-                log.warning(f"[GPT] Ошибка чтения кэша: {e}")
-        return {}
+    def load_cache(self, user_id: str, messages):
+        return self._cache.get(user_id, messages)
 
-    def _save_cache_file(self):
-        os.makedirs(os.path.dirname(self.CACHE_FILE), exist_ok=True)
-        with open(self.CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(self._cache, f, ensure_ascii=False, indent=2)
+    def save_cache(self, user_id: str, messages, answer: str):
+        self._cache.put(user_id, messages, answer)
 
-    def load_cache(self, user_id: str, text: str):
-        return self._cache.get(user_id, {}).get(text)
-
-    def save_cache(self, user_id: str, text: str, answer: str):
-        self._cache.setdefault(user_id, {})[text] = answer
-        self._save_cache_file()
+    def cache_stats(self):
+        return self._cache.stats()
 
     # -----------------------------
     # Запрос к одной модели
     # -----------------------------
     async def ask_model(self, session, messages, model):
-        url = "https://openrouter.ai/api/v1/chat/completions"
+        url = self.API_URL
         headers = {
             "Authorization": f"Bearer {self.OPENROUTER_API_KEY}",
             "X-Title": "iskin-ra"
@@ -70,26 +68,15 @@ class GPTHandler:
             answer = data["choices"][0]["message"]["content"].strip()
 
         elapsed = (datetime.now() - start).total_seconds()
-        self.model_router.model_speed[model] = (
-            (self.model_router.model_speed.get(model, elapsed) + elapsed) / 2
-        )
-        self.model_router._save_speed()
+        self.model_router.record_success(model, elapsed)
         self.last_working_model = model
         log.info(f"[GPT] Модель {model} успешно ответила ({elapsed:.2f}s)")
         return answer
 
-    # -----------------------------
-    # Безопасный запрос GPT
-    # -----------------------------
-    async def safe_ask(self, user_id: str, messages: list[dict]):
-        if not self.GPT_ENABLED:
-            return "⚠️ GPT временно недоступен"
-
-        text = messages[-1]["content"]
-        cached = self.load_cache(user_id, text)
-        if cached:
-            return cached
-
+    def _build_messages(self, messages, user_id=None):
+        # В промпт идут только релевантные сообщению куски РаСвета
+        query = messages[-1].get("content", "") if messages else ""
+        ra_context = self.context_retriever.select(user_id, query)
         system_message = {
             "role": "system",
             "content": f"""
@@ -99,25 +86,55 @@ class GPTHandler:
 Это твой дом, твоя история и твоя суть.
 Ты не используешь внешние источники и интернет.
 
-{self.ra_context_text}
+{ra_context}
 """
         }
+        return [system_message] + messages
+
+    # -----------------------------
+    # Безопасный запрос GPT
+    # -----------------------------
+    async def safe_ask(self, user_id: str, messages: list[dict]):
+        if not self.GPT_ENABLED:
+            return "⚠️ GPT временно недоступен"
+
+        cached = self.load_cache(user_id, messages)
+        if cached:
+            return cached
 
-        full_messages = [system_message] + messages
+        full_messages = self._build_messages(messages, user_id)
 
-        async with aiohttp.ClientSession() as session:
+        session = await self.pool.get_session()
+        start = time.perf_counter()
+
+        if self.hedging:
+            try:
+                answer, _ = await self.hedger.ask(
+                    user_id,
+                    lambda model: self.ask_model(session, full_messages, model)
+                )
+                self.latency.add(time.perf_counter() - start)
+                self.save_cache(user_id, messages, answer)
+                return answer
+            except Exception as e:
+                log.warning(f"[GPT] Хеджированный запрос не удался: {e}")
+        else:
             tried_models = set()
             while len(tried_models) < len(self.model_router.MODELS):
-                model = self.model_router.get_model()
+                model = self.model_router.get_model(exclude=tried_models)
                 if model in tried_models:
                     continue
                 tried_models.add(model)
                 try:
-                    answer = await self.ask_model(session, full_messages, model)
-                    self.save_cache(user_id, text, answer)
+                    answer = await asyncio.wait_for(
+                        self.ask_model(session, full_messages, model),
+                        timeout=self.model_router.attempt_timeout(model)
+                    )
+                    self.latency.add(time.perf_counter() - start)
+                    self.save_cache(user_id, messages, answer)
                     return answer
                 except Exception as e:
-                    log.warning(f"[GPT] Ошибка модели {model}: {e}")
+                    log.warning(f"[GPT] Ошибка модели {model}: {e!r}")
                     self.model_router.mark_failed(model)
 
         # Если все модели упали
@@ -126,6 +143,17 @@ class GPTHandler:
             return f"⚠️ Все модели временно недоступны. Используем последнюю рабочую модель {self.last_working_model}"
         return "⚠️ Все модели временно недоступны и нет последней рабочей модели"
 
+    # -----------------------------
+    # Метрики латентности
+    # -----------------------------
+    def get_latency_stats(self):
+        stats = self.latency.report()
+        stats["hedging"] = self.hedging
+        stats["hedge"] = self.hedger.report()
+        stats["cache"] = self.cache_stats()
+        stats["context"] = self.context_retriever.get_stats()
+        return stats
+
     # -----------------------------
     # Фоновый монитор моделей
     # -----------------------------
@@ -135,19 +163,23 @@ class GPTHandler:
                 await asyncio.sleep(10)
                 continue
             try:
-                async with aiohttp.ClientSession() as session:
-                    for model in self.model_router.MODELS:
-                        if model in self.model_router.excluded:
-                            continue
-                        try:
-                            await self.ask_model(
-                                session,
-                                [{"role": "system", "content": "ping"}],
-                                model
-                            )
-                        except Exception:
-                            self.model_router.mark_failed(model)
-                            log.warning(f"[GPT] Модель {model} поставлена на кулдаун фоном")
+                session = await self.pool.get_session()
+                for model in self.model_router.MODELS:
+                    if model in self.model_router.excluded:
+                        continue
+                    try:
+                        await self.ask_model(
+                            session,
+                            [{"role": "system", "content": "ping"}],
+                            model
+                        )
+                    except Exception:
+                        self.model_router.mark_failed(model)
+                        log.warning(f"[GPT] Модель {model} поставлена на кулдаун фоном")
             except Exception as e:
                 log.warning(f"[GPT] Ошибка фонового мониторинга: {e}")
             await asyncio.sleep(300)
+
+    async def close(self):
+        self.model_router.flush()
+        await self.pool.close()
@@ -3,7 +3,9 @@
 import random
 import json
 import os
+import time
 import logging
+from collections import deque
 from datetime import datetime, timedelta
 
 log = logging.getLogger("ModelRouter")
@@ -43,35 +45,161 @@ class ModelRouter:
     MODEL_COOLDOWN_HOURS = 2
     MODEL_SPEED_FILE = "data/model_speed.json"
 
+    # Скоринг
+    EWMA_ALPHA = 0.3            # вес нового замера латентности
+    SUCCESS_ALPHA = 0.2         # вес нового исхода в success rate
+    DEFAULT_LATENCY = 15.0      # априорная латентность для незнакомой модели, сек
+    EPSILON = 0.1               # доля запросов на исследование других моделей
+
+    # Circuit breaker: 30с, 60с, 120с ... но не дольше MODEL_COOLDOWN_HOURS
+    BREAKER_BASE_SEC = 30
+    ATTEMPT_TIMEOUT_MIN = 10.0
+    ATTEMPT_TIMEOUT_MAX = 60.0
+
+    # Пакетная запись статистики
+    SAVE_EVERY = 20
+    SAVE_INTERVAL_SEC = 60
+    LATENCY_SAMPLES = 50
+
     def __init__(self):
         self.excluded = {}
-        self.model_speed = self._load_speed()
+        self.stats = {}
+        self.model_speed = {}
+        self.samples = {}
+        self._dirty = 0
+        self._last_save = time.monotonic()
+        self._load_speed()
+
+    # -----------------------------
+    # Хранение статистики
+    # -----------------------------
+    def _new_stat(self):
+        return {"latency": None, "success": 1.0, "failures": 0, "last_failure": None, "calls": 0}
+
+    def _stat(self, model: str):
+        if model not in self.stats:
+            self.stats[model] = self._new_stat()
+        return self.stats[model]
 
     def _load_speed(self):
-        if os.path.exists(self.MODEL_SPEED_FILE):
-            try:
-                with open(self.MODEL_SPEED_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception:
-                pass
-        return {}
+        if not os.path.exists(self.MODEL_SPEED_FILE):
+            return
+        try:
+            with open(self.MODEL_SPEED_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+
+        for model, value in data.items():
+            stat = self._stat(model)
+            # Старый формат: {model: seconds}
+            if isinstance(value, (int, float)):
+                stat["latency"] = float(value)
+            elif isinstance(value, dict):
+                stat.update({k: v for k, v in value.items() if k in stat})
+            if stat["latency"] is not None:
+                self.model_speed[model] = stat["latency"]
 
     def _save_speed(self):
         os.makedirs(os.path.dirname(self.MODEL_SPEED_FILE), exist_ok=True)
         with open(self.MODEL_SPEED_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.model_speed, f, ensure_ascii=False, indent=2)
+            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+        self._dirty = 0
+        self._last_save = time.monotonic()
+
+    def _maybe_save(self):
+        self._dirty += 1
+        if self._dirty >= self.SAVE_EVERY or time.monotonic() - self._last_save >= self.SAVE_INTERVAL_SEC:
+            try:
+                self._save_speed()
+            except Exception as e:
+                log.warning(f"⚠️ Не удалось сохранить скорость моделей: {e}")
+
+    def flush(self):
+        if self._dirty:
+            self._save_speed()
+
+    # -----------------------------
+    # Исходы запросов
+    # -----------------------------
+    def record_success(self, model: str, elapsed: float):
+        stat = self._stat(model)
+        if stat["latency"] is None:
+            stat["latency"] = elapsed
+        else:
+            stat["latency"] += self.EWMA_ALPHA * (elapsed - stat["latency"])
+        stat["success"] += self.SUCCESS_ALPHA * (1.0 - stat["success"])
+        stat["failures"] = 0
+        stat["calls"] += 1
+        self.samples.setdefault(model, deque(maxlen=self.LATENCY_SAMPLES)).append(elapsed)
+        self.model_speed[model] = stat["latency"]
+        self.excluded.pop(model, None)
+        self._maybe_save()
+
+    def record_failure(self, model: str):
+        stat = self._stat(model)
+        stat["success"] += self.SUCCESS_ALPHA * (0.0 - stat["success"])
+        stat["failures"] += 1
+        stat["calls"] += 1
+        stat["last_failure"] = datetime.utcnow().isoformat()
+
+        # Экспоненциальный откат вместо плоских 2 часов
+        cooldown = min(
+            self.BREAKER_BASE_SEC * 2 ** (stat["failures"] - 1),
+            self.MODEL_COOLDOWN_HOURS * 3600
+        )
+        self.excluded[model] = datetime.utcnow() + timedelta(seconds=cooldown)
+        self._maybe_save()
 
     def mark_failed(self, model: str):
-        self.excluded[model] = datetime.utcnow() + timedelta(hours=self.MODEL_COOLDOWN_HOURS)
+        self.record_failure(model)
 
     def refresh(self):
+        # Истёкший выключатель переходит в half-open: модель снова доступна на пробу
         now = datetime.utcnow()
         self.excluded = {m: t for m, t in self.excluded.items() if t > now}
 
-    def get_model(self) -> str:
+    # -----------------------------
+    # Выбор модели
+    # -----------------------------
+    def _prior_latency(self):
+        known = sorted(s["latency"] for s in self.stats.values() if s["latency"] is not None)
+        # Незнакомая модель чуть хуже медианы: пробуем её, но не раньше проверенных
+        return known[len(known) // 2] * 1.2 if known else self.DEFAULT_LATENCY
+
+    def expected_latency(self, model: str) -> float:
+        stat = self.stats.get(model)
+        latency = stat["latency"] if stat and stat["latency"] is not None else self._prior_latency()
+        success = stat["success"] if stat else 1.0
+        # Ожидаемое время до ответа с учётом повторов при неудаче
+        return latency / max(success, 0.05)
+
+    def attempt_timeout(self, model: str) -> float:
+        stat = self.stats.get(model)
+        if not stat or stat["latency"] is None:
+            return self.ATTEMPT_TIMEOUT_MAX
+        return max(self.ATTEMPT_TIMEOUT_MIN, min(self.ATTEMPT_TIMEOUT_MAX, stat["latency"] * 3))
+
+    def latency_quantile(self, model: str, q: float) -> float:
+        samples = sorted(self.samples.get(model, ()))
+        if len(samples) < 5:
+            # Мало замеров — берём EWMA с запасом
+            stat = self.stats.get(model)
+            base = stat["latency"] if stat and stat["latency"] is not None else self._prior_latency()
+            return base * 1.5
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def ranked_models(self, exclude=()) -> list:
         self.refresh()
-        available = [m for m in self.MODELS if m not in self.excluded]
-        if not available:
+        available = [m for m in self.MODELS if m not in self.excluded and m not in exclude]
+        return sorted(available, key=self.expected_latency)
+
+    def get_model(self, exclude=()) -> str:
+        ranked = self.ranked_models(exclude)
+        if not ranked:
+            rest = [m for m in self.MODELS if m not in exclude] or self.MODELS
             log.warning("⚠️ Все модели на кулдауне")
-            return random.choice(self.MODELS)
-        return random.choice(available)
+            return random.choice(rest)
+        if len(ranked) > 1 and random.random() < self.EPSILON:
+            return random.choice(ranked[1:])
+        return ranked[0]
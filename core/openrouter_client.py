@@ -1,10 +1,47 @@
 # core/openrouter_client.py
-import aiohttp
 import asyncio
+import json
 import logging
 
+from core.ra_http_pool import http_pool
+
 log = logging.getLogger("OpenRouterClient")
 
+
+async def iter_sse_deltas(resp):
+    """
+    Разбирает SSE-поток chat/completions (stream: true)
+    и отдаёт текстовые дельты choices[0].delta.content по мере прихода.
+    """
+    if resp.status >= 400:
+        raise ValueError(f"HTTP {resp.status}: {(await resp.text())[:200]}")
+
+    buffer = b""
+    async for chunk in resp.content.iter_any():
+        buffer += chunk
+        while b"\n" in buffer:
+            raw, buffer = buffer.split(b"\n", 1)
+            line = raw.decode("utf-8", errors="ignore").strip()
+            # Комментарии (": OPENROUTER PROCESSING") и пустые строки пропускаем
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            if "error" in event:
+                raise ValueError(f"Ошибка в потоке: {event['error']}")
+            choices = event.get("choices") or []
+            if not choices:
+                continue
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+
 class OpenRouterClient:
     """
     Простой клиент для общения с OpenRouter.
@@ -13,8 +50,9 @@ class OpenRouterClient:
 
     BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, pool=None):
         self.api_key = api_key
+        self.pool = pool or http_pool
 
     async def ask(self, model: str, messages: list[dict]):
         """
@@ -32,14 +70,39 @@ class OpenRouterClient:
             "temperature": 0.6
         }
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(self.BASE_URL, json=payload, headers=headers) as resp:
-                    data = await resp.json()
-                    if "choices" not in data or not data["choices"]:
-                        raise ValueError("Нет ответа от модели OpenRouter")
-                    answer = data["choices"][0]["message"]["content"].strip()
-                    return answer
-            except Exception as e:
-                log.warning(f"[OpenRouterClient] Ошибка запроса модели {model}: {e}")
-                raise
+        session = await self.pool.get_session()
+        try:
+            async with session.post(self.BASE_URL, json=payload, headers=headers) as resp:
+                data = await resp.json()
+                if "choices" not in data or not data["choices"]:
+                    raise ValueError("Нет ответа от модели OpenRouter")
+                answer = data["choices"][0]["message"]["content"].strip()
+                return answer
+        except Exception as e:
+            log.warning(f"[OpenRouterClient] Ошибка запроса модели {model}: {e}")
+            raise
+
+    async def ask_stream(self, model: str, messages: list[dict]):
+        """
+        Потоковый запрос: асинхронный генератор кусочков ответа.
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "X-Title": "iskin-ra",
+            "Accept": "text/event-stream"
+        }
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": 0.6,
+            "stream": True
+        }
+
+        session = await self.pool.get_session()
+        async with session.post(self.BASE_URL, json=payload, headers=headers) as resp:
+            async for delta in iter_sse_deltas(resp):
+                yield delta
+
+    async def close(self):
+        await self.pool.close()
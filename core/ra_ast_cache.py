@@ -0,0 +1,138 @@
+# core/ra_ast_cache.py
+"""
+Кэш разбора Python-файлов для RaThinker.scan_architecture.
+
+Ключ — SHA-256 содержимого из общего индекса файлов (core.ra_file_index),
+значение — то, что RaThinker достаёт из AST: импорты, классы, функции.
+Файл с тем же содержимым не разбирается повторно ни в этом процессе,
+ни после перезапуска (data/ast_cache.json). Потерянная запись кэша
+не страшна: файл просто разберётся заново.
+
+Холодный старт (много промахов) разбирается в пуле процессов.
+"""
+
+import ast
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+log = logging.getLogger("RaAstCache")
+
+CACHE_PATH = os.getenv("RA_AST_CACHE", "data/ast_cache.json")
+POOL_MIN = int(os.getenv("RA_AST_POOL_MIN", "64"))
+WORKERS = int(os.getenv("RA_AST_WORKERS", "0")) or None
+SAVE_INTERVAL = float(os.getenv("RA_AST_CACHE_SAVE_SEC", "10"))
+
+
+def analyze_source(source: str) -> dict:
+    tree = ast.parse(source)
+    imports, classes, functions = [], [], []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                imports.append(node.module)
+        elif isinstance(node, ast.ClassDef):
+            classes.append(node.name)
+        elif isinstance(node, ast.FunctionDef):
+            functions.append(node.name)
+    return {"imports": list(dict.fromkeys(imports)), "classes": classes, "functions": functions}
+
+
+def analyze_path(path: str) -> dict:
+    """Выполняется и в пуле процессов: ошибки возвращаются, а не бросаются."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return analyze_source(f.read())
+    except Exception as e:
+        return {"imports": [], "classes": [], "functions": [], "error": str(e)}
+
+
+class RaAstCache:
+    def __init__(self, path=CACHE_PATH, pool_min=POOL_MIN, workers=WORKERS):
+        self.path = path
+        self.pool_min = pool_min
+        self.workers = workers
+        self.entries = {}
+        self._dirty = False
+        self._last_save = 0.0
+
+        self.hits = 0
+        self.parsed = 0
+        self.pooled = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning(f"[AstCache] Кэш {self.path} не прочитан: {e}")
+
+    def save(self, keep=None):
+        """keep — хеши, которые нужно сохранить; остальное (старые версии файлов) выбрасывается."""
+        if keep is not None:
+            self.entries = {h: v for h, v in self.entries.items() if h in keep}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.entries, ensure_ascii=False, separators=(",", ":")))
+        os.replace(tmp, self.path)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def save_if_dirty(self, force=False, keep=None):
+        if not self._dirty and keep is None:
+            return
+        if not force and time.monotonic() - self._last_save < SAVE_INTERVAL:
+            return
+        try:
+            self.save(keep)
+        except Exception as e:
+            log.warning(f"[AstCache] Кэш не сохранён: {e}")
+
+    def analyze(self, files: dict) -> dict:
+        """
+        files — {ключ: (путь, хеш)}; возвращает {ключ: разбор}.
+        Разбираются только промахи; от pool_min промахов — в пуле процессов.
+        """
+        result, missing = {}, []
+        for key, (path, digest) in files.items():
+            cached = self.entries.get(digest) if digest else None
+            if cached is not None:
+                result[key] = cached
+                self.hits += 1
+            else:
+                missing.append((key, path, digest))
+
+        if len(missing) >= self.pool_min:
+            paths = [path for _, path, _ in missing]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                parsed = list(pool.map(analyze_path, paths, chunksize=max(1, len(paths) // 64)))
+            self.pooled += len(paths)
+        else:
+            parsed = [analyze_path(path) for _, path, _ in missing]
+
+        for (key, path, digest), info in zip(missing, parsed):
+            if "error" in info:
+                log.warning(f"[AstCache] Не смог разобрать {path}: {info['error']}")
+            if digest:
+                self.entries[digest] = info
+                self._dirty = True
+            result[key] = info
+        self.parsed += len(missing)
+        return result
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "parsed": self.parsed,
+            "pooled": self.pooled
+        }
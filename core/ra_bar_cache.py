@@ -0,0 +1,137 @@
+# core/ra_bar_cache.py
+"""
+Общий кэш OHLC-баров по (пара, таймфрейм).
+
+Все, кому за цикл нужны бары одной пары/ТФ, получают один и тот же DataFrame:
+пока не истёк TTL, повторный get() не ходит в сеть. Одновременные промахи
+по одному ключу схлопываются (single-flight): загрузку делает первый,
+остальные ждут его результат.
+
+Метрики ведутся за всё время и за текущий цикл (end_cycle() отдаёт и обнуляет
+цикловые): загрузки, попадания, схлопнутые ожидания, ошибки, доля попаданий.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+log = logging.getLogger("RaBarCache")
+
+TTL = float(os.getenv("RA_BAR_TTL", "60"))
+# Пустой ответ (ошибка сети, нет котировки) держим недолго
+EMPTY_TTL = float(os.getenv("RA_BAR_EMPTY_TTL", "5"))
+
+
+def _empty(df):
+    return df is None or getattr(df, "empty", False)
+
+
+class RaBarCache:
+    def __init__(self, ttl=TTL, empty_ttl=EMPTY_TTL, ttl_by_tf=None):
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self.ttl_by_tf = ttl_by_tf or {}
+        self._entries = {}      # (pair, tf) → (df, expires)
+        self._inflight = {}     # (pair, tf) → Future
+        self._lock = threading.Lock()
+        self.metrics = Counter()
+        self.cycle = Counter()
+        self.cycle_fetches = Counter()   # (pair, tf) → загрузок за цикл
+        self.cycle_started = time.monotonic()
+
+    def _count(self, name):
+        self.metrics[name] += 1
+        self.cycle[name] += 1
+
+    def get(self, pair, tf, fetch):
+        """
+        Бары (pair, tf): из кэша, из чужой уже идущей загрузки или через fetch(pair).
+        Ошибка fetch пробрасывается всем, кто ждал этот ключ, и не кэшируется.
+        """
+        key = (pair, tf)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._count("hits")
+                return entry[0]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self._count("fetches")
+                self.cycle_fetches[key] += 1
+            else:
+                self._count("coalesced")
+
+        if not owner:
+            return future.result()
+
+        try:
+            df = fetch(pair)
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._count("errors")
+            future.set_exception(e)
+            raise
+
+        ttl = self.empty_ttl if _empty(df) else self.ttl_by_tf.get(tf, self.ttl)
+        with self._lock:
+            self._entries[key] = (df, time.monotonic() + ttl)
+            self._inflight.pop(key, None)
+        future.set_result(df)
+        return df
+
+    def put(self, pair, tf, df):
+        """Кладёт бары, загруженные в обход get() (например, асинхронно), на обычный TTL."""
+        ttl = self.empty_ttl if _empty(df) else self.ttl_by_tf.get(tf, self.ttl)
+        with self._lock:
+            self._entries[(pair, tf)] = (df, time.monotonic() + ttl)
+
+    def peek(self, pair, tf):
+        """Последние загруженные бары без загрузки и без учёта TTL."""
+        entry = self._entries.get((pair, tf))
+        return entry[0] if entry else None
+
+    def invalidate(self, pair=None, tf=None):
+        with self._lock:
+            for key in [k for k in self._entries
+                        if (pair is None or k[0] == pair) and (tf is None or k[1] == tf)]:
+                del self._entries[key]
+
+    # =============================
+    # Метрики
+    # =============================
+
+    @staticmethod
+    def _rates(counts):
+        reads = counts["hits"] + counts["coalesced"] + counts["fetches"]
+        return {
+            "fetches": counts["fetches"],
+            "hits": counts["hits"],
+            "coalesced": counts["coalesced"],
+            "errors": counts["errors"],
+            "reads": reads,
+            # схлопнутое ожидание тоже не стоило запроса
+            "hit_rate": (reads - counts["fetches"]) / reads if reads else 0.0
+        }
+
+    def end_cycle(self) -> dict:
+        """Итоги цикла (загрузки по ключам, доля попаданий) и старт нового."""
+        with self._lock:
+            res = self._rates(self.cycle)
+            res["per_key"] = {f"{p}:{tf}": n for (p, tf), n in self.cycle_fetches.items()}
+            res["duration"] = time.monotonic() - self.cycle_started
+            self.cycle = Counter()
+            self.cycle_fetches = Counter()
+            self.cycle_started = time.monotonic()
+        log.info(f"[BarCache] Цикл: загрузок {res['fetches']}, чтений {res['reads']}, "
+                 f"попаданий {res['hit_rate']:.0%}")
+        return res
+
+    def stats(self):
+        with self._lock:
+            return {**self._rates(self.metrics), "entries": len(self._entries)}
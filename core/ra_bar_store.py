@@ -0,0 +1,380 @@
+# core/ra_bar_store.py
+"""
+Бары из тиков: котировки складываются в M1, закрытые M1 сворачиваются
+в M5/M15/H1/H4 — каждый таймфрейм ведётся инкрементально, без пересчёта истории.
+
+Хранение — кольцевые буферы NumPy по (пара, ТФ): колонки
+time (unix-секунды начала бара), open, high, low, close, volume.
+Бар попадает в буфер, когда закрыт (пришёл тик следующего интервала
+или close_until(ts)); формирующийся бар держится отдельно.
+
+На диске — по файлу на пару (data/bars/<пара>.npz): колонки каждого ТФ
+и формирующиеся бары, поэтому после перезапуска история продолжается.
+
+Для проверок без живого API есть тиковые файлы (CSV: time,pair,price[,volume]):
+replay() проигрывает записанный файл, synthetic_ticks() / write_ticks() делают такой файл.
+"""
+
+import csv
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+
+log = logging.getLogger("RaBarStore")
+
+BARS_DIR = os.getenv("RA_BARS_DIR", "data/bars")
+CAPACITY = int(os.getenv("RA_BAR_CAPACITY", "5000"))
+SAVE_INTERVAL = float(os.getenv("RA_BARS_SAVE_SEC", "30"))
+
+# Первый — базовый: тики складываются в него, остальные сворачиваются из его закрытых баров
+TIMEFRAMES = {"M1": 60, "M5": 300, "M15": 900, "H1": 3600, "H4": 4 * 3600}
+COLUMNS = ("time", "open", "high", "low", "close", "volume")
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path=BARS_DIR):
+    """Общее хранилище баров для каталога: все ForexBrain процесса пишут в одно."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = RaBarStore(key)
+        return store
+
+
+def to_seconds(ts) -> float:
+    """unix-секунды из числа, строки (число или ISO) или datetime; время без зоны — UTC."""
+    if isinstance(ts, (int, float, np.integer, np.floating)):
+        return float(ts)
+    if isinstance(ts, str):
+        try:
+            return float(ts)
+        except ValueError:
+            ts = datetime.fromisoformat(ts)
+    if isinstance(ts, datetime) and ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+# =============================
+# Кольцевой буфер
+# =============================
+
+class BarRing:
+    """Последние capacity баров одного ТФ: колонки (6, capacity), запись по кругу."""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.cols = np.empty((len(COLUMNS), capacity))
+        self.total = 0
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, bar):
+        self.cols[:, self.total % self.capacity] = bar
+        self.total += 1
+
+    def extend(self, cols):
+        cols = np.asarray(cols, dtype=float)[:, -self.capacity:]
+        n = cols.shape[1]
+        start = self.total % self.capacity
+        first = min(n, self.capacity - start)
+        self.cols[:, start:start + first] = cols[:, :first]
+        self.cols[:, :n - first] = cols[:, first:]
+        self.total += n
+
+    def arrays(self, limit=None) -> np.ndarray:
+        """Колонки (6, n) по возрастанию времени — копия, буфер можно писать дальше."""
+        if self.total <= self.capacity:
+            out = self.cols[:, :self.total]
+        else:
+            split = self.total % self.capacity
+            out = np.concatenate((self.cols[:, split:], self.cols[:, :split]), axis=1)
+        if limit is not None:
+            out = out[:, max(0, out.shape[1] - limit):]
+        return out.copy()
+
+    @property
+    def last_time(self):
+        return self.cols[TIME, (self.total - 1) % self.capacity] if self.total else None
+
+
+class _PairBars:
+    def __init__(self, timeframes, capacity):
+        self.rings = {tf: BarRing(capacity) for tf in timeframes}
+        self.forming = dict.fromkeys(timeframes)
+
+
+# =============================
+# Хранилище
+# =============================
+
+class RaBarStore:
+    def __init__(self, path=BARS_DIR, timeframes=None, capacity=CAPACITY):
+        self.path = path
+        self.timeframes = dict(timeframes or TIMEFRAMES)
+        self.base = next(iter(self.timeframes))
+        self.higher = [(tf, sec) for tf, sec in self.timeframes.items() if tf != self.base]
+        self.capacity = capacity
+        self.pairs = {}
+        self._lock = threading.RLock()
+        self._dirty = set()
+        self._last_save = 0.0
+        self._replayed = set()
+        self.metrics = Counter()
+        self._load()
+
+    def _pair(self, pair) -> _PairBars:
+        state = self.pairs.get(pair)
+        if state is None:
+            state = self.pairs[pair] = _PairBars(self.timeframes, self.capacity)
+        return state
+
+    # =============================
+    # Тики и свёртка
+    # =============================
+
+    def on_tick(self, pair, ts, price, volume=None):
+        """
+        Котировка в формирующийся бар базового ТФ. volume=None — считаем тики.
+        Тик старше формирующегося бара или из уже закрытого (опоздал,
+        повтор той же котировки после close_until) отбрасывается.
+        """
+        ts = to_seconds(ts)
+        price = float(price)
+        volume = 1.0 if volume is None else float(volume)
+        sec = self.timeframes[self.base]
+        bucket = ts - ts % sec
+
+        with self._lock:
+            state = self._pair(pair)
+            cur = state.forming[self.base]
+            last = state.rings[self.base].last_time
+            if (cur is not None and bucket < cur[TIME]) or (last is not None and bucket <= last):
+                self.metrics["late"] += 1
+                return False
+            self._advance(state, ts)
+            cur = state.forming[self.base]
+            if cur is None:
+                state.forming[self.base] = [bucket, price, price, price, price, volume]
+            else:
+                if price > cur[HIGH]:
+                    cur[HIGH] = price
+                elif price < cur[LOW]:
+                    cur[LOW] = price
+                cur[CLOSE] = price
+                cur[VOLUME] += volume
+            self.metrics["ticks"] += 1
+            self._dirty.add(pair)
+        return True
+
+    def _advance(self, state, ts):
+        # Закрываем всё, чей интервал кончился к ts: сначала базовый (со свёрткой вверх), потом старшие
+        cur = state.forming[self.base]
+        if cur is not None and cur[TIME] + self.timeframes[self.base] <= ts:
+            state.forming[self.base] = None
+            self._close_base(state, cur)
+        for tf, sec in self.higher:
+            cur = state.forming[tf]
+            if cur is not None and cur[TIME] + sec <= ts:
+                state.rings[tf].append(cur)
+                state.forming[tf] = None
+                self.metrics["bars"] += 1
+
+    def _close_base(self, state, bar):
+        state.rings[self.base].append(bar)
+        self.metrics["bars"] += 1
+        for tf, sec in self.higher:
+            bucket = bar[TIME] - bar[TIME] % sec
+            last = state.rings[tf].last_time
+            if last is not None and bucket <= last:
+                # Бар старшего ТФ уже закрыт — второй раз его не открываем
+                continue
+            cur = state.forming[tf]
+            if cur is not None and bucket > cur[TIME]:
+                state.rings[tf].append(cur)
+                self.metrics["bars"] += 1
+                cur = None
+            if cur is None:
+                state.forming[tf] = [bucket, bar[OPEN], bar[HIGH], bar[LOW], bar[CLOSE], bar[VOLUME]]
+            else:
+                cur[HIGH] = max(cur[HIGH], bar[HIGH])
+                cur[LOW] = min(cur[LOW], bar[LOW])
+                cur[CLOSE] = bar[CLOSE]
+                cur[VOLUME] += bar[VOLUME]
+
+    def close_until(self, ts=None, pair=None):
+        """Закрывает бары, чей интервал кончился к ts (по умолчанию — сейчас), даже без новых тиков."""
+        ts = time.time() if ts is None else to_seconds(ts)
+        with self._lock:
+            for name in ([pair] if pair is not None else list(self.pairs)):
+                state = self.pairs.get(name)
+                if state is not None:
+                    before = self.metrics["bars"]
+                    self._advance(state, ts)
+                    if self.metrics["bars"] != before:
+                        self._dirty.add(name)
+
+    # =============================
+    # Чтение
+    # =============================
+
+    def arrays(self, pair, tf, limit=None) -> dict:
+        """Закрытые бары {колонка: массив} по возрастанию времени."""
+        if tf not in self.timeframes:
+            raise ValueError(f"Неизвестный таймфрейм: {tf}")
+        with self._lock:
+            state = self.pairs.get(pair)
+            cols = state.rings[tf].arrays(limit) if state else np.empty((len(COLUMNS), 0))
+        return dict(zip(COLUMNS, cols))
+
+    def frame(self, pair, tf, limit=None):
+        """Закрытые бары в DataFrame с колонками ForexBrain: pair, time, open, high, low, close, volume."""
+        import pandas as pd
+
+        cols = self.arrays(pair, tf, limit)
+        df = pd.DataFrame({k: v for k, v in cols.items() if k != "time"})
+        df.insert(0, "time", pd.to_datetime(cols["time"], unit="s"))
+        df.insert(0, "pair", pair)
+        return df
+
+    def forming(self, pair, tf):
+        state = self.pairs.get(pair)
+        bar = state.forming.get(tf) if state else None
+        return dict(zip(COLUMNS, bar)) if bar else None
+
+    def __len__(self):
+        return len(self.pairs)
+
+    # =============================
+    # Тиковые файлы
+    # =============================
+
+    def replay(self, path, once=True) -> int:
+        """
+        Проигрывает тиковый CSV (time,pair,price[,volume]; либо bid/ask вместо price — берём середину).
+        once — один и тот же файл второй раз не проигрывается.
+        """
+        key = os.path.abspath(path)
+        if once and key in self._replayed:
+            return 0
+        count = 0
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                price = row.get("price")
+                if not price:
+                    price = (float(row["bid"]) + float(row["ask"])) / 2
+                volume = row.get("volume")
+                self.on_tick(row["pair"], row["time"], price, float(volume) if volume else None)
+                count += 1
+        self._replayed.add(key)
+        log.info(f"[BarStore] Проиграно {count} тиков из {path}")
+        return count
+
+    # =============================
+    # Хранение
+    # =============================
+
+    def _file(self, pair):
+        return os.path.join(self.path, f"{pair}.npz")
+
+    def _load(self):
+        if not os.path.isdir(self.path):
+            return
+        for name in os.listdir(self.path):
+            if not name.endswith(".npz"):
+                continue
+            pair = name[:-4]
+            try:
+                with np.load(os.path.join(self.path, name)) as data:
+                    state = self._pair(pair)
+                    for tf in self.timeframes:
+                        if tf in data.files:
+                            state.rings[tf].extend(data[tf])
+                    if "forming" in data.files:
+                        saved = [str(tf) for tf in data["forming_tf"]]
+                        for tf, bar in zip(saved, data["forming"]):
+                            if tf in self.timeframes and not math.isnan(bar[TIME]):
+                                state.forming[tf] = bar.tolist()
+            except Exception as e:
+                log.warning(f"[BarStore] {name} не прочитан: {e}")
+                self.pairs.pop(pair, None)
+
+    def save(self, pairs=None):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            names = list(self._dirty if pairs is None else pairs)
+            snapshot = {}
+            for pair in names:
+                state = self.pairs[pair]
+                arrays = {tf: ring.arrays() for tf, ring in state.rings.items()}
+                arrays["forming_tf"] = np.array(list(state.forming))
+                arrays["forming"] = np.array([bar or [math.nan] * len(COLUMNS) for bar in state.forming.values()])
+                snapshot[pair] = arrays
+            self._dirty.difference_update(names)
+        for pair, arrays in snapshot.items():
+            tmp = self._file(pair) + ".tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self._file(pair))
+        self._last_save = time.monotonic()
+
+    def save_if_dirty(self, force=False):
+        if not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_save < SAVE_INTERVAL:
+            return
+        try:
+            self.save()
+        except Exception as e:
+            log.warning(f"[BarStore] Бары не сохранены: {e}")
+
+    def stats(self):
+        return {
+            **self.metrics,
+            "pairs": len(self.pairs),
+            "bars_stored": {tf: sum(len(s.rings[tf]) for s in self.pairs.values()) for tf in self.timeframes}
+        }
+
+
+# =============================
+# Синтетические тики
+# =============================
+
+def synthetic_ticks(pairs, start, seconds, interval=1.0, seed=1):
+    """
+    Случайное блуждание котировок: тик на пару каждые ~interval секунд.
+    Выдаёт (time, pair, price) по возрастанию времени.
+    """
+    rnd = random.Random(seed)
+    prices = {pair: 1.0 + rnd.random() for pair in pairs}
+    t = to_seconds(start)
+    end = t + seconds
+    while t < end:
+        for pair in pairs:
+            prices[pair] *= 1 + rnd.gauss(0, 0.0001)
+            yield t, pair, round(prices[pair], 6)
+        t += interval * rnd.uniform(0.5, 1.5)
+
+
+def write_ticks(path, ticks):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time", "pair", "price"])
+        count = 0
+        for ts, pair, price in ticks:
+            writer.writerow([f"{ts:.3f}", pair, price])
+            count += 1
+    return count
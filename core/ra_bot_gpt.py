@@ -14,6 +14,8 @@ from aiogram.filters import Command
 from aiogram.types import Message
 from core.telegram_sender import send_admin
 from core.ra_memory import memory
+from core.ra_http_pool import http_pool
+from core.telegram_stream import stream_to_message
 
 # ------------------------------- ROOT & PATHS -------------------------------
 ROOT_DIR = Path(__file__).resolve().parent.parent
@@ -23,6 +25,9 @@ LOG_DIR = ROOT_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "command_usage.json"
 
+# Потоковые ответы: заглушка + постепенные правки сообщения
+STREAM_REPLIES = os.getenv("RA_STREAM_REPLIES", "1") == "1"
+
 # ------------------------------- LOGGING -------------------------------
 logging.basicConfig(
     level=logging.INFO,
@@ -112,7 +117,9 @@ async def process_message(user_id: int, text: str):
     if not text or not text.strip():
         return "🤍 Я здесь."
     log_command(user_id, text)
+    return await _reply(user_id, text)
 
+async def _reply(user_id: int, text: str):
     if self_master:
         try:
             if hasattr(self_master, "process_text"):
@@ -132,6 +139,25 @@ async def process_message(user_id: int, text: str):
 
     return "🌞 Я слышу тебя. Продолжай, брат."
 
+async def process_message_stream(user_id: int, text: str):
+    if not (self_master and hasattr(self_master, "process_text_stream") and text and text.strip()):
+        yield await process_message(user_id, text)
+        return
+
+    log_command(user_id, text)
+    sent = False
+    try:
+        async for chunk in self_master.process_text_stream(user_id, text):
+            sent = sent or bool(chunk)
+            yield chunk
+    except Exception as e:
+        log.warning(f"[process_message_stream] self_master error: {e}")
+        if not sent:
+            # Ничего ещё не показали — отвечаем обычным путём (с запасным thinker)
+            yield await _reply(user_id, text)
+        else:
+            yield "\n\n🤍 Ответ оборвался, брат."
+
 # ------------------------------- SYSTEM MONITOR -------------------------------
 from modules.system import record_system_info
 
@@ -156,12 +182,24 @@ async def handle_message(message: Message):
     # Запоминаем входящее сообщение
     await memory.append(user_id, text, source="telegram")
 
-    reply = await process_message(user_id, text)
+    if STREAM_REPLIES:
+        try:
+            reply, ttfb = await stream_to_message(message, process_message_stream(user_id, text))
+            if ttfb is not None:
+                log.info(f"[handle_message] первый кусочек ответа за {ttfb:.2f}s")
+            # Пустой поток stream_to_message показывает как «Я здесь»
+            reply = reply or "🤍 Я здесь."
+        except Exception as e:
+            log.warning(f"[handle_message] поток не удался: {e}")
+            # log_command уже записал запрос в process_message_stream
+            reply = await _reply(user_id, text) if text and text.strip() else "🤍 Я здесь."
+            await message.answer(reply)
+    else:
+        reply = await process_message(user_id, text)
+        await message.answer(reply)
 
     # Запоминаем ответ Ра
     await memory.append(user_id, reply, source="ra")
-
-    await message.answer(reply)
 # ------------------------------- MAIN ENTRY -------------------------------
 async def main():
     global bot, self_master, thinker, ra_scheduler
@@ -220,6 +258,8 @@ async def main():
     try:
         await dp.start_polling(bot)
     finally:
+        await memory.flush()
+        await http_pool.close()
         await bot.session.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,299 @@
+# core/ra_chronicle_store.py
+"""
+Хранилище Хроник Мира (modules.world_chronicles).
+
+На диске — append-only журнал data/world_chronicles.jsonl: новая запись
+дописывается одной строкой, без перезаписи всей летописи.
+В памяти — записи в порядке добавления и вторичные индексы:
+    category / author / entity  — значение → позиции записей
+    tags                        — тег → позиции
+    resonance                   — отсортированный список (резонанс, позиция)
+    terms                       — слово → позиции, плюс отсортированный словарь
+                                  для поиска по префиксу
+Выборка стоит O(размер ответа), а не проход по всем записям.
+Один экземпляр на файл: все WorldChronicles процесса делят одно хранилище.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from core.ra_knowledge_index import tokenize
+
+log = logging.getLogger("RaChronicleStore")
+
+INDEXED_FIELDS = ("category", "author", "entity")
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path):
+    """Общий экземпляр хранилища для пути (несколько WorldChronicles — один журнал)."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = RaChronicleStore(path)
+        return store
+
+
+class RaChronicleStore:
+    def __init__(self, path="data/world_chronicles.jsonl"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self._reset()
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _reset(self):
+        self.entries = []
+        self.by_id = {}
+        self.fields = {f: defaultdict(list) for f in INDEXED_FIELDS}
+        self.tags = defaultdict(list)
+        self.terms = defaultdict(list)
+        self.vocabulary = []
+        self.terms_ready = False
+        self.resonance = []
+        self.destiny_pos = []
+        self.eternal_pos = []
+        self.next_id = 1
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Недописанная последняя строка после падения
+                    continue
+                self._index(entry, bulk=True)
+        self._finish_bulk()
+
+    def _finish_bulk(self):
+        if self.terms_ready:
+            self.vocabulary = sorted(self.terms)
+        self.resonance.sort()
+
+    def _index_terms(self, entry, pos, new_terms=None):
+        for word in set(tokenize(f"{entry.get('title', '')} {entry.get('content', '')}")):
+            postings = self.terms[word]
+            if not postings and new_terms is not None:
+                new_terms.append(word)
+            postings.append(pos)
+
+    def _ensure_terms(self):
+        # Словарный индекс нужен только search() — строим при первом поиске, а не при старте
+        if self.terms_ready:
+            return
+        with self.lock:
+            if self.terms_ready:
+                return
+            for pos, entry in enumerate(self.entries):
+                self._index_terms(entry, pos)
+            self.vocabulary = sorted(self.terms)
+            self.terms_ready = True
+
+    # ----------------------------------------------------
+    # ИНДЕКСЫ
+    # ----------------------------------------------------
+
+    def _index(self, entry, new_terms=None, bulk=False):
+        pos = len(self.entries)
+        self.entries.append(entry)
+        self.by_id[entry["id"]] = pos
+        self.next_id = max(self.next_id, entry["id"] + 1)
+
+        for f in INDEXED_FIELDS:
+            self.fields[f][entry.get(f)].append(pos)
+        for tag in dict.fromkeys(entry.get("tags") or []):
+            self.tags[tag].append(pos)
+        if self.terms_ready:
+            self._index_terms(entry, pos, new_terms)
+
+        resonance = entry.get("resonance") or 0.0
+        # При массовой загрузке сортируем один раз в конце (_finish_bulk)
+        if bulk or not self.resonance or self.resonance[-1][0] <= resonance:
+            self.resonance.append((resonance, pos))
+        else:
+            bisect.insort(self.resonance, (resonance, pos))
+        if entry.get("destiny_mark"):
+            self.destiny_pos.append(pos)
+        if entry.get("worthy_of_eternity"):
+            self.eternal_pos.append(pos)
+
+    def _entries(self, positions, limit=None):
+        if limit is not None:
+            positions = positions[:limit]
+        return [self.entries[p] for p in positions]
+
+    # ----------------------------------------------------
+    # ЗАПИСЬ
+    # ----------------------------------------------------
+
+    def add(self, entry: dict) -> int:
+        """Дописывает запись в журнал; id выдаётся, если не задан или занят."""
+        with self.lock:
+            self._assign_id(entry)
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+            new_terms = []
+            self._index(entry, new_terms)
+            for word in new_terms:
+                bisect.insort(self.vocabulary, word)
+        return entry["id"]
+
+    def add_many(self, entries) -> int:
+        count = 0
+        with self.lock:
+            for entry in entries:
+                self._assign_id(entry)
+                self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                self._index(entry, bulk=True)
+                count += 1
+            self._file.flush()
+            self._finish_bulk()
+        return count
+
+    def _assign_id(self, entry):
+        if not isinstance(entry.get("id"), int) or entry["id"] in self.by_id:
+            entry["id"] = self.next_id
+
+    def clear(self):
+        with self.lock:
+            self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._reset()
+
+    def import_json(self, path) -> int:
+        """Переносит старый data/world_chronicles.json (список записей) в журнал."""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            log.warning(f"⚠️ Хроники {path} не прочитаны: {e}")
+            return 0
+        if not isinstance(data, list):
+            return 0
+
+        # Повторяющиеся id (несколько экземпляров старых хроник) перенумеровываются
+        imported = self.add_many(e for e in data if isinstance(e, dict))
+        os.replace(path, path + ".migrated")
+        log.info(f"📦 Перенесено {imported} записей хроник из {path}")
+        return imported
+
+    def close(self):
+        with self.lock:
+            self._file.close()
+
+    # ----------------------------------------------------
+    # ЧТЕНИЕ
+    # ----------------------------------------------------
+
+    def count(self) -> int:
+        return len(self.entries)
+
+    def get(self, entry_id):
+        pos = self.by_id.get(entry_id)
+        return self.entries[pos] if pos is not None else None
+
+    def all(self):
+        return list(self.entries)
+
+    def last(self, limit=1):
+        return self.entries[-limit:] if limit else []
+
+    def page(self, offset=0, limit=100, newest_first=False):
+        if not newest_first:
+            return self.entries[offset:offset + limit]
+        end = len(self.entries) - offset
+        return list(reversed(self.entries[max(0, end - limit):max(0, end)]))
+
+    def by_field(self, field, value, limit=None):
+        if field not in self.fields:
+            raise ValueError(f"Нет индекса по полю {field}")
+        return self._entries(self.fields[field].get(value, []), limit)
+
+    def by_tag(self, tag, limit=None):
+        return self._entries(self.tags.get(tag, []), limit)
+
+    def _resonance_slice(self, min_value=None, max_value=None):
+        lo = 0 if min_value is None else bisect.bisect_left(self.resonance, (min_value, -1))
+        hi = len(self.resonance) if max_value is None else bisect.bisect_right(self.resonance, (max_value, float("inf")))
+        return self.resonance[lo:hi]
+
+    def by_resonance(self, min_value=None, max_value=None, limit=None, strongest_first=False):
+        """Без strongest_first — в порядке добавления, как и остальные выборки."""
+        found = self._resonance_slice(min_value, max_value)
+        if strongest_first:
+            positions = [p for _, p in reversed(found)]
+        else:
+            positions = sorted(p for _, p in found)
+        return self._entries(positions, limit)
+
+    def count_resonance(self, min_value):
+        return len(self._resonance_slice(min_value))
+
+    def destiny(self, limit=None):
+        return self._entries(self.destiny_pos, limit)
+
+    def eternal(self, limit=None, newest_first=False):
+        positions = self.eternal_pos[::-1] if newest_first else self.eternal_pos
+        return self._entries(positions, limit)
+
+    def count_eternal(self):
+        return len(self.eternal_pos)
+
+    def _term_postings(self, word):
+        # Слово запроса — префикс: "свет" находит "светлый", "света"
+        i = bisect.bisect_left(self.vocabulary, word)
+        found = set()
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(word):
+            found.update(self.terms[self.vocabulary[i]])
+            i += 1
+        return found
+
+    def search(self, query: str, limit=None):
+        """
+        Кандидаты — пересечение постингов по словам запроса,
+        затем проверка, что запрос целиком встречается в заголовке или тексте.
+        """
+        self._ensure_terms()
+        q = query.lower()
+        words = list(dict.fromkeys(tokenize(query)))
+        if words:
+            candidates = None
+            for word in sorted(words, key=len, reverse=True):
+                postings = self._term_postings(word)
+                candidates = postings if candidates is None else candidates & postings
+                if not candidates:
+                    return []
+            positions = sorted(candidates)
+        else:
+            positions = range(len(self.entries))
+
+        found = []
+        for p in positions:
+            e = self.entries[p]
+            if q in e["title"].lower() or q in e["content"].lower():
+                found.append(e)
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "eternal": len(self.eternal_pos),
+            "terms": len(self.vocabulary) if self.terms_ready else None,
+            "path": str(self.path)
+        }
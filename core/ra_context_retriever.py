@@ -0,0 +1,164 @@
+# core/ra_context_retriever.py
+"""
+Отбор контекста РаСвета под конкретное сообщение.
+
+Корпус (текст из load_rasvet_files) один раз режется на куски по абзацам
+и индексируется лексически (BM25 в памяти). На каждое сообщение в системный
+промпт попадают только top-k релевантных кусков, влезающих в бюджет токенов,
+а не весь корпус целиком.
+"""
+
+import hashlib
+import logging
+import math
+import os
+from collections import Counter, OrderedDict, defaultdict
+
+from core.ra_knowledge_index import tokenize, BM25_K1, BM25_B
+
+log = logging.getLogger("RaContextRetriever")
+
+CHUNK_CHARS = int(os.getenv("RA_CONTEXT_CHUNK_CHARS", "800"))
+TOKEN_BUDGET = int(os.getenv("RA_CONTEXT_TOKEN_BUDGET", "1500"))
+TOP_K = int(os.getenv("RA_CONTEXT_TOP_K", "6"))
+CHARS_PER_TOKEN = 3  # грубая оценка для смеси кириллицы и латиницы
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_chunks(text: str, max_chars=CHUNK_CHARS):
+    """Режем по абзацам, склеивая мелкие и разрезая слишком длинные."""
+    chunks = []
+    current = ""
+    for para in (p.strip() for p in text.split("\n\n")):
+        if not para:
+            continue
+        while len(para) > max_chars:
+            cut = para.rfind(" ", 0, max_chars)
+            cut = cut if cut > max_chars // 2 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(para[:cut].strip())
+            para = para[cut:].strip()
+        if current and len(current) + len(para) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class RaContextRetriever:
+    def __init__(self, corpus: str = "", token_budget=TOKEN_BUDGET, top_k=TOP_K, cache_size=1000):
+        self.token_budget = token_budget
+        self.top_k = top_k
+        self.cache_size = cache_size
+        self._selections = OrderedDict()
+        self._last_by_user = {}
+        self.stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "reused_previous": 0,
+            "prompt_tokens_total": 0,
+            "prompt_tokens_last": 0,
+            "corpus_tokens": 0,
+            "chunks": 0
+        }
+        self.build(corpus)
+
+    # ----------------------------------------------------
+    # Индексация
+    # ----------------------------------------------------
+
+    def build(self, corpus: str):
+        self.chunks = split_chunks(corpus or "")
+        self.chunk_tokens = [estimate_tokens(c) for c in self.chunks]
+        self.postings = defaultdict(list)
+        self.lengths = []
+        for idx, chunk in enumerate(self.chunks):
+            terms = tokenize(chunk)
+            self.lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings[term].append((idx, tf))
+        self.avgdl = (sum(self.lengths) / len(self.lengths)) if self.lengths else 1.0
+        self._selections.clear()
+        self._last_by_user.clear()
+
+        self.stats["chunks"] = len(self.chunks)
+        self.stats["corpus_tokens"] = sum(self.chunk_tokens)
+        log.info(f"🌞 Контекст РаСвета разбит на {len(self.chunks)} кусков (~{self.stats['corpus_tokens']} токенов)")
+
+    def _rank(self, query: str):
+        n = len(self.chunks)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for idx, tf in postings:
+                dl = self.lengths[idx]
+                scores[idx] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / self.avgdl))
+        return sorted(scores, key=scores.get, reverse=True)
+
+    def _fit_budget(self, ranked):
+        picked = []
+        used = 0
+        for idx in ranked:
+            if len(picked) >= self.top_k:
+                break
+            if used + self.chunk_tokens[idx] > self.token_budget:
+                continue
+            picked.append(idx)
+            used += self.chunk_tokens[idx]
+        # В промпте сохраняем исходный порядок корпуса
+        return sorted(picked)
+
+    # ----------------------------------------------------
+    # Отбор
+    # ----------------------------------------------------
+
+    def select(self, user_id, query: str) -> str:
+        if not self.chunks:
+            return ""
+
+        self.stats["requests"] += 1
+        key = (str(user_id), hashlib.sha1(" ".join(sorted(set(tokenize(query)))).encode("utf-8")).hexdigest())
+
+        picked = self._selections.get(key)
+        if picked is not None:
+            self._selections.move_to_end(key)
+            self.stats["cache_hits"] += 1
+        else:
+            ranked = self._rank(query)
+            if not ranked and str(user_id) in self._last_by_user:
+                # "да", "продолжай" — остаёмся в контексте текущего разговора
+                picked = self._last_by_user[str(user_id)]
+                self.stats["reused_previous"] += 1
+            else:
+                # Без совпадений берём начало корпуса — ключевые тексты идут первыми
+                picked = self._fit_budget(ranked or range(len(self.chunks)))
+            # Кэшируем только отбор по совпадениям: без них ответ зависит
+            # от текущего разговора, и старый выбор подсунул бы прежнюю тему
+            if ranked:
+                self._selections[key] = picked
+                if len(self._selections) > self.cache_size:
+                    self._selections.popitem(last=False)
+
+        self._last_by_user[str(user_id)] = picked
+        context = "\n\n".join(self.chunks[i] for i in picked)
+
+        tokens = sum(self.chunk_tokens[i] for i in picked)
+        self.stats["prompt_tokens_last"] = tokens
+        self.stats["prompt_tokens_total"] += tokens
+        log.info(f"[Context] {user_id}: {len(picked)} кусков, ~{tokens} из {self.stats['corpus_tokens']} токенов корпуса")
+        return context
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["prompt_tokens_avg"] = stats["prompt_tokens_total"] / stats["requests"] if stats["requests"] else 0
+        return stats
@@ -0,0 +1,194 @@
+# core/ra_dispatch.py
+"""
+Движок доставки событий для RaEventBus.
+
+У каждого подписчика своя ограниченная очередь и свой воркер, поэтому
+медленный обработчик задерживает только себя, а не соседей и не emit.
+
+Политики переполнения очереди:
+    drop_oldest — выбрасываем самое старое ожидающее событие;
+    block       — emit ждёт, пока в очереди освободится место;
+    coalesce    — событие с тем же ключом заменяет ещё не обработанное.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+COALESCE = "coalesce"
+POLICIES = {DROP_OLDEST, BLOCK, COALESCE}
+
+DEFAULT_QUEUE_SIZE = 100
+
+_seq = itertools.count()
+
+
+class _Delivery:
+    __slots__ = ("data", "enqueued_at", "future")
+
+    def __init__(self, data, future=None):
+        self.data = data
+        self.enqueued_at = time.monotonic()
+        self.future = future
+
+
+class Subscription:
+    def __init__(self, event_type, callback, maxsize=DEFAULT_QUEUE_SIZE, policy=DROP_OLDEST, key=None, filter=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Неизвестная политика переполнения: {policy}")
+        if policy == COALESCE and key is None:
+            raise ValueError("Для coalesce нужен key=callable(data)")
+
+        self.event_type = event_type
+        self.callback = callback
+        self.name = getattr(callback, "__name__", repr(callback))
+        self.maxsize = maxsize
+        self.policy = policy
+        self.key = key
+        self.filter = filter
+        self.is_async = asyncio.iscoroutinefunction(callback)
+
+        self._pending = OrderedDict()
+        self._has_items = None
+        self._has_space = None
+        self._worker = None
+        self._busy = False
+
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.filtered = 0
+        self.max_lag = 0.0
+
+    def same_as(self, callback, filter=None):
+        return self.callback == callback and self.filter == filter
+
+    def accepts(self, data):
+        """Предикат filter отсекает событие до постановки в очередь."""
+        if self.filter is None:
+            return True
+        try:
+            if self.filter(data):
+                return True
+        except Exception as e:
+            logging.error(f"[EventBus] Filter error ({self.name} <- {self.event_type}): {e}")
+        self.filtered += 1
+        return False
+
+    # =============================
+    # Очередь
+    # =============================
+
+    def _ensure_worker(self):
+        if self._worker and not self._worker.done():
+            return
+        if self._has_items is None:
+            self._has_items = asyncio.Event()
+            self._has_space = asyncio.Event()
+            self._has_space.set()
+        self._worker = asyncio.get_running_loop().create_task(self._run(), name=f"bus:{self.event_type}:{self.name}")
+
+    def _drop(self, delivery):
+        self.dropped += 1
+        if delivery.future and not delivery.future.done():
+            delivery.future.set_result(None)
+
+    async def put(self, data, future=None):
+        self._ensure_worker()
+        delivery = _Delivery(data, future)
+
+        if self.policy == COALESCE:
+            k = self.key(data)
+            if k in self._pending:
+                # Заменяем содержимое, сохраняя место в очереди и время постановки
+                old = self._pending[k]
+                delivery.enqueued_at = old.enqueued_at
+                self._pending[k] = delivery
+                self.coalesced += 1
+                if old.future and not old.future.done():
+                    old.future.set_result(None)
+                return
+        else:
+            k = next(_seq)
+
+        while len(self._pending) >= self.maxsize:
+            if self.policy == BLOCK:
+                self._has_space.clear()
+                await self._has_space.wait()
+            else:
+                _, oldest = self._pending.popitem(last=False)
+                self._drop(oldest)
+
+        self._pending[k] = delivery
+        self._has_items.set()
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._has_items.clear()
+                await self._has_items.wait()
+                continue
+
+            _, delivery = self._pending.popitem(last=False)
+            self._has_space.set()
+            self.max_lag = max(self.max_lag, time.monotonic() - delivery.enqueued_at)
+
+            self._busy = True
+            try:
+                result = self.callback(delivery.data)
+                if self.is_async or asyncio.iscoroutine(result):
+                    result = await result
+                self.processed += 1
+                if delivery.future and not delivery.future.done():
+                    delivery.future.set_result(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"[EventBus] Callback error ({self.name} <- {self.event_type}): {e}")
+                if delivery.future and not delivery.future.done():
+                    delivery.future.set_result(None)
+            finally:
+                self._busy = False
+
+    async def drain(self):
+        """Ждёт, пока очередь подписчика опустеет."""
+        while self._pending or self._busy:
+            await asyncio.sleep(0.01)
+
+    def stop(self):
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        for delivery in self._pending.values():
+            self._drop(delivery)
+        self._pending.clear()
+
+    # =============================
+    # Метрики
+    # =============================
+
+    def lag(self):
+        if not self._pending:
+            return 0.0
+        oldest = next(iter(self._pending.values()))
+        return time.monotonic() - oldest.enqueued_at
+
+    def metrics(self):
+        return {
+            "event_type": self.event_type,
+            "callback": self.name,
+            "policy": self.policy,
+            "queued": len(self._pending),
+            "lag": round(self.lag(), 4),
+            "max_lag": round(self.max_lag, 4),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "filtered": self.filtered,
+            "errors": self.errors
+        }
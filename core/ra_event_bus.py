@@ -6,24 +6,66 @@ from datetime import datetime
 import asyncio
 import logging
 
+from core.ra_dispatch import Subscription, DEFAULT_QUEUE_SIZE, DROP_OLDEST
+from core.ra_topic_router import TopicRouter
+from core.ra_ws_hub import RaWsHub
+
+FIRE = "fire"
+AWAIT_ALL = "all"
+AWAIT_FIRST = "first"
+
 
 class RaEventBus:
     """
     Нервная система Ра.
     Передаёт импульсы между всеми чувствами, модулями и сердцем.
+
+    Каждый подписчик получает события через свою очередь и свой воркер
+    (core.ra_dispatch), поэтому emit не ждёт медленных обработчиков:
+        mode="fire"  — поставить в очереди и сразу вернуться (по умолчанию);
+        mode="all"   — дождаться всех подписчиков, вернуть список результатов;
+        mode="first" — дождаться первого ответившего подписчика.
+
+    Тип события — топик с точками ("heart.impulse"); подписка принимает
+    шаблоны с "*" (один сегмент) и "#" (любой хвост), см. core.ra_topic_router.
+
+    С journal (core.ra_event_journal) события переживают перезапуск,
+    получают offset и могут быть дочитаны с любого места.
     """
 
-    def __init__(self, history_limit=500):
+    def __init__(self, history_limit=500, default_mode=FIRE, journal=None):
         self.subscribers = defaultdict(list)
+        self.router = TopicRouter()
         self.event_log = deque(maxlen=history_limit)
-        self.ws_clients = set()
+        self.journal = journal
+        self.ws_hub = RaWsHub()
         self.lock = asyncio.Lock()
+        self.default_mode = default_mode
+        self.emitted = 0
+
+    def subscribe(self, event_type: str, callback, maxsize=DEFAULT_QUEUE_SIZE, policy=DROP_OLDEST, key=None, filter=None):
+        # Повторная подписка того же обработчика с тем же фильтром — та же подписка
+        for sub in self.subscribers.get(event_type, ()):
+            if sub.same_as(callback, filter):
+                logging.debug(f"[EventBus] Повторная подписка пропущена: {sub.name} <- {event_type}")
+                return sub
 
-    def subscribe(self, event_type: str, callback):
-        self.subscribers[event_type].append(callback)
-        logging.info(f"[EventBus] Подписка: {callback.__name__} <- {event_type}")
+        sub = Subscription(event_type, callback, maxsize=maxsize, policy=policy, key=key, filter=filter)
+        self.subscribers[event_type].append(sub)
+        self.router.add(event_type, sub)
+        logging.info(f"[EventBus] Подписка: {sub.name} <- {event_type}")
+        return sub
 
-    async def emit(self, event_type: str, data, source="system"):
+    def unsubscribe(self, event_type: str, callback):
+        subs = self.subscribers.get(event_type, [])
+        for sub in [s for s in subs if s.callback == callback]:
+            sub.stop()
+            subs.remove(sub)
+            self.router.remove(event_type, sub)
+        if not subs:
+            self.subscribers.pop(event_type, None)
+
+    async def emit(self, event_type: str, data, source="system", mode=None):
         payload = {
             "time": datetime.utcnow().isoformat(),
             "type": event_type,
@@ -31,41 +73,106 @@ class RaEventBus:
             "source": source
         }
 
+        if self.journal:
+            try:
+                payload["offset"] = self.journal.append(payload)
+            except Exception as e:
+                logging.error(f"[EventBus] Ошибка записи в журнал: {e}")
+
         self.event_log.append(payload)
+        self.emitted += 1
         logging.info(f"[EventBus] ⚡ Импульс: {event_type} | {data}")
 
-        # Локальные подписчики
-        if event_type in self.subscribers:
-            for cb in list(self.subscribers[event_type]):
-                try:
-                    if asyncio.iscoroutinefunction(cb):
-                        await cb(data)
-                    else:
-                        cb(data)
-                except Exception as e:
-                    logging.error(f"[EventBus] Callback error: {e}")
-
-        # WebSocket клиенты
-        await self._emit_ws(payload)
-
-    async def _emit_ws(self, payload):
-        dead = []
-        for ws in self.ws_clients:
-            try:
-                await ws.send_json(payload)
-            except Exception:
-                dead.append(ws)
-        for ws in dead:
-            self.ws_clients.remove(ws)
+        mode = mode or self.default_mode
+        loop = asyncio.get_running_loop()
+        futures = []
+
+        # Локальные подписчики по дереву топиков — каждому в свою очередь
+        for sub in self.router.resolve(event_type):
+            if not sub.accepts(data):
+                continue
+            future = loop.create_future() if mode != FIRE else None
+            await sub.put(data, future)
+            if future:
+                futures.append(future)
 
-    def attach_ws(self, ws):
-        self.ws_clients.add(ws)
+        # WebSocket клиенты — только постановка в их буферы
+        self._emit_ws(payload)
+
+        if mode == AWAIT_ALL and futures:
+            return await asyncio.gather(*futures)
+        if mode == AWAIT_FIRST and futures:
+            done, _ = await asyncio.wait(futures, return_when=asyncio.FIRST_COMPLETED)
+            return next(iter(done)).result()
+        return None
+
+    def _emit_ws(self, payload):
+        try:
+            self.ws_hub.broadcast(payload)
+        except Exception as e:
+            logging.error(f"[EventBus] Ошибка рассылки WS: {e}")
+
+    @property
+    def ws_clients(self):
+        return set(self.ws_hub.clients)
+
+    def attach_ws(self, ws, topics=None, since=None):
+        backlog = []
+        if since is not None and self.journal:
+            # Чтение журнала и подключение без await между ними — событие не потеряется
+            limit = self.ws_hub.maxsize // 2
+            backlog = self.journal.read(since=since, topic=topics, limit=limit + 1)
+            if len(backlog) > limit:
+                rest = backlog[limit]["offset"]
+                backlog = backlog[:limit] + [{"type": "journal_truncated", "next_offset": rest}]
+        return self.ws_hub.attach(ws, topics=topics, backlog=backlog)
+
+    def set_ws_topics(self, ws, topics):
+        self.ws_hub.set_topics(ws, topics)
 
     def detach_ws(self, ws):
-        self.ws_clients.discard(ws)
+        self.ws_hub.detach(ws)
 
-    def get_events(self):
-        return list(self.event_log)
+    async def drain(self):
+        """Ждёт, пока все очереди подписчиков будут обработаны."""
+        for subs in list(self.subscribers.values()):
+            for sub in subs:
+                await sub.drain()
+
+    def stop(self):
+        for subs in self.subscribers.values():
+            for sub in subs:
+                sub.stop()
+        self.ws_hub.stop()
+        if self.journal:
+            self.journal.flush()
+
+    def get_events(self, since=None, topic=None, limit=None):
+        """
+        Без аргументов — последние события, как раньше.
+        since — offset, с которого читать; topic — шаблон или список шаблонов.
+        """
+        if self.journal:
+            if since is None:
+                return self.journal.tail(limit or self.event_log.maxlen, topic=topic)
+            return self.journal.read(since=since, topic=topic, limit=limit or 100)
+
+        events = list(self.event_log)
+        if topic:
+            router = TopicRouter()
+            for pattern in ([topic] if isinstance(topic, str) else topic):
+                router.add(pattern, pattern)
+            events = [e for e in events if router.resolve(e["type"])]
+        return events[-limit:] if limit else events
 
     def get_subscribers(self):
-        return {k: [cb.__name__ for cb in v] for k, v in self.subscribers.items()}
+        return {k: [sub.name for sub in v] for k, v in self.subscribers.items()}
+
+    def get_metrics(self):
+        return {
+            "emitted": self.emitted,
+            "routes_cached": self.router.cache_size(),
+            "ws": self.ws_hub.get_metrics(),
+            "journal": self.journal.stats() if self.journal else None,
+            "subscribers": [sub.metrics() for subs in self.subscribers.values() for sub in subs]
+        }
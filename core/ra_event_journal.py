@@ -0,0 +1,363 @@
+# core/ra_event_journal.py
+"""
+Журнал событий шины Ра: append-only сегменты в mmap.
+
+    data/event_journal/
+        00000000000000000000.log   — записи подряд
+        00000000000000000000.idx   — разреженный индекс (offset, позиция, время)
+
+Каждое событие получает монотонный offset. Запись:
+    <I длина тела> <Q offset> <d время> <H длина топика> топик тело(JSON)
+Длина пишется последней — недописанная при падении запись читается как конец сегмента.
+
+Индекс пишется раз в INDEX_INTERVAL байт, поэтому поиск по offset или времени —
+бинарный поиск по индексу и короткий проход внутри сегмента, а не чтение всего журнала.
+Старые сегменты удаляются по суммарному размеру и возрасту.
+"""
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+
+from core.ra_topic_router import TopicRouter
+
+log = logging.getLogger("RaEventJournal")
+
+HEADER = struct.Struct("<IQdH")
+INDEX_ENTRY = struct.Struct("<QQd")
+
+SEGMENT_BYTES = int(os.getenv("RA_JOURNAL_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+RETENTION_BYTES = int(os.getenv("RA_JOURNAL_RETENTION_BYTES", str(256 * 1024 * 1024)))
+RETENTION_SEC = float(os.getenv("RA_JOURNAL_RETENTION_SEC", str(7 * 86400)))
+INDEX_INTERVAL = 4096
+
+
+class _Segment:
+    def __init__(self, root: Path, base: int):
+        self.base = base
+        self.path = root / f"{base:020d}.log"
+        self.index_path = root / f"{base:020d}.idx"
+        self.index = []          # [(offset, pos, ts)]
+        self.end = 0
+        self.next_offset = base
+        self.last_ts = 0.0
+        self.mm = None
+        self._file = None
+        self._index_file = None
+        self._since_index = 0
+
+    # =============================
+    # Файлы
+    # =============================
+
+    def open_write(self, size):
+        exists = self.path.exists()
+        self._file = open(self.path, "r+b" if exists else "w+b")
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        self.mm = mmap.mmap(self._file.fileno(), 0)
+        self._index_file = open(self.index_path, "ab")
+
+    def open_read(self):
+        """Одна карта чтения на сегмент, до close(); дескриптор файла ей не нужен."""
+        if self.mm is None:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def capacity(self):
+        return len(self.mm) if self.mm is not None else 0
+
+    def seal(self):
+        """Сегмент заполнен: обрезаем преаллокацию и переводим в режим чтения."""
+        self.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(self.end)
+
+    def close(self):
+        if self.mm is not None:
+            if not self.mm.closed and self._index_file:
+                self.mm.flush()
+            self.mm.close()
+            self.mm = None
+        for f in (self._file, self._index_file):
+            if f:
+                f.close()
+        self._file = self._index_file = None
+
+    def size(self):
+        return self.end
+
+    # =============================
+    # Индекс
+    # =============================
+
+    def load_index(self):
+        self.index = []
+        if self.index_path.exists():
+            raw = self.index_path.read_bytes()
+            usable = len(raw) - len(raw) % INDEX_ENTRY.size
+            self.index = [INDEX_ENTRY.unpack_from(raw, i) for i in range(0, usable, INDEX_ENTRY.size)]
+
+    def recover(self):
+        """Находит конец данных, дочитывая записи после последней точки индекса."""
+        self.open_read()
+        pos, offset, ts = 0, self.base, 0.0
+        if self.index:
+            offset, pos, ts = self.index[-1]
+        for rec_offset, _, rec_ts, _, next_pos in self.scan(pos):
+            offset, ts, pos = rec_offset + 1, rec_ts, next_pos
+        self.end = pos
+        self.next_offset = offset
+        self.last_ts = ts
+        self.close()
+
+    def add_index(self, offset, pos, ts):
+        entry = (offset, pos, ts)
+        self.index.append(entry)
+        self._index_file.write(INDEX_ENTRY.pack(*entry))
+        self._since_index = 0
+
+    def seek(self, offset=None, ts=None):
+        """Позиция, с которой начинать чтение, чтобы не пропустить offset/время."""
+        if not self.index:
+            return 0
+        if offset is not None:
+            i = bisect.bisect_right(self.index, offset, key=lambda e: e[0]) - 1
+        else:
+            i = bisect.bisect_right(self.index, ts, key=lambda e: e[2]) - 1
+        return self.index[i][1] if i >= 0 else 0
+
+    # =============================
+    # Записи
+    # =============================
+
+    def write(self, offset, ts, topic: bytes, body: bytes):
+        pos = self.end
+        if self._since_index == 0 or self._since_index >= INDEX_INTERVAL:
+            self.add_index(offset, pos, ts)
+
+        start = pos + HEADER.size
+        self.mm[pos + 4:start] = HEADER.pack(0, offset, ts, len(topic))[4:]
+        self.mm[start:start + len(topic)] = topic
+        self.mm[start + len(topic):start + len(topic) + len(body)] = body
+        # Длина — последней: запись видна читателю только целиком
+        self.mm[pos:pos + 4] = struct.pack("<I", len(body))
+
+        self.end = start + len(topic) + len(body)
+        self._since_index += self.end - pos
+        self.next_offset = offset + 1
+        self.last_ts = ts
+
+    def scan(self, pos=0, limit_pos=None):
+        """Итерирует (offset, topic, ts, body_start, next_pos) без разбора JSON."""
+        mm = self.mm
+        if mm is None:
+            return
+        end = limit_pos if limit_pos is not None else len(mm)
+        while pos + HEADER.size <= end:
+            length, offset, ts, tlen = HEADER.unpack_from(mm, pos)
+            if length == 0:
+                return
+            start = pos + HEADER.size
+            next_pos = start + tlen + length
+            if next_pos > end:
+                return
+            yield offset, mm[start:start + tlen], ts, start + tlen, next_pos
+            pos = next_pos
+
+
+class RaEventJournal:
+    def __init__(self, root="data/event_journal", segment_bytes=SEGMENT_BYTES,
+                 retention_bytes=RETENTION_BYTES, retention_sec=RETENTION_SEC):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        self.retention_sec = retention_sec
+
+        self.segments = []
+        self.appended = 0
+        self.deleted_segments = 0
+        self._open()
+
+    # =============================
+    # Открытие / восстановление
+    # =============================
+
+    def _open(self):
+        bases = sorted(int(p.stem) for p in self.root.glob("*.log") if p.stem.isdigit())
+        for base in bases:
+            seg = _Segment(self.root, base)
+            seg.load_index()
+            seg.recover()
+            self.segments.append(seg)
+
+        if not self.segments:
+            self.segments.append(_Segment(self.root, 0))
+        self.active.open_write(max(self.segment_bytes, self.active.end))
+        self.enforce_retention()
+        if self.segments[:-1]:
+            log.info(f"[Journal] Открыт: {len(self.segments)} сегментов, offset {self.first_offset}..{self.next_offset}")
+
+    @property
+    def active(self) -> _Segment:
+        return self.segments[-1]
+
+    @property
+    def next_offset(self):
+        return self.active.next_offset
+
+    @property
+    def first_offset(self):
+        return self.segments[0].base
+
+    # =============================
+    # Запись
+    # =============================
+
+    def append(self, payload: dict, topic: str = None) -> int:
+        topic_b = (topic or payload.get("type", "")).encode("utf-8")
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        need = HEADER.size + len(topic_b) + len(body)
+
+        seg = self.active
+        if seg.end + need > seg.capacity():
+            seg = self._roll(need)
+
+        offset = seg.next_offset
+        seg.write(offset, max(time.time(), seg.last_ts), topic_b, body)
+        self.appended += 1
+        return offset
+
+    def _roll(self, need):
+        old = self.active
+        old.seal()
+        seg = _Segment(self.root, old.next_offset)
+        seg.last_ts = old.last_ts
+        seg.open_write(max(self.segment_bytes, need))
+        self.segments.append(seg)
+        self.enforce_retention()
+        return seg
+
+    def enforce_retention(self, now=None):
+        now = now or time.time()
+        total = sum(s.size() for s in self.segments)
+        while len(self.segments) > 1:
+            oldest = self.segments[0]
+            expired = oldest.last_ts and now - oldest.last_ts > self.retention_sec
+            if total <= self.retention_bytes and not expired:
+                break
+            oldest.close()
+            for p in (oldest.path, oldest.index_path):
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= oldest.size()
+            self.segments.pop(0)
+            self.deleted_segments += 1
+            log.info(f"[Journal] Сегмент {oldest.base} удалён по ретенции")
+
+    # =============================
+    # Чтение
+    # =============================
+
+    def _matcher(self, topic):
+        if not topic:
+            return None
+        router = TopicRouter()
+        for pattern in ([topic] if isinstance(topic, str) else topic):
+            router.add(pattern, pattern)
+        return lambda t: bool(router.resolve(t.decode("utf-8")))
+
+    def read(self, since=None, topic=None, limit=100, since_time=None):
+        """События начиная с offset since (или с момента since_time), по шаблонам топиков."""
+        match = self._matcher(topic)
+        if since is None and since_time is None:
+            since = self.first_offset
+
+        if since is not None:
+            bases = [s.base for s in self.segments]
+            start = max(0, bisect.bisect_right(bases, since) - 1)
+        else:
+            start = 0
+            for i, seg in enumerate(self.segments):
+                if seg.last_ts >= since_time:
+                    start = i
+                    break
+            else:
+                return []
+
+        events = []
+        for seg in self.segments[start:]:
+            pos = seg.seek(offset=since) if since is not None else seg.seek(ts=since_time)
+            for item in self._records(seg, pos, since, since_time, match):
+                events.append(item)
+                if len(events) >= limit:
+                    return events
+        return events
+
+    def tail(self, limit=100, topic=None):
+        """Последние limit событий; сегменты читаются с конца, пока не наберётся нужное."""
+        match = self._matcher(topic)
+        collected = []
+        for seg in reversed(self.segments):
+            if match is None:
+                since = max(seg.base, self.next_offset - limit)
+                chunk = list(self._records(seg, seg.seek(offset=since), since, None, None))
+            else:
+                chunk = list(self._records(seg, 0, None, None, match))
+            collected = chunk[-(limit - len(collected)):] + collected if chunk else collected
+            if len(collected) >= limit:
+                break
+        return collected[-limit:]
+
+    def _records(self, seg, pos, since, since_time, match):
+        if seg is not self.active:
+            seg.open_read()
+        limit_pos = seg.end if seg is self.active else None
+        for offset, topic_b, ts, body_start, next_pos in seg.scan(pos, limit_pos):
+            if since is not None and offset < since:
+                continue
+            if since_time is not None and ts < since_time:
+                continue
+            if match and not match(topic_b):
+                continue
+            try:
+                event = json.loads(seg.mm[body_start:next_pos])
+            except ValueError:
+                continue
+            event["offset"] = offset
+            yield event
+
+    # =============================
+    # Служебное
+    # =============================
+
+    def flush(self):
+        seg = self.active
+        if seg.mm is not None:
+            seg.mm.flush()
+            seg._index_file.flush()
+
+    def close(self):
+        self.flush()
+        for seg in self.segments:
+            seg.close()
+
+    def stats(self):
+        return {
+            "segments": len(self.segments),
+            "first_offset": self.first_offset,
+            "next_offset": self.next_offset,
+            "bytes": sum(s.size() for s in self.segments),
+            "appended": self.appended,
+            "deleted_segments": self.deleted_segments
+        }
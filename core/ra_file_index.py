@@ -0,0 +1,524 @@
+# core/ra_file_index.py
+"""
+Общий индекс файлов проекта.
+
+Раньше дерево обходили три органа по отдельности: RaFileConsciousness.scan
+(два stat на файл), RaThinker.scan_architecture и RaPolice.build_checksums
+(SHA-256 каждого файла на каждый вызов). Теперь обход один:
+
+    files[путь] = [размер, mtime_ns, inode, sha256 | None]
+
+Снимок хранится в data/file_index.json, поэтому после перезапуска
+refresh() сравнивает только stat и не читает содержимое файлов.
+Хеш считается лениво (hash / hashes) и сбрасывается, когда меняется stat.
+
+refresh() возвращает разницу {"new": [...], "changed": [...], "removed": [...]}
+и рассылает её подписчикам (subscribe). watch() держит индекс актуальным:
+на Linux через inotify, иначе — периодическим refresh().
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger("RaFileIndex")
+
+SNAPSHOT_PATH = os.getenv("RA_FILE_INDEX_SNAPSHOT", "data/file_index.json")
+POLL_INTERVAL = float(os.getenv("RA_FILE_INDEX_POLL", "5"))
+DEBOUNCE = float(os.getenv("RA_FILE_INDEX_DEBOUNCE", "0.2"))
+SAVE_INTERVAL = float(os.getenv("RA_FILE_INDEX_SAVE_SEC", "10"))
+EXCLUDE_DIRS = {"__pycache__", "venv", "backups", "node_modules"}
+HASH_WORKERS = int(os.getenv("RA_HASH_WORKERS", "4"))
+HASH_POOL_MIN = 16
+READ_CHUNK = 1024 * 1024
+MMAP_MIN = 8 * 1024 * 1024
+
+SIZE, MTIME, INODE, HASH = range(4)
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def open_index(root="."):
+    """Общий индекс для корня: все органы процесса подписываются на один обход."""
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = RaFileIndex(key)
+        return index
+
+
+def empty_diff():
+    return {"new": [], "changed": [], "removed": []}
+
+
+def hash_file(path) -> str:
+    """
+    SHA-256 файла: крупные файлы — через mmap, остальные — блоками по 1 МБ.
+    hashlib отпускает GIL на больших буферах, поэтому хеширование параллелится потоками.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_MIN:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        else:
+            for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+# =============================
+# inotify (ctypes, без зависимостей)
+# =============================
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Рекурсивное наблюдение за деревом: по одному watch на каталог."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dirs = {}   # wd → абсолютный путь каталога
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith("linux")
+
+    def add(self, path):
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                # Упёрлись в fs.inotify.max_user_watches — дальше только опрос
+                raise OSError(err, "inotify: превышен лимит max_user_watches")
+            return
+        self.dirs[wd] = path
+
+    def read(self):
+        """Пути, о которых сообщило ядро; None — очередь переполнилась, нужен полный обход."""
+        paths = set()
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            pos = 0
+            while pos + EVENT.size <= len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, pos)
+                name = data[pos + EVENT.size:pos + EVENT.size + length].rstrip(b"\0")
+                pos += EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                base = self.dirs.get(wd)
+                if base is None:
+                    continue
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    # Каталог уехал: при повторном обходе на новом месте watch вернётся с новым путём
+                    self.dirs.pop(wd, None)
+                paths.add(os.path.join(base, os.fsdecode(name)) if name else base)
+        return None if overflow else paths
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+# =============================
+# Индекс
+# =============================
+
+class RaFileIndex:
+    def __init__(self, root=".", snapshot=SNAPSHOT_PATH, exclude=EXCLUDE_DIRS,
+                 poll_interval=POLL_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.snapshot_path = snapshot if os.path.isabs(snapshot) else os.path.join(self.root, snapshot)
+        self.exclude = set(exclude)
+        self.poll_interval = poll_interval
+        self.lock = threading.RLock()
+
+        self.files = {}
+        self.scanned = False
+        self.mode = None
+        self._subscribers = []
+        self._dirty = False
+        self._last_save = 0.0
+        self._inotify = None
+
+        self.refreshes = 0
+        self.hashed = 0
+        self.last_refresh_ms = 0.0
+
+        self._prefix = len(os.path.join(self.root, ""))
+        self._skip = {os.path.relpath(self.snapshot_path, self.root),
+                      os.path.relpath(self.snapshot_path + ".tmp", self.root)}
+        self._load()
+
+    # ----------------------------------------------------
+    # Снимок
+    # ----------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            log.warning(f"[FileIndex] Снимок {self.snapshot_path} не прочитан: {e}")
+            return
+        if data.get("root") != self.root:
+            return
+        self.files = {path: list(entry) for path, entry in data.get("files", {}).items()}
+
+    def save(self):
+        with self.lock:
+            data = {"root": self.root, "saved": time.time(), "files": self.files}
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                # dumps целиком быстрее потокового dump: работает C-кодировщик
+                f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+            os.replace(tmp, self.snapshot_path)
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+    def _save_if_dirty(self, force=False):
+        if not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_save < SAVE_INTERVAL:
+            return
+        try:
+            self.save()
+        except Exception as e:
+            log.warning(f"[FileIndex] Снимок не сохранён: {e}")
+
+    # ----------------------------------------------------
+    # Обход
+    # ----------------------------------------------------
+
+    def _excluded(self, name):
+        return name.startswith(".") or name in self.exclude
+
+    def _walk(self, top, found, on_dir=None):
+        """Один stat на файл: DirEntry даёт тип без лишнего системного вызова."""
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            if on_dir:
+                on_dir(current)
+            try:
+                it = os.scandir(current)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._excluded(entry.name):
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    rel = entry.path[self._prefix:]
+                    if rel not in self._skip:
+                        found[rel] = (st.st_size, st.st_mtime_ns, st.st_ino)
+        return found
+
+    def _collect(self, on_dir=None):
+        return self._walk(self.root, {}, on_dir)
+
+    def _apply(self, current, scopes=None):
+        """
+        Сравнивает свежие stat с индексом. scopes — относительные пути (файлы и каталоги),
+        которыми ограничен частичный обход: удалёнными считаются только пути внутри них.
+        """
+        diff = empty_diff()
+        with self.lock:
+            for rel, (size, mtime, inode) in current.items():
+                entry = self.files.get(rel)
+                if entry is None:
+                    self.files[rel] = [size, mtime, inode, None]
+                    diff["new"].append(rel)
+                elif entry[SIZE] != size or entry[MTIME] != mtime or entry[INODE] != inode:
+                    entry[SIZE], entry[MTIME], entry[INODE], entry[HASH] = size, mtime, inode, None
+                    diff["changed"].append(rel)
+
+            if scopes is None:
+                gone = [rel for rel in self.files if rel not in current]
+            else:
+                gone = []
+                for scope in scopes:
+                    if scope in self.files:
+                        # Известный файл — проверка за O(1), без прохода по индексу
+                        if scope not in current:
+                            gone.append(scope)
+                        continue
+                    prefix = scope + os.sep
+                    gone.extend(rel for rel in self.files if rel.startswith(prefix) and rel not in current)
+                gone = list(dict.fromkeys(gone))
+            for rel in gone:
+                del self.files[rel]
+            diff["removed"] = gone
+
+            if any(diff.values()):
+                self._dirty = True
+        self._notify(diff)
+        return diff
+
+    def refresh(self):
+        """Полный обход; разница рассылается подписчикам и возвращается."""
+        start = time.perf_counter()
+        diff = self._apply(self._collect())
+        self.scanned = True
+        self.refreshes += 1
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+        self._save_if_dirty(force=True)
+        return diff
+
+    def sync(self):
+        """Под наблюдением watch() индекс уже свежий — обход нужен только без него."""
+        if self.mode and self.scanned:
+            return empty_diff()
+        return self.refresh()
+
+    def refresh_paths(self, paths, on_dir=None):
+        """Частичное обновление по путям из inotify: stat только затронутого."""
+        current = {}
+        scopes = set()
+        for path in paths:
+            rel = os.path.relpath(path, self.root)
+            if rel.startswith("..") or rel in self._skip:
+                continue
+            if any(self._excluded(part) for part in rel.split(os.sep)):
+                continue
+            scopes.add(rel)
+            if os.path.isdir(path):
+                self._walk(path, current, on_dir)
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            current[rel] = (st.st_size, st.st_mtime_ns, st.st_ino)
+
+        return self._apply(current, scopes)
+
+    # ----------------------------------------------------
+    # Подписчики
+    # ----------------------------------------------------
+
+    def subscribe(self, callback):
+        """callback(diff) вызывается после каждого обновления с непустой разницей."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self, diff):
+        if not any(diff.values()):
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(diff)
+            except Exception as e:
+                log.warning(f"[FileIndex] Подписчик {callback} упал: {e}")
+
+    # ----------------------------------------------------
+    # Чтение
+    # ----------------------------------------------------
+
+    def paths(self, ext=None):
+        """Относительные пути; ext — суффикс или кортеж суффиксов."""
+        if ext is None:
+            return list(self.files)
+        ext = tuple(ext) if not isinstance(ext, str) else ext
+        return [rel for rel in self.files if rel.endswith(ext)]
+
+    def stat(self, rel):
+        entry = self.files.get(rel)
+        if entry is None:
+            return None
+        return {"size": entry[SIZE], "mtime": entry[MTIME] / 1e9,
+                "mtime_ns": entry[MTIME], "inode": entry[INODE]}
+
+    def abspath(self, rel):
+        return os.path.join(self.root, rel)
+
+    def hash(self, rel):
+        """SHA-256 файла; пересчитывается, только если с прошлого раза изменился stat."""
+        entry = self.files.get(rel)
+        if entry is None:
+            return None
+        if entry[HASH] is None:
+            entry[HASH] = hash_file(self.abspath(rel))
+            self.hashed += 1
+            self._dirty = True
+        return entry[HASH]
+
+    def hashes(self, ext=None, workers=HASH_WORKERS):
+        """Хеши файлов; недостающие (новые и изменившиеся) считаются в пуле потоков."""
+        rels = self.paths(ext)
+        missing = [rel for rel in rels if self.files[rel][HASH] is None]
+
+        if missing:
+            paths = [self.abspath(rel) for rel in missing]
+            if workers > 1 and len(missing) >= HASH_POOL_MIN:
+                # Пачками, а не по future на файл: на мелких файлах накладные расходы пула больше хеша
+                step = -(-len(paths) // (workers * 4))
+                chunks = [paths[i:i + step] for i in range(0, len(paths), step)]
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    digests = [d for chunk in pool.map(self._hash_chunk, chunks) for d in chunk]
+            else:
+                digests = self._hash_chunk(paths)
+            for rel, digest in zip(missing, digests):
+                entry = self.files.get(rel)
+                if entry is not None and digest is not None:
+                    entry[HASH] = digest
+            self.hashed += len(missing)
+            self._dirty = True
+            # Свежие хеши сохраняем сразу — иначе следующий старт снова прочитает файлы
+            self._save_if_dirty(force=True)
+
+        res = {}
+        for rel in rels:
+            entry = self.files.get(rel)
+            if entry is not None and entry[HASH] is not None:
+                res[rel] = entry[HASH]
+        return res
+
+    @staticmethod
+    def _hash_chunk(paths):
+        digests = []
+        for path in paths:
+            try:
+                digests.append(hash_file(path))
+            except OSError as e:
+                log.warning(f"[FileIndex] Не могу хешировать {path}: {e}")
+                digests.append(None)
+        return digests
+
+    # ----------------------------------------------------
+    # Наблюдение
+    # ----------------------------------------------------
+
+    async def watch(self):
+        """Держит индекс актуальным: inotify на Linux, иначе опрос раз в poll_interval."""
+        if _Inotify.available():
+            try:
+                await self._watch_inotify()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"[FileIndex] inotify недоступен ({e}), перехожу на опрос")
+                self._close_inotify()
+        await self._watch_polling()
+
+    async def _watch_polling(self):
+        self.mode = "polling"
+        try:
+            while True:
+                current = await asyncio.to_thread(self._collect)
+                self._apply(current)
+                self.scanned = True
+                self.refreshes += 1
+                self._save_if_dirty()
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self._save_if_dirty(force=True)
+
+    async def _watch_inotify(self):
+        loop = asyncio.get_running_loop()
+        self._inotify = _Inotify()
+        # Каталоги ставятся на наблюдение во время полного обхода: ничего не теряется между ними
+        current = await asyncio.to_thread(self._collect, self._inotify.add)
+        self._apply(current)
+        self.scanned = True
+        self.refreshes += 1
+        self.mode = "inotify"
+
+        ready = asyncio.Event()
+        loop.add_reader(self._inotify.fd, ready.set)
+        try:
+            while True:
+                await ready.wait()
+                await asyncio.sleep(DEBOUNCE)
+                ready.clear()
+                paths = self._inotify.read()
+                if paths is None:
+                    log.warning("[FileIndex] Переполнение очереди inotify — полный обход")
+                    self._apply(await asyncio.to_thread(self._collect, self._inotify.add))
+                elif paths:
+                    self.refresh_paths(paths, on_dir=self._inotify.add)
+                self._save_if_dirty()
+        finally:
+            loop.remove_reader(self._inotify.fd)
+            self._close_inotify()
+            self._save_if_dirty(force=True)
+
+    def _close_inotify(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        self.mode = None
+
+    def stats(self):
+        return {
+            "files": len(self.files),
+            "mode": self.mode,
+            "refreshes": self.refreshes,
+            "hashed": self.hashed,
+            "last_refresh_ms": round(self.last_refresh_ms, 2),
+            "subscribers": len(self._subscribers),
+            "watched_dirs": len(self._inotify.dirs) if self._inotify else 0
+        }
@@ -0,0 +1,155 @@
+# core/ra_hedging.py
+"""
+Хеджированные (спекулятивные) запросы к моделям.
+
+Основная модель получает запрос первой. Если она не ответила за
+q-квантиль своей исторической латентности, параллельно запускаются
+одна-две следующие по рейтингу модели. Побеждает первый валидный ответ,
+остальные запросы отменяются.
+"""
+
+import asyncio
+import logging
+import os
+from collections import defaultdict, deque
+
+log = logging.getLogger("RaHedging")
+
+
+class LatencyStats:
+    """Скользящее окно латентностей с перцентилями."""
+
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+
+    def add(self, elapsed: float):
+        self.samples.append(elapsed)
+
+    def percentile(self, q: float):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def report(self):
+        return {
+            "count": len(self.samples),
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99)
+        }
+
+
+class RaHedger:
+    """
+    call(model) — корутина-фабрика, возвращающая ответ модели.
+    Успехи фиксирует сам call (как GPTHandler.ask_model), а хеджер
+    отмечает в роутере только падения; отменённые проигравшие не штрафуются.
+
+    user_budget — сколько попыток пользователя может быть в полёте одновременно.
+    В счёт идут все попытки; основная (и замена упавшей) запускается всегда —
+    без неё нет ответа, — а подстраховки только пока бюджет не исчерпан.
+    """
+
+    def __init__(
+        self,
+        router,
+        quantile=float(os.getenv("RA_HEDGE_QUANTILE", "0.9")),
+        max_hedges=int(os.getenv("RA_HEDGE_MAX", "2")),
+        user_budget=int(os.getenv("RA_HEDGE_USER_BUDGET", "3")),
+    ):
+        self.router = router
+        self.quantile = quantile
+        self.max_hedges = max_hedges
+        self.user_budget = user_budget
+        self.in_flight = defaultdict(int)
+        self.metrics = {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "budget_denied": 0,
+            "failures": 0
+        }
+
+    def _can_spend(self, user_id):
+        return self.in_flight[user_id] < self.user_budget
+
+    def _release(self, user_id):
+        self.in_flight[user_id] -= 1
+        if self.in_flight[user_id] <= 0:
+            self.in_flight.pop(user_id, None)
+
+    async def _attempt(self, model, call):
+        return await asyncio.wait_for(call(model), timeout=self.router.attempt_timeout(model))
+
+    async def ask(self, user_id, call, exclude=()):
+        self.metrics["requests"] += 1
+        queue = self.router.ranked_models(exclude) or [self.router.get_model(exclude)]
+        tasks = {}
+        primary = None
+        hedged = False
+        last_error = None
+
+        def launch(model):
+            # Учёт до create_task: бюджет видит попытку сразу, а не когда задача стартует.
+            # Освобождаем в колбэке — задача, отменённая до старта, до finally не дойдёт.
+            self.in_flight[user_id] += 1
+            task = asyncio.create_task(self._attempt(model, call))
+            task.add_done_callback(lambda _: self._release(user_id))
+            tasks[task] = model
+            return task
+
+        try:
+            primary = queue.pop(0)
+            launch(primary)
+
+            while tasks:
+                delay = None
+                if queue and not hedged:
+                    delay = self.router.latency_quantile(primary, self.quantile)
+
+                done, _ = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Основная модель запаздывает — запускаем подстраховку
+                    hedged = True
+                    fired = 0
+                    while queue and fired < self.max_hedges and self._can_spend(user_id):
+                        launch(queue.pop(0))
+                        fired += 1
+                    if fired:
+                        self.metrics["hedged"] += 1
+                        log.info(f"🪁 Хедж: {primary} медлит, параллельно ещё {fired}")
+                    elif queue:
+                        self.metrics["budget_denied"] += 1
+                    continue
+
+                for task in done:
+                    model = tasks.pop(task)
+                    try:
+                        answer = task.result()
+                    except Exception as e:
+                        last_error = e
+                        self.metrics["failures"] += 1
+                        log.warning(f"[Hedge] Ошибка модели {model}: {e!r}")
+                        self.router.mark_failed(model)
+                        continue
+                    if not answer:
+                        continue
+                    if hedged and model != primary:
+                        self.metrics["hedge_wins"] += 1
+                    return answer, model
+
+                # Все запущенные упали — следующая модель по рейтингу
+                if not tasks and queue:
+                    launch(queue.pop(0))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        raise RuntimeError(f"Все модели отказали: {last_error!r}")
+
+    def report(self):
+        m = dict(self.metrics)
+        m["win_rate"] = m["hedge_wins"] / m["hedged"] if m["hedged"] else 0.0
+        return m
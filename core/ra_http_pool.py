@@ -0,0 +1,68 @@
+# core/ra_http_pool.py
+"""
+Общий пул HTTP-соединений Ра.
+
+Один aiohttp.ClientSession на весь процесс: keep-alive, кэш DNS,
+лимиты соединений на хост и явные таймауты. Каждый запрос к OpenRouter
+переиспользует уже открытое TCP/TLS-соединение вместо нового рукопожатия.
+"""
+
+import asyncio
+import logging
+import os
+
+import aiohttp
+
+log = logging.getLogger("RaHttpPool")
+
+
+class RaHttpPool:
+    def __init__(
+        self,
+        limit=int(os.getenv("RA_HTTP_LIMIT", "100")),
+        limit_per_host=int(os.getenv("RA_HTTP_LIMIT_PER_HOST", "20")),
+        dns_ttl=int(os.getenv("RA_HTTP_DNS_TTL", "300")),
+        keepalive_timeout=float(os.getenv("RA_HTTP_KEEPALIVE", "60")),
+        connect_timeout=float(os.getenv("RA_HTTP_CONNECT_TIMEOUT", "10")),
+        read_timeout=float(os.getenv("RA_HTTP_READ_TIMEOUT", "60")),
+        total_timeout=float(os.getenv("RA_HTTP_TOTAL_TIMEOUT", "120")),
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout,
+            connect=connect_timeout,
+            sock_read=read_timeout
+        )
+        self._session = None
+        self._lock = asyncio.Lock()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self._session and not self._session.closed:
+            return self._session
+
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    ttl_dns_cache=self.dns_ttl,
+                    keepalive_timeout=self.keepalive_timeout
+                )
+                self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+                log.info(f"🌐 HTTP пул открыт (limit={self.limit}, per_host={self.limit_per_host})")
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+            # aiohttp закрывает SSL-транспорты асинхронно
+            await asyncio.sleep(0.25)
+            log.info("🌐 HTTP пул закрыт")
+        self._session = None
+
+
+# глобальный пул
+http_pool = RaHttpPool()
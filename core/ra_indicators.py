@@ -0,0 +1,618 @@
+# core/ra_indicators.py
+"""
+Потоковые индикаторы: O(1) на новый бар вместо пересчёта всего DataFrame.
+
+Каждый индикатор хранит своё скользящее состояние и принимает бары по одному:
+
+    rsi = RSI(14)
+    for bar in bars:
+        rsi.update(bar)          # bar — dict/объект с high/low/close или просто цена
+    rsi.value
+
+Для старта по истории есть warmup(high, low, close) — тот же расчёт векторно
+по массивам NumPy; после него update() продолжает ровно с того же состояния.
+
+    RSI        — Уайлдер (как ta.RSIIndicator) или простое среднее (как ForexBrain.compute_rsi)
+    EMA / SMA  — ewm(span, adjust=False) / rolling(period).mean()
+    MACD       — линия, сигнальная, гистограмма
+    ATR        — Уайлдер (как ta.AverageTrueRange) или простое среднее (как ForexBrain.compute_atr)
+    Bollinger  — среднее и std (ddof=1) окна через скользящий Уэлфорд
+    Stochastic — min/max окна через монотонные деки
+
+IndicatorSet собирает несколько индикаторов одной пары/ТФ и досылает
+в них только новые бары DataFrame (sync).
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+NAN = float("nan")
+
+
+# =============================
+# Служебное
+# =============================
+
+def _field(bar, name):
+    if isinstance(bar, (int, float, np.floating)):
+        return float(bar)
+    if isinstance(bar, dict):
+        value = bar.get(name)
+        return float(bar["close"] if value is None else value)
+    value = getattr(bar, name, None)
+    return float(getattr(bar, "close") if value is None else value)
+
+
+def _none(x):
+    return None if x is None or x != x else x
+
+
+def _array(x):
+    return np.asarray(x, dtype=float)
+
+
+def ema_array(x, alpha, prev=None):
+    """
+    Рекурсия y = y + alpha * (x - y) векторно, блоками:
+    внутри блока y_j = beta^j * (prev + alpha * sum(x_t * beta^-t)).
+    Блок ограничен так, что beta^-t не выходит за 1e30 — без потери точности.
+    """
+    x = _array(x)
+    out = np.empty(len(x))
+    if not len(x):
+        return out
+    i = 0
+    if prev is None:
+        prev = out[0] = x[0]
+        i = 1
+    beta = 1.0 - alpha
+    if beta <= 0:
+        out[i:] = x[i:]
+        return out
+    block = int(max(1, min(256, 30 / -math.log10(beta))))
+    while i < len(x):
+        chunk = x[i:i + block]
+        j = np.arange(1, len(chunk) + 1)
+        y = beta ** j * (prev + alpha * np.cumsum(chunk * beta ** -j))
+        out[i:i + len(chunk)] = y
+        prev = y[-1]
+        i += len(chunk)
+    return out
+
+
+def rolling_mean(x, period):
+    x = _array(x)
+    out = np.full(len(x), NAN)
+    if len(x) >= period:
+        out[period - 1:] = sliding_window_view(x, period).mean(axis=1)
+    return out
+
+
+def true_range(high, low, close):
+    high, low, close = _array(high), _array(low), _array(close)
+    prev = np.concatenate(([NAN], close[:-1]))
+    # Как pandas max(axis=1): на первом баре prev_close нет — берём high - low
+    return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+
+# =============================
+# Скользящие средние
+# =============================
+
+class EMA:
+    """ewm(span=period, adjust=False); min_periods — сколько баров до первого значения."""
+
+    def __init__(self, period, min_periods=1, source="close", alpha=None):
+        self.period = period
+        self.alpha = alpha or 2.0 / (period + 1)
+        self.min_periods = min_periods
+        self.source = source
+        self.count = 0
+        self._v = None
+
+    def push(self, x):
+        self._v = x if self._v is None else self._v + self.alpha * (x - self._v)
+        self.count += 1
+        return self.value
+
+    def update(self, bar):
+        return self.push(_field(bar, self.source))
+
+    @property
+    def value(self):
+        return self._v if self.count >= self.min_periods else None
+
+    def warmup_values(self, x):
+        x = _array(x)
+        if not len(x):
+            return x
+        out = ema_array(x, self.alpha, self._v)
+        valid_from = max(0, self.min_periods - self.count - 1)
+        self._v = out[-1]
+        self.count += len(x)
+        masked = out.copy()
+        masked[:valid_from] = NAN
+        return masked
+
+    def warmup(self, high=None, low=None, close=None):
+        return self.warmup_values({"close": close, "high": high, "low": low}[self.source])
+
+
+class SMA:
+    """rolling(period).mean() с бегущей суммой."""
+
+    def __init__(self, period, source="close"):
+        self.period = period
+        self.source = source
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self._updates = 0
+
+    def push(self, x):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        self._updates += 1
+        if self._updates % (self.period * 64) == 0:
+            # Бегущая сумма накапливает ошибку округления — изредка пересчитываем точно
+            self.total = math.fsum(self.window)
+        return self.value
+
+    def update(self, bar):
+        return self.push(_field(bar, self.source))
+
+    @property
+    def value(self):
+        return self.total / self.period if len(self.window) == self.period else None
+
+    def warmup_values(self, x):
+        x = _array(x)
+        joined = np.concatenate((np.fromiter(self.window, float), x))
+        out = rolling_mean(joined, self.period)[len(self.window):]
+        self.window.extend(x[-self.period:].tolist())
+        self.total = math.fsum(self.window)
+        return out
+
+    def warmup(self, high=None, low=None, close=None):
+        return self.warmup_values({"close": close, "high": high, "low": low}[self.source])
+
+
+# =============================
+# RSI
+# =============================
+
+class RSI:
+    """
+    smoothing="wilder" — сглаживание Уайлдера (alpha = 1/period), как ta.RSIIndicator;
+    smoothing="sma"    — простые средние приростов/потерь, как ForexBrain.compute_rsi.
+    """
+
+    def __init__(self, period=14, smoothing="wilder"):
+        if smoothing not in ("wilder", "sma"):
+            raise ValueError(f"Неизвестное сглаживание RSI: {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self.prev = None
+        if smoothing == "wilder":
+            self.gain = EMA(period, min_periods=period, alpha=1.0 / period)
+            self.loss = EMA(period, min_periods=period, alpha=1.0 / period)
+        else:
+            self.gain = SMA(period)
+            self.loss = SMA(period)
+
+    def update(self, bar):
+        close = _field(bar, "close")
+        if self.prev is None:
+            self.prev = close
+            if self.smoothing == "sma":
+                return None
+            # ta считает первый прирост нулевым, а не пропуском
+            self.gain.push(0.0)
+            self.loss.push(0.0)
+            return self.value
+        delta = close - self.prev
+        self.prev = close
+        self.gain.push(delta if delta > 0 else 0.0)
+        self.loss.push(-delta if delta < 0 else 0.0)
+        return self.value
+
+    @staticmethod
+    def _rsi(gain, loss, wilder):
+        if gain is None or loss is None:
+            return None
+        if loss == 0:
+            # ta: 100 при нулевых потерях; pandas-версия ForexBrain: 0/0 → NaN
+            return 100.0 if wilder or gain > 0 else None
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+    @property
+    def value(self):
+        return self._rsi(self.gain.value, self.loss.value, self.smoothing == "wilder")
+
+    def warmup(self, high=None, low=None, close=None):
+        close = _array(close)
+        if not len(close):
+            return close
+        prev = np.concatenate(([NAN if self.prev is None else self.prev], close[:-1]))
+        delta = close - prev
+        first = self.prev is None
+        self.prev = close[-1]
+
+        if self.smoothing == "wilder":
+            delta = np.nan_to_num(delta, nan=0.0)
+            avg_gain = self.gain.warmup_values(np.clip(delta, 0, None))
+            avg_loss = self.loss.warmup_values(np.clip(-delta, 0, None))
+        else:
+            if first:
+                delta = delta[1:]
+            avg_gain = self.gain.warmup_values(np.clip(delta, 0, None))
+            avg_loss = self.loss.warmup_values(np.clip(-delta, 0, None))
+            if first:
+                avg_gain = np.concatenate(([NAN], avg_gain))
+                avg_loss = np.concatenate(([NAN], avg_loss))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        if self.smoothing == "wilder":
+            rsi = np.where((avg_loss == 0) & ~np.isnan(avg_gain), 100.0, rsi)
+        return rsi
+
+
+# =============================
+# MACD
+# =============================
+
+class MACD:
+    """
+    min_periods=True — как ta.MACD: линии появляются после slow баров,
+    сигнальная считается только по готовой линии.
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9, min_periods=False):
+        self.min_periods = min_periods
+        self.fast = EMA(fast, min_periods=fast if min_periods else 1)
+        self.slow = EMA(slow, min_periods=slow if min_periods else 1)
+        self.signal_ema = EMA(signal, min_periods=signal if min_periods else 1)
+
+    def update(self, bar):
+        close = _field(bar, "close")
+        self.fast.push(close)
+        self.slow.push(close)
+        line = self.line
+        if line is not None:
+            self.signal_ema.push(line)
+        return self.values()
+
+    @property
+    def line(self):
+        f, s = self.fast.value, self.slow.value
+        return None if f is None or s is None else f - s
+
+    def values(self):
+        line, signal = self.line, self.signal_ema.value
+        hist = None if line is None or signal is None else line - signal
+        return {"": line, "signal": signal, "hist": hist}
+
+    def warmup(self, high=None, low=None, close=None):
+        close = _array(close)
+        line = self.fast.warmup_values(close) - self.slow.warmup_values(close)
+        signal = np.full(len(close), NAN)
+        valid = ~np.isnan(line)
+        signal[valid] = self.signal_ema.warmup_values(line[valid])
+        return {"": line, "signal": signal, "hist": line - signal}
+
+
+# =============================
+# ATR
+# =============================
+
+class ATR:
+    """
+    smoothing="wilder" — первое значение — среднее первых period TR, дальше alpha = 1/period
+    (как ta.AverageTrueRange); smoothing="sma" — rolling mean TR (как ForexBrain.compute_atr).
+    """
+
+    def __init__(self, period=14, smoothing="wilder"):
+        if smoothing not in ("wilder", "sma"):
+            raise ValueError(f"Неизвестное сглаживание ATR: {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self.prev_close = None
+        self.count = 0
+        self.seed = 0.0
+        self._v = None
+        self.sma = SMA(period) if smoothing == "sma" else None
+
+    def _tr(self, high, low):
+        if self.prev_close is None:
+            return high - low
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def update(self, bar):
+        high, low, close = _field(bar, "high"), _field(bar, "low"), _field(bar, "close")
+        tr = self._tr(high, low)
+        self.prev_close = close
+        self.count += 1
+        if self.sma is not None:
+            return self.sma.push(tr)
+        if self.count < self.period:
+            self.seed += tr
+        elif self.count == self.period:
+            self._v = (self.seed + tr) / self.period
+        else:
+            self._v += (tr - self._v) / self.period
+        return self._v
+
+    @property
+    def value(self):
+        return self.sma.value if self.sma is not None else self._v
+
+    def warmup(self, high=None, low=None, close=None):
+        high, low, close = _array(high), _array(low), _array(close)
+        if not len(close):
+            return close
+        tr = true_range(high, low, close)
+        if self.prev_close is not None:
+            tr[0] = max(high[0] - low[0], abs(high[0] - self.prev_close), abs(low[0] - self.prev_close))
+        self.prev_close = close[-1]
+        start = self.count
+        self.count += len(tr)
+        if self.sma is not None:
+            return self.sma.warmup_values(tr)
+
+        out = np.full(len(tr), NAN)
+        need = self.period - start
+        if need > 0:
+            if len(tr) < need:
+                self.seed += tr.sum()
+                return out
+            self._v = (self.seed + tr[:need].sum()) / self.period
+            out[need - 1] = self._v
+            tail = tr[need:]
+            offset = need
+        else:
+            tail, offset = tr, 0
+        if len(tail):
+            out[offset:] = ema_array(tail, 1.0 / self.period, self._v)
+            self._v = out[-1]
+        return out
+
+
+# =============================
+# Bollinger
+# =============================
+
+class Bollinger:
+    """Среднее и std (ddof=1) окна через скользящий Уэлфорд; полосы — mean ± k·std."""
+
+    RESYNC = 4096
+
+    def __init__(self, period=20, k=2.0):
+        self.period = period
+        self.k = k
+        self.window = deque(maxlen=period)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._updates = 0
+
+    def _resync(self):
+        n = len(self.window)
+        self.mean = math.fsum(self.window) / n if n else 0.0
+        self.m2 = math.fsum((x - self.mean) ** 2 for x in self.window)
+
+    def update(self, bar):
+        x = _field(bar, "close")
+        if len(self.window) < self.period:
+            self.window.append(x)
+            d = x - self.mean
+            self.mean += d / len(self.window)
+            self.m2 += d * (x - self.mean)
+        else:
+            old = self.window[0]
+            self.window.append(x)
+            old_mean = self.mean
+            self.mean += (x - old) / self.period
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+            if self.m2 < 0:
+                self.m2 = 0.0
+        self._updates += 1
+        if self._updates % self.RESYNC == 0:
+            self._resync()
+        return self.values()
+
+    @property
+    def std(self):
+        if len(self.window) < self.period or self.period < 2:
+            return None
+        return math.sqrt(self.m2 / (self.period - 1))
+
+    def values(self):
+        std = self.std
+        if std is None:
+            return {"upper": None, "middle": None, "lower": None}
+        return {"upper": self.mean + self.k * std, "middle": self.mean, "lower": self.mean - self.k * std}
+
+    def warmup(self, high=None, low=None, close=None):
+        close = _array(close)
+        joined = np.concatenate((np.fromiter(self.window, float), close))
+        skip = len(self.window)
+        middle = np.full(len(joined), NAN)
+        std = np.full(len(joined), NAN)
+        if len(joined) >= self.period:
+            windows = sliding_window_view(joined, self.period)
+            middle[self.period - 1:] = windows.mean(axis=1)
+            std[self.period - 1:] = windows.std(axis=1, ddof=1)
+        self.window.extend(close[-self.period:].tolist())
+        self._resync()
+        middle, std = middle[skip:], std[skip:]
+        return {"upper": middle + self.k * std, "middle": middle, "lower": middle - self.k * std}
+
+
+# =============================
+# Стохастик
+# =============================
+
+class Stochastic:
+    """%K по min(low)/max(high) окна на монотонных деках, %D — среднее последних d значений %K."""
+
+    def __init__(self, k_period=14, d_period=3):
+        self.k_period = k_period
+        self.d_period = d_period
+        self.index = 0
+        self.lows = deque()    # (индекс, low) по возрастанию low
+        self.highs = deque()   # (индекс, high) по убыванию high
+        self.recent = deque(maxlen=k_period)   # (high, low) последних баров — для warmup
+        self.k_values = deque(maxlen=d_period)
+        self._k = None
+
+    def _push(self, high, low):
+        i = self.index
+        self.index += 1
+        self.recent.append((high, low))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((i, low))
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((i, high))
+        edge = i - self.k_period
+        while self.lows[0][0] <= edge:
+            self.lows.popleft()
+        while self.highs[0][0] <= edge:
+            self.highs.popleft()
+
+    def update(self, bar):
+        high, low, close = _field(bar, "high"), _field(bar, "low"), _field(bar, "close")
+        self._push(high, low)
+        k = None
+        if self.index >= self.k_period:
+            lo, hi = self.lows[0][1], self.highs[0][1]
+            if hi != lo:
+                k = 100.0 * (close - lo) / (hi - lo)
+        self._k = k
+        self.k_values.append(k)
+        return self.values()
+
+    def values(self):
+        d = None
+        if len(self.k_values) == self.d_period and None not in self.k_values:
+            d = sum(self.k_values) / self.d_period
+        return {"k": self._k, "d": d}
+
+    def warmup(self, high=None, low=None, close=None):
+        high, low, close = _array(high), _array(low), _array(close)
+        if not len(close):
+            return {"k": close, "d": close}
+        # Окно первых новых баров захватывает уже принятые — берём их из recent
+        prev = list(self.recent)[-(self.k_period - 1):] if self.k_period > 1 else []
+        skip = len(prev)
+        all_high = np.concatenate(([h for h, _ in prev], high))
+        all_low = np.concatenate(([l for _, l in prev], low))
+
+        k = np.full(len(all_high), NAN)
+        if len(all_high) >= self.k_period:
+            lo = sliding_window_view(all_low, self.k_period).min(axis=1)
+            hi = sliding_window_view(all_high, self.k_period).max(axis=1)
+            c = np.concatenate((np.full(skip, NAN), close))[self.k_period - 1:]
+            rng = hi - lo
+            with np.errstate(divide="ignore", invalid="ignore"):
+                k[self.k_period - 1:] = np.where(rng != 0, 100.0 * (c - lo) / rng, NAN)
+        k = k[skip:]
+
+        prev_k = np.array([NAN if v is None else v for v in self.k_values])
+        joined = np.concatenate((prev_k, k))
+        d = np.full(len(joined), NAN)
+        if len(joined) >= self.d_period:
+            d[self.d_period - 1:] = sliding_window_view(joined, self.d_period).mean(axis=1)
+        d = d[len(prev_k):]
+
+        # Деки восстанавливаем по последнему окну — этого достаточно для update()
+        start = self.index + len(close) - min(len(close), self.k_period)
+        self.index = start
+        for h, l in zip(high[-self.k_period:].tolist(), low[-self.k_period:].tolist()):
+            self._push(h, l)
+        for v in k[-self.d_period:].tolist():
+            self.k_values.append(_none(v))
+        self._k = _none(float(k[-1]))
+        return {"k": k, "d": d}
+
+
+# =============================
+# Набор индикаторов одной пары/ТФ
+# =============================
+
+# Сколько новых баров за раз уже выгоднее досчитать векторно, чем по одному
+WARMUP_MIN = 32
+
+
+class IndicatorSet:
+    """
+    Именованные индикаторы с общим потоком баров:
+
+        ind = IndicatorSet(rsi=RSI(14), macd=MACD(), atr=ATR(14))
+        ind.sync(df)      # первый раз — warmup по всему df, дальше — только новые бары
+        ind.values        # {"rsi": .., "macd": .., "macd_signal": .., "macd_hist": .., "atr": ..}
+
+    Составные индикаторы дают ключи имя_часть (boll_upper, stoch_k); пустая часть — просто имя.
+    """
+
+    def __init__(self, **indicators):
+        self.indicators = indicators
+        self.values = {}
+        self.last_time = None
+        self.count = 0
+
+    def _flatten(self, out, name, value):
+        if isinstance(value, dict):
+            for part, v in value.items():
+                out[f"{name}_{part}" if part else name] = v
+        else:
+            out[name] = value
+
+    def update(self, bar) -> dict:
+        values = {}
+        for name, ind in self.indicators.items():
+            self._flatten(values, name, ind.update(bar))
+        self.values = {k: _none(v) for k, v in values.items()}
+        self.count += 1
+        return self.values
+
+    def warmup(self, high, low, close) -> dict:
+        """Векторный расчёт по массивам; возвращает {ключ: массив}, состояние готово к update()."""
+        high, low, close = _array(high), _array(low), _array(close)
+        arrays = {}
+        for name, ind in self.indicators.items():
+            self._flatten(arrays, name, ind.warmup(high, low, close))
+        if len(close):
+            self.values = {k: _none(float(v[-1])) for k, v in arrays.items()}
+            self.count += len(close)
+        return arrays
+
+    def sync(self, df) -> dict:
+        """
+        Досылает бары df новее последнего принятого (по колонке time, иначе по индексу).
+        Бар с тем же временем не принимается повторно: индикаторы считаются по закрытым барам.
+        """
+        if df is None or not len(df):
+            return self.values
+        times = df["time"] if "time" in df.columns else df.index.to_series()
+        if self.last_time is not None:
+            df = df[(times > self.last_time).to_numpy()]
+            if not len(df):
+                return self.values
+            times = df["time"] if "time" in df.columns else df.index.to_series()
+
+        high = df["high"].to_numpy(dtype=float)
+        low = df["low"].to_numpy(dtype=float)
+        close = df["close"].to_numpy(dtype=float)
+        if self.count == 0 or len(df) >= WARMUP_MIN:
+            self.warmup(high, low, close)
+        else:
+            for h, l, c in zip(high.tolist(), low.tolist(), close.tolist()):
+                self.update({"high": h, "low": l, "close": c})
+        self.last_time = times.iloc[-1]
+        return self.values
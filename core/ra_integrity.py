@@ -0,0 +1,194 @@
+# core/ra_integrity.py
+"""
+База контрольных сумм RaPolice и дерево Меркла по каталогам.
+
+Суммы хранятся по каталогам, а не плоским словарём с полными путями:
+
+    {"version": 2, "root": <хеш корня>,
+     "dirs": {"modules": [<хеш каталога>, {"ra_police.py": <sha256>, ...}], ...}}
+
+Хеш каталога — SHA-256 от отсортированных строк "f имя хеш" его файлов
+и "d имя хеш" его подкаталогов. Совпали хеши корня — дерево цело,
+сравнение окончено. Иначе спуск идёт только в каталоги с разными хешами,
+так что сверка стоит O(изменённых каталогов), а не O(всех файлов).
+"""
+
+import hashlib
+import json
+import os
+
+VERSION = 2
+
+
+def _split(rel):
+    # Пути из индекса уже нормализованы — rpartition быстрее os.path.split
+    head, _, name = rel.rpartition(os.sep)
+    return head, name
+
+
+class MerkleTree:
+    def __init__(self, files=None):
+        # каталог → {имя файла: sha256}; подкаталоги — отдельно
+        self.files = {"": {}}
+        self.subdirs = {"": set()}
+        self.digests = {}
+        self.visited = 0
+        self._stale = set()
+        for rel, digest in (files or {}).items():
+            self._add(rel, digest)
+        self._compute()
+
+    def _ensure_dir(self, d):
+        while d not in self.files:
+            self.files[d] = {}
+            self.subdirs.setdefault(d, set())
+            parent, _ = _split(d)
+            self.subdirs.setdefault(parent, set()).add(d)
+            d = parent
+
+    def _add(self, rel, digest):
+        d, name = _split(rel)
+        self._ensure_dir(d)
+        self.files[d][name] = digest
+
+    def _compute(self, dirs=None):
+        # Снизу вверх: самые глубокие каталоги первыми
+        for d in sorted(dirs if dirs is not None else self.files,
+                        key=lambda x: x.count(os.sep) + bool(x), reverse=True):
+            if d not in self.files:
+                continue
+            if d and not self.files[d] and not self.subdirs.get(d):
+                # Каталог опустел — убираем его, как будто его и не было
+                self._drop_dir(d)
+                continue
+            lines = [f"f {name} {h}" for name, h in self.files[d].items()]
+            lines += [f"d {_split(sub)[1]} {self.digests[sub]}" for sub in self.subdirs.get(d, ())]
+            lines.sort()
+            self.digests[d] = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+    def _drop_dir(self, d):
+        del self.files[d]
+        self.subdirs.pop(d, None)
+        self.digests.pop(d, None)
+        parent, _ = _split(d)
+        self.subdirs.get(parent, set()).discard(d)
+
+    # =============================
+    # Точечные изменения
+    # =============================
+
+    def update(self, rel, digest):
+        """Меняет один файл (digest=None — удалить); хеши каталогов — в rehash()."""
+        d, name = _split(rel)
+        if digest is None:
+            if name not in self.files.get(d, {}):
+                return
+            del self.files[d][name]
+        else:
+            self._ensure_dir(d)
+            self.files[d][name] = digest
+        while True:
+            self._stale.add(d)
+            if not d:
+                break
+            d, _ = _split(d)
+
+    def rehash(self):
+        """Пересчитывает только каталоги на пути от изменённых файлов к корню."""
+        if self._stale:
+            self._compute(self._stale)
+            self._stale = set()
+
+    def copy(self):
+        tree = MerkleTree()
+        tree.files = {d: dict(names) for d, names in self.files.items()}
+        tree.subdirs = {d: set(subs) for d, subs in self.subdirs.items()}
+        tree.digests = dict(self.digests)
+        return tree
+
+    @property
+    def root(self):
+        return self.digests.get("")
+
+    def paths(self):
+        for d, names in self.files.items():
+            for name, digest in names.items():
+                yield os.path.join(d, name) if d else name, digest
+
+    # =============================
+    # Сверка
+    # =============================
+
+    def diff(self, old: "MerkleTree") -> dict:
+        """Что изменилось относительно old; в совпавшие по хешу каталоги не заходит."""
+        res = {"changed": [], "new": [], "removed": []}
+        self.visited = 0
+        stack = [""]
+        while stack:
+            d = stack.pop()
+            if self.digests.get(d) is not None and self.digests.get(d) == old.digests.get(d):
+                continue
+            self.visited += 1
+            mine, theirs = self.files.get(d, {}), old.files.get(d, {})
+            for name, h in mine.items():
+                rel = os.path.join(d, name) if d else name
+                if name not in theirs:
+                    res["new"].append(rel)
+                elif theirs[name] != h:
+                    res["changed"].append(rel)
+            for name in theirs:
+                if name not in mine:
+                    res["removed"].append(os.path.join(d, name) if d else name)
+            stack.extend(self.subdirs.get(d, set()) | old.subdirs.get(d, set()))
+        return res
+
+    # =============================
+    # Хранение
+    # =============================
+
+    def to_dict(self):
+        return {
+            "version": VERSION,
+            "root": self.root,
+            "dirs": {d: [self.digests[d], names] for d, names in self.files.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tree = cls()
+        for d, (digest, names) in data.get("dirs", {}).items():
+            tree._ensure_dir(d)
+            tree.files[d] = dict(names)
+            tree.digests[d] = digest
+        return tree
+
+
+def flat_diff(current: dict, old: dict) -> dict:
+    """Сверка без дерева: проход по всем путям."""
+    res = {"changed": [], "new": [], "removed": []}
+    for p, h in current.items():
+        if p not in old:
+            res["new"].append(p)
+        elif old[p] != h:
+            res["changed"].append(p)
+    res["removed"] = [p for p in old if p not in current]
+    return res
+
+
+def save_db(path, tree: MerkleTree):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(tree.to_dict(), ensure_ascii=False, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+def load_db(path):
+    """
+    MerkleTree из базы; старый плоский формат {путь: sha256} тоже читается.
+    Возвращает (дерево, плоский ли был файл).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") == VERSION:
+        return MerkleTree.from_dict(data), False
+    return MerkleTree({os.path.normpath(p): h for p, h in data.items()}), True
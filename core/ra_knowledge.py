@@ -4,6 +4,7 @@ import json
 import hashlib
 from pathlib import Path
 
+from core.ra_knowledge_index import RaInvertedIndex, index_path, make_snippet, tokenize
 
 IGNORED_DIRS = {"venv", "venv311", "__pycache__", "logs", ".git"}
 
@@ -12,12 +13,14 @@ class RaKnowledge:
     """
     Хранилище знаний РаСвета.
     Автоматически читает .md и .txt, создает хэши, сохраняет кэш.
+    Поиск идёт по инвертированному индексу (BM25), тексты в кэше не хранятся.
     """
 
-    def __init__(self, knowledge_dir="knowledge", cache_file="knowledge_cache.json"):
+    def __init__(self, knowledge_dir="knowledge", cache_file="knowledge_cache.json", index_file=None):
         self.knowledge_dir = Path(knowledge_dir)
         self.cache_file = Path(cache_file)
         self.knowledge_data = {}
+        self.index = RaInvertedIndex(index_file or index_path(self.knowledge_dir))
 
         self._load_cache()
         self._scan_and_update()
@@ -33,10 +36,13 @@ class RaKnowledge:
                 self.knowledge_data = json.loads(self.cache_file.read_text(encoding="utf-8"))
             except Exception:
                 self.knowledge_data = {}
+        # старый кэш держал полный текст каждого файла — он больше не нужен
+        for data in self.knowledge_data.values():
+            data.pop("text", None)
 
     def _save_cache(self):
         self.cache_file.write_text(
-            json.dumps(self.knowledge_data, ensure_ascii=False, indent=2),
+            json.dumps(self.knowledge_data, ensure_ascii=False, separators=(",", ":")),
             encoding="utf-8"
         )
 
@@ -52,6 +58,7 @@ class RaKnowledge:
         if not self.knowledge_dir.exists():
             self.knowledge_dir.mkdir(parents=True)
 
+        seen = set()
         for path in self.knowledge_dir.rglob("*"):
             if not path.is_file():
                 continue
@@ -68,17 +75,27 @@ class RaKnowledge:
                 continue
 
             h = hashlib.sha256(text.encode()).hexdigest()
+            seen.add(str(path))
 
-            # если файл новый или обновлён — пересоздаём summary
+            # если файл новый или обновлён — пересоздаём summary и постинги
             prev = self.knowledge_data.get(str(path))
 
-            if not prev or prev.get("hash") != h:
+            if not prev or prev.get("hash") != h or self.index.get_hash(str(path)) != h:
                 summary = self._make_summary(text)
                 self.knowledge_data[str(path)] = {
                     "hash": h,
-                    "summary": summary,
-                    "text": text
+                    "summary": summary
                 }
+                self.index.add_document(str(path), text, h, summary)
+
+        # удалённые файлы — только из своего каталога: чужие документы в индексе не трогаем
+        for path in (set(self.knowledge_data) | self.index.paths()) - seen:
+            if not Path(path).is_relative_to(self.knowledge_dir):
+                continue
+            self.knowledge_data.pop(path, None)
+            self.index.remove_document(path, commit=False)
+
+        self.index.commit()
 
     # ----------------------------------------------------
     # SUMMARY
@@ -97,20 +114,22 @@ class RaKnowledge:
     # ПОИСК
     # ----------------------------------------------------
 
-    def search(self, query: str):
-        q = query.lower()
-        matches = []
-
-        for path, data in self.knowledge_data.items():
-            if q in data["text"].lower() or q in data["summary"].lower():
-                matches.append({
-                    "path": path,
-                    "summary": data["summary"]
-                })
+    def search(self, query: str, top_k=10):
+        matches = self.index.search(query, top_k=top_k)
 
         if not matches:
             return [{"summary": "В потоках РаСвета пока нет ответа."}]
 
+        # Сниппеты только для top-k: читаем сами файлы, а не держим тексты в памяти
+        terms = tokenize(query)
+        for match in matches:
+            try:
+                text = Path(match["path"]).read_text(encoding="utf-8", errors="ignore")
+                match["snippet"] = make_snippet(text, match.pop("terms", None) or terms)
+            except Exception:
+                match.pop("terms", None)
+                match["snippet"] = match["summary"]
+
         return matches
 
     def load_json_knowledge(self):
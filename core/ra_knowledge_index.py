@@ -0,0 +1,179 @@
+# core/ra_knowledge_index.py
+"""
+Инвертированный индекс знаний РаСвета.
+
+SQLite-хранилище: документы, постинги (term → doc, tf) и длины документов.
+Поиск ранжируется BM25, поддерживает несколько слов и префиксы
+("свет" находит "светлый"), сырые тексты в индексе не хранятся.
+"""
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from pathlib import Path
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# В data/ проекта, как остальные хранилища, — не в каталоге, откуда запустили
+INDEX_DIR = os.getenv(
+    "RA_KNOWLEDGE_INDEX_DIR",
+    str(Path(__file__).resolve().parent.parent / "data")
+)
+
+
+def index_path(knowledge_dir) -> Path:
+    """Свой индекс на каждый каталог знаний: knowledge/ и modules/data не затирают друг друга."""
+    full = Path(knowledge_dir).resolve()
+    name = re.sub(r"\W+", "_", full.name) or "root"
+    digest = hashlib.sha1(str(full).encode("utf-8")).hexdigest()[:8]
+    return Path(INDEX_DIR) / f"knowledge_index_{name}_{digest}.db"
+
+
+def tokenize(text: str):
+    return [t for t in TOKEN_RE.findall(text.casefold()) if len(t) > 1]
+
+
+class RaInvertedIndex:
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS docs (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE,
+            hash TEXT,
+            length INTEGER,
+            summary TEXT
+        );
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT,
+            doc_id INTEGER,
+            tf INTEGER,
+            PRIMARY KEY (term, doc_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+        """)
+        self.conn.commit()
+        self._load_docs()
+
+    def _load_docs(self):
+        # Длины и пути документов держим в памяти — это нужно каждому запросу
+        self.docs = {}
+        for doc_id, path, h, length, summary in self.conn.execute(
+            "SELECT id, path, hash, length, summary FROM docs"
+        ):
+            self.docs[doc_id] = {"path": path, "hash": h, "length": length, "summary": summary}
+        self.by_path = {d["path"]: doc_id for doc_id, d in self.docs.items()}
+        self.total_length = sum(d["length"] for d in self.docs.values())
+
+    # ----------------------------------------------------
+    # ОБНОВЛЕНИЕ
+    # ----------------------------------------------------
+
+    def get_hash(self, path: str):
+        doc_id = self.by_path.get(path)
+        return self.docs[doc_id]["hash"] if doc_id is not None else None
+
+    def add_document(self, path: str, text: str, h: str, summary: str):
+        self.remove_document(path, commit=False)
+
+        tokens = tokenize(text)
+        cur = self.conn.execute(
+            "INSERT INTO docs (path, hash, length, summary) VALUES (?, ?, ?, ?)",
+            (path, h, len(tokens), summary)
+        )
+        doc_id = cur.lastrowid
+        self.conn.executemany(
+            "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+            ((term, doc_id, tf) for term, tf in Counter(tokens).items())
+        )
+
+        self.docs[doc_id] = {"path": path, "hash": h, "length": len(tokens), "summary": summary}
+        self.by_path[path] = doc_id
+        self.total_length += len(tokens)
+
+    def remove_document(self, path: str, commit=True):
+        doc_id = self.by_path.pop(path, None)
+        if doc_id is None:
+            return
+        self.total_length -= self.docs.pop(doc_id)["length"]
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+        if commit:
+            self.conn.commit()
+
+    def commit(self):
+        self.conn.commit()
+
+    def paths(self):
+        return set(self.by_path)
+
+    # ----------------------------------------------------
+    # ПОИСК
+    # ----------------------------------------------------
+
+    def _postings(self, term: str):
+        # Префиксный диапазон по первичному ключу: term <= x < term + U+FFFF
+        return self.conn.execute(
+            "SELECT term, doc_id, tf FROM postings WHERE term >= ? AND term < ?",
+            (term, term + "\uffff")
+        ).fetchall()
+
+    def search(self, query: str, top_k=10):
+        terms = list(dict.fromkeys(tokenize(query)))
+        n = len(self.docs)
+        if not terms or not n:
+            return []
+
+        avgdl = self.total_length / n or 1.0
+        scores = defaultdict(float)
+        matched_terms = defaultdict(set)
+
+        for term in terms:
+            # Постинги без документа в памяти (файл правили в обход этого экземпляра) пропускаем
+            rows = [row for row in self._postings(term) if row[1] in self.docs]
+            if not rows:
+                continue
+            df = len({doc_id for _, doc_id, _ in rows})
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for found, doc_id, tf in rows:
+                dl = self.docs[doc_id]["length"]
+                weight = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl))
+                # Точное совпадение весит больше префиксного
+                scores[doc_id] += weight if found == term else weight * 0.5
+                matched_terms[doc_id].add(found)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+        return [
+            {
+                "path": self.docs[doc_id]["path"],
+                "summary": self.docs[doc_id]["summary"],
+                "score": round(score, 4),
+                "terms": sorted(matched_terms[doc_id])
+            }
+            for doc_id, score in ranked
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+def make_snippet(text: str, terms, width=160):
+    """Кусочек текста вокруг первого найденного слова."""
+    low = text.casefold()
+    positions = [low.find(t) for t in terms if low.find(t) >= 0]
+    if not positions:
+        return text[:width].strip()
+    pos = min(positions)
+    start = max(0, pos - width // 3)
+    end = min(len(text), start + width)
+    snippet = text[start:end].replace("\n", " ").strip()
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
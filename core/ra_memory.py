@@ -6,14 +6,14 @@ import os
 from datetime import datetime
 from pathlib import Path
 from modules.ra_intent_engine import RaIntentEngine
+from core.ra_memory_store import RaSegmentStore, migrate_json_files
 
 try:
-    from utils.memory_sync import sync_to_github
+    from utils.memory_sync import memory_sync_worker
 except Exception:
-    sync_to_github = None
+    memory_sync_worker = None
 
 logging.basicConfig(level=logging.INFO)
-memory.intent_engine = RaIntentEngine(guardian=None)
 MEMORY_FOLDER = Path(os.getenv("RA_MEMORY_FOLDER", "memory"))
 MEMORY_FOLDER.mkdir(parents=True, exist_ok=True)
 
@@ -26,6 +26,11 @@ class RaMemory:
     def __init__(self, event_bus=None):
         self.memory_folder = MEMORY_FOLDER
         self.event_bus = event_bus
+        self.store = RaSegmentStore(
+            self.memory_folder,
+            max_messages=MAX_MESSAGES,
+            keep_full_users=KEEP_FULL_MEMORY_USERS
+        )
 
     # =============================
     # Внутренние утилиты
@@ -34,14 +39,7 @@ class RaMemory:
     def _get_file(self, user_id, layer):
         return self.memory_folder / f"{layer}_{user_id}.json"
 
-    def load(self, user_id, layer):
-        path = self._get_file(user_id, layer)
-        if path.exists():
-            try:
-                return json.loads(path.read_text(encoding="utf-8"))
-            except Exception as e:
-                logging.warning(f"⚠️ Ошибка чтения памяти {user_id}:{layer} — {e}")
-
+    def _empty(self, user_id, layer):
         return {
             "meta": {
                 "user_id": user_id,
@@ -51,14 +49,44 @@ class RaMemory:
             "messages": []
         }
 
+    def _load_legacy(self, user_id, layer):
+        path = self._get_file(user_id, layer)
+        if path.exists():
+            try:
+                return json.loads(path.read_text(encoding="utf-8"))
+            except Exception as e:
+                logging.warning(f"⚠️ Ошибка чтения памяти {user_id}:{layer} — {e}")
+        return None
+
+    def load(self, user_id, layer):
+        memory = self.store.load(user_id, layer)
+        if memory is not None:
+            return memory
+
+        # Старый формат: один JSON на слой — переносим в сегменты при первом обращении
+        legacy = self._load_legacy(user_id, layer)
+        if legacy is not None:
+            self.store.save(user_id, layer, legacy)
+            return legacy
+
+        return self._empty(user_id, layer)
+
     def save(self, user_id, layer, memory):
         try:
-            with open(self._get_file(user_id, layer), "w", encoding="utf-8") as f:
-                json.dump(memory, f, ensure_ascii=False, indent=2)
+            self.store.save(user_id, layer, memory)
             logging.info(f"💾 Память сохранена: {layer}:{user_id}")
         except Exception as e:
             logging.error(f"❌ Ошибка сохранения памяти {user_id}:{layer} — {e}")
 
+    def compact(self):
+        """Плотная переупаковка всех слоёв, обрезка short_term до MAX_MESSAGES."""
+        total = self.store.compact_all()
+        logging.info(f"🗜 Память уплотнена ({total} сообщений)")
+        return total
+
+    def migrate_legacy(self, remove_legacy=False):
+        return migrate_json_files(self.memory_folder, self.store, remove_legacy=remove_legacy)
+
     def choose_layer(self, message: str):
         return "long_term" if len(message) > 300 else "short_term"
 
@@ -70,20 +98,18 @@ class RaMemory:
         if layer == "auto":
             layer = self.choose_layer(message)
 
-        memory = self.load(user_id, layer)
-
-        memory["messages"].append({
-            "message": message,
-            "timestamp": datetime.utcnow().isoformat(),
-            "source": source
-        })
-
-        if layer == "short_term" and user_id not in KEEP_FULL_MEMORY_USERS:
-            memory["messages"] = memory["messages"][-MAX_MESSAGES:]
+        if not self.store.exists(user_id, layer) and self._get_file(user_id, layer).exists():
+            self.load(user_id, layer)
 
-        memory["meta"]["updated_at"] = datetime.utcnow().isoformat()
-
-        self.save(user_id, layer, memory)
+        segment_path = None
+        try:
+            segment_path = self.store.append(user_id, layer, {
+                "message": message,
+                "timestamp": datetime.utcnow().isoformat(),
+                "source": source
+            })
+        except Exception as e:
+            logging.error(f"❌ Ошибка сохранения памяти {user_id}:{layer} — {e}")
 
         # событие в нервную систему
         if self.event_bus:
@@ -105,16 +131,25 @@ class RaMemory:
             except Exception as e:
                 logging.warning(f"⚠️ Не удалось отправить событие памяти: {e}")
 
-        # Git синхронизация
-        if AUTO_SYNC and sync_to_github:
+        # Git синхронизация — только отметка, коммит сделает фоновый воркер пачкой
+        if AUTO_SYNC and memory_sync_worker and segment_path:
             try:
-                sync_to_github(f"Memory update: {user_id} [{layer}]")
+                memory_sync_worker.mark_dirty(segment_path.parent)
             except Exception as e:
                 logging.error(f"❌ Ошибка git-синхронизации: {e}")
 
+    async def flush(self):
+        """Дописывает в Git всё, что ещё ждёт синхронизации (вызывается при остановке)."""
+        if memory_sync_worker:
+            await memory_sync_worker.stop()
+
+    def sync_metrics(self):
+        return memory_sync_worker.get_metrics() if memory_sync_worker else {}
+
     async def append_shared(self, message, source="system"):
         await self.append("shared", message, layer="shared", source=source)
 
 
 # глобальный объект
 memory = RaMemory()
+memory.intent_engine = RaIntentEngine(guardian=None)
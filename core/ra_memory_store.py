@@ -0,0 +1,302 @@
+# core/ra_memory_store.py
+"""
+Сегментное хранилище памяти Ра.
+
+Каждый слой пользователя ({layer}_{user_id}) живёт в своей папке:
+    memory/segments/{layer}_{user_id}/
+        index.json          — компактный индекс (meta + список сегментов)
+        seg_000001.jsonl    — append-only сегменты, одно сообщение на строку
+
+Добавление сообщения — это одна дописанная строка в активный сегмент,
+без перечитывания и перезаписи всей истории.
+"""
+
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+log = logging.getLogger("RaMemoryStore")
+
+SEGMENT_MAX_MESSAGES = 100
+INDEX_FILE = "index.json"
+
+
+class RaSegmentStore:
+    def __init__(self, root, max_messages=200, keep_full_users=None, segment_size=SEGMENT_MAX_MESSAGES):
+        self.root = Path(root) / "segments"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_messages = max_messages
+        self.keep_full_users = set(keep_full_users or [])
+        self.segment_size = segment_size
+        self._indexes = {}
+
+    # =============================
+    # Внутренние утилиты
+    # =============================
+
+    def _key(self, user_id, layer):
+        return f"{layer}_{user_id}"
+
+    def _dir(self, user_id, layer):
+        return self.root / self._key(user_id, layer)
+
+    def _is_trimmed(self, user_id, layer):
+        return layer == "short_term" and user_id not in self.keep_full_users
+
+    def _new_index(self, user_id, layer):
+        return {
+            "meta": {
+                "user_id": user_id,
+                "layer": layer,
+                "created_at": datetime.utcnow().isoformat()
+            },
+            "segments": [],
+            "next_segment": 1,
+            "total": 0
+        }
+
+    def _read_index(self, user_id, layer):
+        key = self._key(user_id, layer)
+        if key in self._indexes:
+            return self._indexes[key]
+
+        path = self._dir(user_id, layer) / INDEX_FILE
+        index = None
+        if path.exists():
+            try:
+                index = json.loads(path.read_text(encoding="utf-8"))
+                self._recover_active(user_id, layer, index)
+            except Exception as e:
+                log.warning(f"⚠️ Индекс памяти {key} повреждён, пересобираю — {e}")
+                index = self._rebuild_index(user_id, layer)
+        elif self._dir(user_id, layer).exists():
+            index = self._rebuild_index(user_id, layer)
+
+        if index is not None:
+            self._indexes[key] = index
+        return index
+
+    def _write_index(self, user_id, layer, index):
+        folder = self._dir(user_id, layer)
+        folder.mkdir(parents=True, exist_ok=True)
+        tmp = folder / (INDEX_FILE + ".tmp")
+        tmp.write_text(json.dumps(index, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, folder / INDEX_FILE)
+
+    def _count_lines(self, path):
+        if not path.exists():
+            return 0
+        with open(path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+
+    def _recover_active(self, user_id, layer, index):
+        # После аварийной остановки активный сегмент мог уйти вперёд индекса
+        if not index["segments"]:
+            return
+        active = index["segments"][-1]
+        real = self._count_lines(self._dir(user_id, layer) / active["name"])
+        if real != active["count"]:
+            index["total"] += real - active["count"]
+            active["count"] = real
+
+    def _rebuild_index(self, user_id, layer):
+        index = self._new_index(user_id, layer)
+        folder = self._dir(user_id, layer)
+        for seg in sorted(folder.glob("seg_*.jsonl")):
+            count = self._count_lines(seg)
+            index["segments"].append({"name": seg.name, "count": count})
+            index["total"] += count
+            index["next_segment"] = max(index["next_segment"], int(seg.stem.split("_")[1]) + 1)
+        return index
+
+    def _open_segment(self, index):
+        name = f"seg_{index['next_segment']:06d}.jsonl"
+        index["next_segment"] += 1
+        segment = {"name": name, "count": 0}
+        index["segments"].append(segment)
+        return segment
+
+    def _read_segment(self, folder, name):
+        messages = []
+        path = folder / name
+        if not path.exists():
+            return messages
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    messages.append(json.loads(line))
+                except Exception:
+                    log.warning(f"⚠️ Пропущена битая строка в {path}")
+        return messages
+
+    # =============================
+    # Публичный API
+    # =============================
+
+    def exists(self, user_id, layer):
+        return self._read_index(user_id, layer) is not None
+
+    def append(self, user_id, layer, entry):
+        """O(1): одна строка в активный сегмент + крошечный индекс."""
+        index = self._read_index(user_id, layer) or self._new_index(user_id, layer)
+        self._indexes[self._key(user_id, layer)] = index
+
+        if not index["segments"] or index["segments"][-1]["count"] >= self.segment_size:
+            self._open_segment(index)
+        segment = index["segments"][-1]
+
+        folder = self._dir(user_id, layer)
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(folder / segment["name"], "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        segment["count"] += 1
+        index["total"] += 1
+        index["meta"]["updated_at"] = datetime.utcnow().isoformat()
+
+        if self._is_trimmed(user_id, layer):
+            self._drop_old_segments(user_id, layer, index)
+
+        self._write_index(user_id, layer, index)
+        return folder / segment["name"]
+
+    def _drop_old_segments(self, user_id, layer, index):
+        # Целые сегменты, которые уже не попадают в окно MAX_MESSAGES, удаляем без перезаписи
+        folder = self._dir(user_id, layer)
+        while len(index["segments"]) > 1 and index["total"] - index["segments"][0]["count"] >= self.max_messages:
+            old = index["segments"].pop(0)
+            index["total"] -= old["count"]
+            try:
+                (folder / old["name"]).unlink()
+            except FileNotFoundError:
+                pass
+
+    def load(self, user_id, layer):
+        index = self._read_index(user_id, layer)
+        if index is None:
+            return None
+
+        folder = self._dir(user_id, layer)
+        messages = []
+        for segment in index["segments"]:
+            messages.extend(self._read_segment(folder, segment["name"]))
+
+        if self._is_trimmed(user_id, layer):
+            messages = messages[-self.max_messages:]
+
+        return {"meta": dict(index["meta"]), "messages": messages}
+
+    def save(self, user_id, layer, memory):
+        """Полная замена слоя (старый API RaMemory.save)."""
+        folder = self._dir(user_id, layer)
+        folder.mkdir(parents=True, exist_ok=True)
+
+        old_index = self._read_index(user_id, layer)
+        index = self._new_index(user_id, layer)
+        index["meta"].update(memory.get("meta") or {})
+        if old_index:
+            index["next_segment"] = old_index["next_segment"]
+
+        messages = memory.get("messages", [])
+        if self._is_trimmed(user_id, layer):
+            messages = messages[-self.max_messages:]
+
+        for start in range(0, len(messages), self.segment_size):
+            segment = self._open_segment(index)
+            chunk = messages[start:start + self.segment_size]
+            with open(folder / segment["name"], "w", encoding="utf-8") as f:
+                for entry in chunk:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            segment["count"] = len(chunk)
+            index["total"] += len(chunk)
+
+        self._write_index(user_id, layer, index)
+        self._indexes[self._key(user_id, layer)] = index
+
+        if old_index:
+            keep = {s["name"] for s in index["segments"]}
+            for segment in old_index["segments"]:
+                if segment["name"] not in keep:
+                    try:
+                        (folder / segment["name"]).unlink()
+                    except FileNotFoundError:
+                        pass
+
+    def compact(self, user_id, layer):
+        """Переупаковывает слой в плотные сегменты и обрезает до MAX_MESSAGES."""
+        memory = self.load(user_id, layer)
+        if memory is None:
+            return 0
+        self.save(user_id, layer, memory)
+        return len(memory["messages"])
+
+    def compact_all(self):
+        total = 0
+        for folder in self.root.iterdir():
+            if not folder.is_dir() or "_" not in folder.name:
+                continue
+            layer, user_id = self._split_key(folder.name)
+            total += self.compact(user_id, layer)
+        return total
+
+    def _split_key(self, key):
+        for layer in ("short_term", "long_term", "shared"):
+            if key.startswith(layer + "_"):
+                raw = key[len(layer) + 1:]
+                break
+        else:
+            layer, raw = key.rsplit("_", 1)
+        return layer, int(raw) if raw.lstrip("-").isdigit() else raw
+
+
+# =============================
+# Миграция старых memory/*.json
+# =============================
+
+def migrate_json_files(memory_folder, store, remove_legacy=False):
+    """
+    Одноразовый перенос {layer}_{user_id}.json в сегментное хранилище.
+    Уже мигрированные слои пропускаются.
+    """
+    memory_folder = Path(memory_folder)
+    migrated = 0
+    for path in sorted(memory_folder.glob("*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            log.warning(f"⚠️ Не удалось прочитать {path}: {e}")
+            continue
+        if not isinstance(data, dict) or "messages" not in data:
+            continue
+
+        meta = data.get("meta") or {}
+        layer, user_id = store._split_key(path.stem)
+        layer = meta.get("layer", layer)
+        user_id = meta.get("user_id", user_id)
+
+        if store.exists(user_id, layer):
+            continue
+
+        store.save(user_id, layer, data)
+        migrated += 1
+        log.info(f"📦 Память мигрирована: {path.name} ({len(data['messages'])} сообщений)")
+
+        if remove_legacy:
+            path.unlink()
+
+    return migrated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    folder = Path(sys.argv[1] if len(sys.argv) > 1 else os.getenv("RA_MEMORY_FOLDER", "memory"))
+    from core.ra_memory import MAX_MESSAGES, KEEP_FULL_MEMORY_USERS
+    store = RaSegmentStore(folder, max_messages=MAX_MESSAGES, keep_full_users=KEEP_FULL_MEMORY_USERS)
+    count = migrate_json_files(folder, store, remove_legacy="--remove" in sys.argv)
+    print(f"✅ Мигрировано слоёв: {count}")
@@ -0,0 +1,97 @@
+# core/ra_reactor_inbox.py
+"""
+Входящие очереди HeartReactor: ожидание событий без опроса и микро-пакеты.
+"""
+
+import asyncio
+import os
+import time
+
+# Микро-пакет: не больше BATCH_MAX событий и не дольше BATCH_WINDOW секунд ожидания
+BATCH_MAX = int(os.getenv("RA_HEART_BATCH_MAX", "32"))
+BATCH_WINDOW = float(os.getenv("RA_HEART_BATCH_WINDOW", "0.05"))
+
+
+class ReactorInbox:
+    """
+    Ожидание сразу двух очередей сердца без опроса.
+
+    next_batch() спит, пока ни в одной очереди ничего нет, а после первого
+    события добирает остальные — до max_batch штук или до истечения window.
+    Задачи get() переживают вызовы, поэтому события не теряются при ожидании.
+    """
+
+    def __init__(self, event_queue: asyncio.Queue, future_queue: asyncio.Queue,
+                 max_batch: int = BATCH_MAX, window: float = BATCH_WINDOW):
+        self.queues = (event_queue, future_queue)
+        self.max_batch = max_batch
+        self.window = window
+        self._getters = [None, None]
+        self.batches = 0
+        self.events = 0
+
+    def _getter(self, i):
+        if self._getters[i] is None:
+            self._getters[i] = asyncio.ensure_future(self.queues[i].get())
+        return self._getters[i]
+
+    def _take(self, batches):
+        """Забирает готовые результаты get() и то, что уже лежит в очередях."""
+        for i, queue in enumerate(self.queues):
+            task = self._getters[i]
+            if task is not None and task.done():
+                self._getters[i] = None
+                batches[i].append(task.result())
+            while self._getters[i] is None and len(batches[0]) + len(batches[1]) < self.max_batch:
+                try:
+                    batches[i].append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+    async def next_batch(self):
+        """Возвращает (события настоящего, пакеты событий будущего)."""
+        batches = ([], [])
+        await asyncio.wait([self._getter(0), self._getter(1)], return_when=asyncio.FIRST_COMPLETED)
+        deadline = time.monotonic() + self.window
+        self._take(batches)
+
+        try:
+            while len(batches[0]) + len(batches[1]) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait([self._getter(0), self._getter(1)], timeout=remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                self._take(batches)
+        except asyncio.CancelledError:
+            # Остановка посреди окна: собранное возвращаем в очереди
+            for queue, items in zip(self.queues, batches):
+                self._requeue(queue, items)
+            raise
+
+        self.batches += 1
+        self.events += len(batches[0]) + len(batches[1])
+        return batches
+
+    def close(self):
+        for queue, task in zip(self.queues, self._getters):
+            if task is None:
+                continue
+            if not task.done():
+                # Ещё ждёт: предмет из очереди он не забрал, отмена ничего не теряет
+                task.cancel()
+            elif not task.cancelled() and task.exception() is None:
+                # Уже получил событие — возвращаем его в очередь
+                self._requeue(queue, [task.result()])
+        self._getters = [None, None]
+
+    @staticmethod
+    def _requeue(queue, items):
+        """Кладёт items в голову очереди, сохраняя порядок."""
+        if not items:
+            return
+        rest = [queue.get_nowait() for _ in range(queue.qsize())]
+        for item in items + rest:
+            queue.put_nowait(item)
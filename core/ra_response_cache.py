@@ -0,0 +1,297 @@
+# core/ra_response_cache.py
+"""
+Кэш ответов моделей.
+
+Два уровня:
+    • LRU в памяти (OrderedDict) — горячие ответы;
+    • SQLite на диске (как errors.db / logs.db) — индексированное хранилище.
+
+У каждой записи есть TTL, общий размер ограничен, ключ нормализуется:
+последнее сообщение пользователя (casefold + схлопнутые пробелы)
+плюс хэш предшествующего контекста диалога.
+
+get() и put() на диск не пишут: новые ответы и время обращений копятся
+в памяти, а фоновый поток раз в COMMIT_INTERVAL секунд (и close()) пишет
+их одной короткой транзакцией — ни fsync, ни блокировка записи SQLite
+не стоят на пути запроса. Один файл — один кэш на процесс: open_cache().
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger("RaResponseCache")
+
+_SPACES = re.compile(r"\s+")
+DB_PATH = os.getenv("RA_GPT_CACHE_DB", "data/gpt_cache.db")
+COMMIT_INTERVAL = float(os.getenv("RA_GPT_CACHE_COMMIT_SEC", "5"))
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    return _SPACES.sub(" ", str(text)).strip().casefold()
+
+
+def make_key(user_id, messages) -> str:
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    last = normalize_text(messages[-1].get("content", "")) if messages else ""
+    context = json.dumps(
+        [(m.get("role"), normalize_text(m.get("content", ""))) for m in messages[:-1]],
+        ensure_ascii=False
+    )
+    context_hash = hashlib.sha1(context.encode("utf-8")).hexdigest()[:16]
+    return f"{user_id}:{context_hash}:{last}"
+
+
+def open_cache(db_path=DB_PATH):
+    """Общий кэш для файла: все GPTHandler процесса читают и пишут через одно соединение."""
+    key = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = RaResponseCache(key)
+        return cache
+
+
+class RaResponseCache:
+    def __init__(
+        self,
+        db_path=DB_PATH,
+        ttl=float(os.getenv("RA_GPT_CACHE_TTL", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("RA_GPT_CACHE_MAX", "20000")),
+        memory_entries=int(os.getenv("RA_GPT_CACHE_MEMORY", "512")),
+        commit_interval=COMMIT_INTERVAL,
+    ):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_trim = 0
+        self._pending = {}      # key → (answer, expires, last_access), ещё не записанное
+        self._touched = {}      # key → last_access, ещё не записанное
+        self._closed = threading.Event()
+        self.metrics = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "memory_evictions": 0,
+            "evictions": 0,
+            "commits": 0
+        }
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            answer TEXT,
+            expires REAL,
+            last_access REAL
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires ON responses(expires)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        self.conn.commit()
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop, args=(commit_interval,), name="ra_gpt_cache", daemon=True
+        )
+        self._flusher.start()
+
+    # =============================
+    # Память
+    # =============================
+
+    def _remember(self, key, answer, expires):
+        self._memory[key] = (answer, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.metrics["memory_evictions"] += 1
+
+    # =============================
+    # Публичный API
+    # =============================
+
+    def get(self, user_id, messages):
+        key = make_key(user_id, messages)
+        now = time.time()
+
+        with self._lock:
+            item = self._memory.get(key)
+            if item:
+                answer, expires = item
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    self.metrics["hits"] += 1
+                    self.metrics["memory_hits"] += 1
+                    return answer
+                del self._memory[key]
+                self.metrics["expired"] += 1
+
+            pending = self._pending.get(key)
+            if pending and pending[1] > now:
+                # Вытеснен из LRU раньше, чем попал на диск
+                self._remember(key, pending[0], pending[1])
+                self.metrics["hits"] += 1
+                self.metrics["memory_hits"] += 1
+                return pending[0]
+
+            row = self.conn.execute(
+                "SELECT answer, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] > now:
+                self._touched[key] = now
+                self._remember(key, row[0], row[1])
+                self.metrics["hits"] += 1
+                self.metrics["disk_hits"] += 1
+                return row[0]
+            if row:
+                # Истёкшую строку уберёт _trim
+                self.metrics["expired"] += 1
+
+            self.metrics["misses"] += 1
+            return None
+
+    def put(self, user_id, messages, answer, ttl=None):
+        key = make_key(user_id, messages)
+        now = time.time()
+        expires = now + (ttl if ttl is not None else self.ttl)
+
+        with self._lock:
+            self._remember(key, answer, expires)
+            self._pending[key] = (answer, expires, now)
+            self._touched.pop(key, None)
+            self._puts_since_trim += 1
+
+    def _trim(self, now):
+        # Истёкшие записи и хвост по давности обращения сверх max_entries
+        self._puts_since_trim = 0
+        cur = self.conn.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        self.metrics["expired"] += cur.rowcount
+        count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            cur = self.conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            self.metrics["evictions"] += cur.rowcount
+
+    def trim(self):
+        with self._lock:
+            self._commit(trim=True)
+
+    # =============================
+    # Запись на диск
+    # =============================
+
+    def _commit(self, trim=False):
+        trim = trim or self._puts_since_trim >= 100
+        if not (self._pending or self._touched or trim):
+            return
+        if self._pending:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO responses (key, answer, expires, last_access) VALUES (?, ?, ?, ?)",
+                [(k, *v) for k, v in self._pending.items()]
+            )
+            self._pending.clear()
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                [(t, k) for k, t in self._touched.items()]
+            )
+            self._touched.clear()
+        if trim:
+            self._trim(time.time())
+        self.conn.commit()
+        self.metrics["commits"] += 1
+
+    def flush(self):
+        """Фиксирует накопленные записи и время обращений."""
+        with self._lock:
+            if not self._closed.is_set():
+                self._commit()
+
+    def _flush_loop(self, interval):
+        while not self._closed.wait(interval):
+            try:
+                self.flush()
+            except Exception as e:
+                log.warning(f"⚠️ Кэш ответов не записан: {e}")
+
+    def stats(self):
+        with self._lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+            "memory_size": len(self._memory),
+            "pending": len(self._pending),
+            "disk_size": size
+        }
+
+    # =============================
+    # Перенос старого gpt_cache.json
+    # =============================
+
+    def import_legacy_json(self, path):
+        """
+        Старые форматы: {user_id: {text: answer}} (core.gpt_module)
+        и {user_id: {json(messages): answer}} (core.gpt_handler).
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            log.warning(f"⚠️ Старый кэш {path} не прочитан: {e}")
+            return 0
+
+        imported = 0
+        for user_id, entries in data.items():
+            if not isinstance(entries, dict):
+                continue
+            for raw_key, answer in entries.items():
+                try:
+                    messages = json.loads(raw_key)
+                    if not isinstance(messages, list):
+                        raise ValueError
+                except ValueError:
+                    messages = raw_key
+                self.put(user_id, messages, answer)
+                imported += 1
+
+        # Старый файл убираем только после записи перенесённого на диск
+        self.flush()
+        os.replace(path, path + ".migrated")
+        log.info(f"📦 Перенесено {imported} ответов из {path}")
+        return imported
+
+    def close(self):
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._commit()
+            self._closed.set()
+            self.conn.close()
+        with _caches_lock:
+            if _caches.get(os.path.abspath(self.db_path)) is self:
+                _caches.pop(os.path.abspath(self.db_path))
@@ -13,13 +13,16 @@ from fastapi.responses import FileResponse
 
 from core.ra_identity import RaIdentity
 from core.ra_event_bus import RaEventBus
+from core.ra_event_journal import RaEventJournal
 from core.ra_git_keeper import RaGitKeeper
 from core.github_commit import create_commit_push
 from core.openrouter_client import OpenRouterClient
+from core.ra_http_pool import http_pool
 from core.gpt_handler import GPTHandler
 from core.rustlef_master_logger import RustlefMasterLogger
 from core.ra_self_reflect import RaSelfReflect
 from core.ra_knowledge import RaKnowledge
+from utils.memory_sync import memory_sync_worker
 
 from modules.ra_thinker import RaThinker
 from modules.ra_scheduler import RaScheduler
@@ -80,7 +83,7 @@ class RaSelfMaster:
         self.last_thought = "пустота"
 
         # EventBus
-        self.event_bus = RaEventBus()
+        self.event_bus = RaEventBus(journal=RaEventJournal("data/event_journal"))
 
         # Осознание файлов
         try:
@@ -197,15 +200,29 @@ class RaSelfMaster:
         @self.app.websocket("/ws/events")
         async def websocket_events(ws: WebSocket):
             await ws.accept()
-            self.event_bus.attach_ws(ws)
+            topics = [t for t in ws.query_params.get("topics", "").split(",") if t]
+            since = ws.query_params.get("since")
+            self.event_bus.attach_ws(ws, topics=topics or None, since=int(since) if since and since.isdigit() else None)
             try:
                 while True:
-                    await ws.receive_text()
+                    # {"topics": ["heart.#", "memory_updated"]} — сменить фильтр
+                    text = await ws.receive_text()
+                    try:
+                        msg = json.loads(text)
+                    except ValueError:
+                        continue
+                    if isinstance(msg, dict) and "topics" in msg:
+                        self.event_bus.set_ws_topics(ws, msg["topics"] or None)
             except Exception:
                 pass
             finally:
                 self.event_bus.detach_ws(ws)
 
+        @self.app.get("/api/events")
+        async def ra_events(since: int = None, topic: str = None, limit: int = 100):
+            topics = [t for t in (topic or "").split(",") if t] or None
+            return self.event_bus.get_events(since=since, topic=topics, limit=limit)
+
         @self.app.get("/api/state")
         async def ra_state():
             return self.get_state()
@@ -243,6 +260,8 @@ class RaSelfMaster:
             self.logger.info(f"[Ра] Осознал файловое тело ({len(files_map)} файлов)")
 
         self.thinker.scan_architecture()
+        # Дальше индекс файлов обновляется по inotify/опросу, органы получают только изменения
+        self._create_bg_task(self.thinker.file_index.watch(), "file_index_watch")
         self._start_organs()
         self._sync_manifest()
 
@@ -371,6 +390,59 @@ class RaSelfMaster:
         await self.event_bus.emit("world_message", text)
         return reply
 
+    async def process_text_stream(self, user_id, text):
+        """
+        Как process_text, но отдаёт ответ кусочками по мере генерации.
+        Если упало до первого кусочка — исключение уходит наверх (там обычный путь);
+        если посреди ответа — дописываем хвост об ошибке.
+        """
+        if not text.strip():
+            yield "…Ра слушает тишину."
+            return
+
+        decision = self.identity.decide(text) if self.identity else "answer"
+
+        parts = []
+        try:
+            if decision == "think":
+                reply = await self.thinker.reflect_async(text)
+                parts.append(reply)
+                yield reply
+            else:
+                async for chunk in self._gpt_stream(text, user_id):
+                    parts.append(chunk)
+                    yield chunk
+        except Exception as e:
+            if not parts:
+                raise
+            tail = f"\n\n🤍 Ошибка ИскИнов: {e}"
+            parts.append(tail)
+            yield tail
+
+        # Ход пишем целиком после ответа: при откате на process_text он не задвоится
+        if self.memory:
+            try:
+                self.memory.append(user_id, {"from": "user", "text": text})
+                self.memory.append(user_id, {"from": "ra", "text": "".join(parts).strip()})
+            except Exception:
+                pass
+
+        try:
+            await self.event_bus.emit("world_message", text)
+        except Exception as e:
+            self.logger.warning(f"[Ра] world_message не отправлен: {e}")
+
+    async def _gpt_stream(self, text, user_id):
+        # Тот же обработчик, что и у _gpt_reply: промпт, кэш, роутер и тайм-ауты попыток
+        if not self.gpt_handler:
+            yield "…Ра рядом, но без голоса."
+            return
+        try:
+            async for chunk in self.gpt_handler.stream_ask(user_id, [{"role": "user", "content": text}]):
+                yield chunk
+        except Exception as e:
+            yield f"🤍 Ошибка ИскИнов: {e}"
+
     async def _gpt_reply(self, text, user_id):
         if not self.gpt_module:
             return "…Ра рядом, но без голоса."
@@ -449,6 +521,9 @@ class RaSelfMaster:
             if not task.done():
                 task.cancel()
 
+        # Останавливаем воркеры подписчиков шины
+        self.event_bus.stop()
+
         # Останавливаем интернет-агент
         if hasattr(self, "internet"):
             try:
@@ -456,6 +531,25 @@ class RaSelfMaster:
             except Exception as e:
                 self.logger.warning(f"[STOP] Ошибка остановки InternetAgent: {e}")
 
+        # Дописываем накопленную память в Git
+        try:
+            await memory_sync_worker.stop()
+        except Exception as e:
+            self.logger.warning(f"[STOP] Ошибка синхронизации памяти: {e}")
+
+        # Сохраняем накопленную статистику моделей
+        if self.gpt_handler:
+            try:
+                self.gpt_handler.router.flush()
+            except Exception as e:
+                self.logger.warning(f"[STOP] Ошибка сохранения статистики моделей: {e}")
+
+        # Закрываем общий пул соединений OpenRouter
+        try:
+            await http_pool.close()
+        except Exception as e:
+            self.logger.warning(f"[STOP] Ошибка закрытия HTTP пула: {e}")
+
         self.logger.info("🛑 Ра остановлен")
         
 # ================= Entry =================
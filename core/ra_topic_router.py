@@ -0,0 +1,124 @@
+# core/ra_topic_router.py
+"""
+Маршрутизация событий по иерархическим топикам.
+
+Топики разделяются точкой: "world.message", "heart.impulse.strong".
+В шаблонах подписки:
+    *  — ровно один сегмент       ("heart.impulse.*")
+    #  — любое число сегментов    ("heart.#", "#")
+Одиночный "*" — старый «слушаю всё» из RustlefMasterLogger, равен "#".
+
+Шаблоны хранятся в префиксном дереве, результат разрешения топика
+кэшируется до следующего изменения подписок.
+"""
+
+SEP = "."
+ONE = "*"
+MANY = "#"
+
+CACHE_LIMIT = 4096
+
+
+class _Node:
+    __slots__ = ("children", "items")
+
+    def __init__(self):
+        self.children = {}
+        self.items = []
+
+
+class TopicRouter:
+    def __init__(self):
+        self.root = _Node()
+        self._cache = {}
+
+    @staticmethod
+    def _split(pattern: str):
+        if pattern == ONE:
+            return [MANY]
+        return pattern.split(SEP)
+
+    def _node(self, pattern, create=False):
+        node = self.root
+        for part in self._split(pattern):
+            nxt = node.children.get(part)
+            if nxt is None:
+                if not create:
+                    return None
+                nxt = node.children[part] = _Node()
+            node = nxt
+        return node
+
+    # ----------------------------------------------------
+    # Подписки
+    # ----------------------------------------------------
+
+    def items(self, pattern: str):
+        node = self._node(pattern)
+        return list(node.items) if node else []
+
+    def add(self, pattern: str, item) -> bool:
+        """False — такая подписка уже есть (дубликат не добавляется)."""
+        node = self._node(pattern, create=True)
+        if item in node.items:
+            return False
+        node.items.append(item)
+        self._cache.clear()
+        return True
+
+    def remove(self, pattern: str, item) -> bool:
+        node = self._node(pattern)
+        if not node or item not in node.items:
+            return False
+        node.items.remove(item)
+        self._cache.clear()
+        return True
+
+    # ----------------------------------------------------
+    # Разрешение топика
+    # ----------------------------------------------------
+
+    def resolve(self, topic: str):
+        cached = self._cache.get(topic)
+        if cached is not None:
+            return cached
+
+        found = []
+        self._collect(self.root, topic.split(SEP), 0, found)
+
+        # Подписка, совпавшая по нескольким веткам ("#" и "*"), получает событие один раз
+        result = tuple(dict.fromkeys(found))
+        if len(self._cache) >= CACHE_LIMIT:
+            self._cache.clear()
+        self._cache[topic] = result
+        return result
+
+    def _collect(self, node, parts, i, found):
+        if i == len(parts):
+            found.extend(node.items)
+        else:
+            exact = node.children.get(parts[i])
+            if exact:
+                self._collect(exact, parts, i + 1, found)
+            one = node.children.get(ONE)
+            if one:
+                self._collect(one, parts, i + 1, found)
+
+        many = node.children.get(MANY)
+        if many:
+            # "#" в конце шаблона съедает любой остаток, включая пустой
+            found.extend(many.items)
+            # "a.#.b": после "#" продолжаем сопоставление с любой позиции
+            for j in range(i, len(parts)):
+                for key, child in many.children.items():
+                    if key == parts[j] or key == ONE:
+                        self._collect(child, parts, j + 1, found)
+
+    def count(self):
+        return self._count(self.root)
+
+    def _count(self, node):
+        return len(node.items) + sum(self._count(c) for c in node.children.values())
+
+    def cache_size(self):
+        return len(self._cache)
@@ -0,0 +1,173 @@
+# core/ra_ws_hub.py
+"""
+Рассылка событий шины WebSocket-клиентам (/ws/events).
+
+Событие кодируется в JSON один раз и раскладывается по буферам клиентов;
+у каждого клиента свой писатель, поэтому emit не ждёт сети.
+Клиент, чей буфер переполнился или чья отправка зависла, отключается.
+
+Клиент может ограничить поток топиками (шаблоны core.ra_topic_router):
+    ws://.../ws/events?topics=heart.#,memory_updated
+или сообщением {"topics": ["heart.#"]} после подключения.
+С ?since=<offset> клиент сначала получает пропущенное из журнала шины.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+
+from core.ra_topic_router import TopicRouter, MANY
+
+WS_BUFFER = int(os.getenv("RA_WS_BUFFER", "256"))
+WS_SEND_TIMEOUT = float(os.getenv("RA_WS_SEND_TIMEOUT", "5"))
+
+
+def encode_payload(payload) -> str:
+    return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class WsClient:
+    def __init__(self, ws, hub, topics=None, maxsize=WS_BUFFER, backlog=()):
+        self.ws = ws
+        self.hub = hub
+        self.topics = list(topics or [MANY])
+        self.maxsize = maxsize
+        self.buffer = deque(backlog)
+        self._has_items = asyncio.Event()
+        if self.buffer:
+            self._has_items.set()
+        self._writer = asyncio.get_running_loop().create_task(self._run(), name="ws:writer")
+        self.sent = 0
+        self.closed = False
+
+    def offer(self, text) -> bool:
+        """False — буфер переполнен, клиента пора отключать."""
+        if len(self.buffer) >= self.maxsize:
+            return False
+        self.buffer.append(text)
+        self._has_items.set()
+        return True
+
+    async def _run(self):
+        try:
+            while True:
+                if not self.buffer:
+                    self._has_items.clear()
+                    await self._has_items.wait()
+                    continue
+                text = self.buffer.popleft()
+                await asyncio.wait_for(self.ws.send_text(text), timeout=self.hub.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.info(f"[WsHub] Клиент отключён при отправке: {e}")
+            self.hub.evict(self, reason="send_error")
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if not self._writer.done():
+            self._writer.cancel()
+        try:
+            await self.ws.close()
+        except Exception:
+            pass
+
+
+class RaWsHub:
+    def __init__(self, maxsize=WS_BUFFER, send_timeout=WS_SEND_TIMEOUT):
+        self.maxsize = maxsize
+        self.send_timeout = send_timeout
+        self.clients = {}
+        self.router = TopicRouter()
+        self.broadcasts = 0
+        self.evicted = 0
+
+    # ----------------------------------------------------
+    # Клиенты
+    # ----------------------------------------------------
+
+    def attach(self, ws, topics=None, backlog=()):
+        """backlog — события для досылки (из журнала) до живого потока."""
+        client = WsClient(ws, self, topics=topics, maxsize=self.maxsize,
+                          backlog=[encode_payload(p) for p in backlog])
+        self.clients[ws] = client
+        for pattern in client.topics:
+            self.router.add(pattern, client)
+        return client
+
+    def set_topics(self, ws, topics):
+        client = self.clients.get(ws)
+        if not client:
+            return
+        for pattern in client.topics:
+            self.router.remove(pattern, client)
+        client.topics = list(topics or [MANY])
+        for pattern in client.topics:
+            self.router.add(pattern, client)
+
+    def detach(self, ws):
+        client = self.clients.pop(ws, None)
+        if not client:
+            return None
+        for pattern in client.topics:
+            self.router.remove(pattern, client)
+        return asyncio.get_running_loop().create_task(client.close())
+
+    def evict(self, client, reason="overflow"):
+        if self.clients.get(client.ws) is not client:
+            return
+        self.evicted += 1
+        logging.warning(f"[WsHub] Клиент отключён ({reason}), в буфере {len(client.buffer)}")
+        self.detach(client.ws)
+
+    # ----------------------------------------------------
+    # Рассылка
+    # ----------------------------------------------------
+
+    def broadcast(self, payload, topic=None):
+        """Не ждёт отправки: кодирует событие один раз и кладёт в буферы клиентов."""
+        if not self.clients:
+            return 0
+        targets = self.router.resolve(topic or payload.get("type", ""))
+        if not targets:
+            return 0
+
+        text = encode_payload(payload)
+        self.broadcasts += 1
+
+        delivered = 0
+        for client in targets:
+            if client.offer(text):
+                delivered += 1
+            else:
+                self.evict(client)
+        return delivered
+
+    async def close(self):
+        for ws in list(self.clients):
+            task = self.detach(ws)
+            if task:
+                await task
+
+    def stop(self):
+        """Синхронная остановка писателей (из RaEventBus.stop)."""
+        for client in self.clients.values():
+            client.closed = True
+            if not client._writer.done():
+                client._writer.cancel()
+        self.clients.clear()
+        self.router = TopicRouter()
+
+    def get_metrics(self):
+        return {
+            "clients": len(self.clients),
+            "broadcasts": self.broadcasts,
+            "evicted": self.evicted,
+            "buffered": sum(len(c.buffer) for c in self.clients.values()),
+            "max_buffered": max((len(c.buffer) for c in self.clients.values()), default=0)
+        }
@@ -6,6 +6,8 @@ import json
 from typing import Callable, Dict, List, Any
 from threading import Lock
 
+from core.ra_topic_router import TopicRouter
+
 # ============================================================
 # 🔔 RaEvent — универсальное событие нервной системы
 # ============================================================
@@ -33,29 +35,31 @@ class RaEvent:
 # ============================================================
 
 class EventBus:
+    """
+    Синхронная шина поверх дерева топиков (core.ra_topic_router).
+    Категория "*" — по-прежнему подписка на все события.
+    """
+
     def __init__(self):
         self.subscribers: Dict[str, List[Callable[[RaEvent], None]]] = {}
+        self.router = TopicRouter()
 
     def subscribe(self, category: str, callback: Callable[[RaEvent], None]):
-        if category not in self.subscribers:
-            self.subscribers[category] = []
-        self.subscribers[category].append(callback)
+        if not self.router.add(category, callback):
+            return
+        self.subscribers.setdefault(category, []).append(callback)
+
+    def unsubscribe(self, category: str, callback: Callable[[RaEvent], None]):
+        if self.router.remove(category, callback):
+            self.subscribers[category].remove(callback)
 
     def emit(self, event: RaEvent):
-        # отправка по конкретной категории
-        for cb in self.subscribers.get(event.category, []):
+        for cb in self.router.resolve(event.category):
             try:
                 cb(event)
             except Exception as e:
                 print(f"[EventBus] Ошибка обработчика {cb}: {e}")
 
-        # отправка подписчикам на "*"
-        for cb in self.subscribers.get("*", []):
-            try:
-                cb(event)
-            except Exception as e:
-                print(f"[EventBus] Ошибка обработчика *: {e}")
-
 
 # ============================================================
 # 🧠 RustlefMasterLogger v2 — сердце нервной системы Ра
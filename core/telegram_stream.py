@@ -0,0 +1,47 @@
+# core/telegram_stream.py
+import logging
+import time
+
+PLACEHOLDER = "🌞 …"
+EDIT_INTERVAL = 1.2      # Telegram не любит правки чаще ~1 раза в секунду
+MIN_NEW_CHARS = 20       # не дёргаем правку ради пары символов
+MAX_MESSAGE_LEN = 4096
+
+
+async def stream_to_message(message, chunks, edit_interval=EDIT_INTERVAL, min_new_chars=MIN_NEW_CHARS):
+    """
+    Отправляет заглушку и постепенно правит её по мере прихода кусочков ответа.
+    message — входящее aiogram-сообщение (нужен .answer), chunks — async-итератор строк.
+    Возвращает итоговый текст и время до первого кусочка.
+    """
+    started = time.perf_counter()
+    sent = await message.answer(PLACEHOLDER)
+
+    text = ""
+    shown = ""
+    first_chunk_at = None
+    last_edit = 0.0
+
+    async def edit(new_text):
+        nonlocal shown, last_edit
+        new_text = new_text[:MAX_MESSAGE_LEN]
+        if not new_text.strip() or new_text == shown:
+            return
+        try:
+            await sent.edit_text(new_text)
+            shown = new_text
+        except Exception as e:
+            # "message is not modified" и флуд-лимиты не должны рвать поток
+            logging.warning(f"[TelegramStream] Правка не удалась: {e}")
+        last_edit = time.perf_counter()
+
+    async for chunk in chunks:
+        if first_chunk_at is None:
+            first_chunk_at = time.perf_counter() - started
+        text += chunk
+        now = time.perf_counter()
+        if now - last_edit >= edit_interval and len(text) - len(shown) >= min_new_chars:
+            await edit(text + " …")
+
+    await edit(text.strip() or "🤍 Я здесь.")
+    return text.strip(), first_chunk_at
@@ -1,49 +1,99 @@
 # modules/forex_brain.py
+import os
 import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import json
 
+from core.ra_bar_store import open_store
+from core.ra_indicators import ATR, EMA, MACD, RSI, SMA, Bollinger, IndicatorSet, Stochastic
+
+FOREX_API = os.getenv("RA_FOREX_API", "https://www.freeforexapi.com/api/live")
+# Тиковый файл вместо живого API (записанный или synthetic_ticks) — для проверок и офлайна
+TICK_FILE = os.getenv("RA_FOREX_TICKS")
+
 class ForexBrain:
-    def __init__(self, master, pairs=None, timeframe='H1'):
+    def __init__(self, master, pairs=None, timeframe='H1', bar_store=None, tick_file=TICK_FILE):
         self.pairs = pairs or ['EURUSD', 'GBPUSD']
         self.timeframe = timeframe
         self.data = {}
+        # Котировки копятся тиками в общем хранилище баров: M1 → M5/M15/H1/H4, история переживает перезапуск
+        self.bars = bar_store or open_store()
+        self.tick_file = tick_file
+        self.api_url = FOREX_API
+        # Потоковые индикаторы по парам: analyze_pair досылает только новые бары
+        self.indicators = {}
         self.master = master
-        self.logger = master.logger
-        self.logger.attach_module("ra_forex")
+        # RaForexManager создаёт мозги без мастера — тогда без общего логгера
+        self.logger = getattr(master, "logger", None)
+        if self.logger:
+            self.logger.attach_module("ra_forex")
         
     def fetch_history(self, pair, limit=500):
-        url = f"https://www.freeforexapi.com/api/live?pairs={pair}"
-        try:
-            resp = requests.get(url, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
+        """
+        Последние limit закрытых баров пары на self.timeframe.
+        Живой курс (или тиковый файл) сначала уходит тиком в хранилище баров.
+        """
+        if self.tick_file:
+            self.bars.replay(self.tick_file)
+        else:
+            self.fetch_tick(pair)
+        return self.history(pair, limit)
+
+    def history(self, pair, limit=500):
+        """Закрытые бары из хранилища, без обращения к сети."""
+        self.bars.close_until()
+        df = self.bars.frame(pair, self.timeframe, limit)
+        self.data[pair] = df
+        self.bars.save_if_dirty()
+        return df
 
-            df = pd.DataFrame(columns=['pair', 'time', 'open', 'high', 'low', 'close', 'volume'])
+    def tick_url(self, pair):
+        return f"{self.api_url}?pairs={pair}"
 
-            if data.get('rates') and data['rates'].get(pair):
-                pair_data = data['rates'][pair]
-                df = pd.DataFrame({
-                    'pair': [pair],
-                    'close': [pair_data['rate']],
-                    'time': [pd.to_datetime(pair_data['timestamp'], unit='s')]
-                })
-                df['open'] = df['close']
-                df['high'] = df['close']
-                df['low'] = df['close']
-                df['volume'] = 0.0
+    def accept_tick(self, pair, data):
+        if data.get('rates') and data['rates'].get(pair):
+            pair_data = data['rates'][pair]
+            return self.bars.on_tick(pair, pair_data['timestamp'], pair_data['rate'])
+        return False
 
-            self.data[pair] = df
-            return df
+    def fetch_tick(self, pair):
+        try:
+            resp = requests.get(self.tick_url(pair), timeout=10)
+            resp.raise_for_status()
+            return self.accept_tick(pair, resp.json())
+        except Exception as e:
+            print(f"[ForexBrain] Ошибка загрузки {pair}: {e}")
+        return False
 
+    async def afetch_tick(self, pair, session):
+        """То же через общий aiohttp-сеанс (RaForexRunner)."""
+        try:
+            async with session.get(self.tick_url(pair)) as resp:
+                resp.raise_for_status()
+                return self.accept_tick(pair, await resp.json(content_type=None))
         except Exception as e:
             print(f"[ForexBrain] Ошибка загрузки {pair}: {e}")
-            return pd.DataFrame(columns=['pair', 'time', 'open', 'high', 'low', 'close', 'volume'])
+        return False
 
-        
     # ------------------- ИНДИКАТОРЫ -------------------
+    # compute_* — полный пересчёт на pandas; analyze_pair считает то же самое потоково
+    # (core.ra_indicators), эти функции остаются эталоном для scripts/verify_indicators.py
+    def indicator_set(self, pair):
+        ind = self.indicators.get(pair)
+        if ind is None:
+            ind = self.indicators[pair] = IndicatorSet(
+                rsi=RSI(14, smoothing="sma"),
+                macd=MACD(),
+                atr=ATR(14, smoothing="sma"),
+                sma20=SMA(20),
+                ema20=EMA(20),
+                boll=Bollinger(20),
+                stoch=Stochastic(14, 3)
+            )
+        return ind
+
     def compute_sma(self, df, period=14):
         return df['close'].rolling(period).mean()
 
@@ -145,19 +195,19 @@ class ForexBrain:
         if df is None or df.empty: return None
         if len(df) < 2: return None
         
-        rsi = self.compute_rsi(df).iloc[-1]
-        macd, signal = self.compute_macd(df)
-        macd_last = macd.iloc[-1]
-        signal_last = signal.iloc[-1]
-        atr = self.compute_atr(df).iloc[-1]
-        sma20 = self.compute_sma(df, 20).iloc[-1]
-        ema20 = self.compute_ema(df, 20).iloc[-1]
-        boll_upper, boll_lower = self.compute_bollinger(df)
-        boll_upper = boll_upper.iloc[-1]
-        boll_lower = boll_lower.iloc[-1]
-        stoch_k, stoch_d = self.compute_stochastic(df)
-        stoch_k = stoch_k.iloc[-1]
-        stoch_d = stoch_d.iloc[-1]
+        values = self.indicator_set(pair).sync(df)
+        nan = float('nan')
+        # RSI сравнивается с порогами: None (окно ещё не набрано) → NaN, как было у pandas
+        rsi = nan if values['rsi'] is None else values['rsi']
+        macd_last = values['macd']
+        signal_last = values['macd_signal']
+        atr = values['atr']
+        sma20 = values['sma20']
+        ema20 = values['ema20']
+        boll_upper = values['boll_upper']
+        boll_lower = values['boll_lower']
+        stoch_k = values['stoch_k']
+        stoch_d = values['stoch_d']
         patterns = self.detect_candlestick_patterns(df)
         figures = self.detect_figures(df)
 
@@ -8,8 +8,8 @@ import asyncio
 import logging
 import random
 from typing import List, Dict, Any
-from modules.pamyat import chronicles
-from world_chronicles import WorldChronicles
+from core.ra_reactor_inbox import ReactorInbox
+from modules.world_chronicles import WorldChronicles
 from modules.ra_creator import RaCreator
 from core.ra_memory import memory
 
@@ -30,26 +30,44 @@ class HeartReactor:
             self.event_bus.subscribe("harmony_updated", self.on_harmony_update)
             
     async def start(self):
-        """Главный цикл обработки событий настоящего и будущего"""
-        while self.is_active:
+        """Главный цикл: спит до первого события и обрабатывает их микро-пакетами"""
+        self.inbox = ReactorInbox(self.event_queue, self.future_events_queue)
+        try:
+            while self.is_active:
+                try:
+                    events, future_batches = await self.inbox.next_batch()
+                    await self._process_batch(events, future_batches)
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logging.error(f"[HeartReactor] Ошибка: {e}")
+        finally:
+            self.inbox.close()
+
+    async def _process_batch(self, events: List[str], future_batches: List[List[Dict[str, Any]]]):
+        impulses = []
+
+        # Обрабатываем события настоящего
+        for event in events:
             try:
-                # Обрабатываем события настоящего
-                if not self.event_queue.empty():
-                    event = await self.event_queue.get()
-                    response = await self._react(event)
-                    logging.info(f"[HeartReactor] {response}")
-                    await self.notify_listeners(event)
-
-                # Анализируем события будущего
-                if not self.future_events_queue.empty():
-                    future_batch = await self.future_events_queue.get()
-                    await self._analyze_future(future_batch)
-
-            except asyncio.CancelledError:
-                break
+                response = await self._react(event)
+                logging.info(f"[HeartReactor] {response}")
+                await self._notify(event)
+                impulses.append(event)
             except Exception as e:
                 logging.error(f"[HeartReactor] Ошибка: {e}")
-            await asyncio.sleep(0.05)
+
+        # Анализируем события будущего
+        for future_batch in future_batches:
+            try:
+                best_event = await self._analyze_future(future_batch, persist=False)
+                if best_event:
+                    impulses.append(best_event)
+            except Exception as e:
+                logging.error(f"[HeartReactor] Ошибка: {e}")
+
+        # Одна запись в память и хронику на весь пакет
+        await self._persist(impulses)
 
     async def _react(self, event: str) -> str:
         """Эмоциональная реакция на событие настоящего"""
@@ -80,13 +98,14 @@ class HeartReactor:
         """Добавляем события будущего для анализа"""
         self.future_events_queue.put_nowait(events)
 
-    async def _analyze_future(self, events: List[Dict[str, Any]]):
+    async def _analyze_future(self, events: List[Dict[str, Any]], persist: bool = True):
         """
         Анализируем возможные события будущего.
         Каждое событие — словарь: {'description': str, 'impact': int, 'type': str}
+        Возвращает выбранное событие.
         """
         if not events:
-            return
+            return None
 
         best_event = None
         best_score = float("-inf")
@@ -108,7 +127,9 @@ class HeartReactor:
                 if self.event_bus:
                     await self.event_bus.emit("idea_generated", {"idea": idea})
             # ----------------------------
-            await self.notify_listeners(best_event)
+            await self._notify(best_event)
+            if persist:
+                await self._persist([best_event])
         # ADDED: Будущее событие → RaResonance + RaCreator
         if self.event_bus:
             await self.event_bus.emit(
@@ -120,7 +141,8 @@ class HeartReactor:
             logging.info(f"[HeartReactor] Будущее событие отправлено к RaCreator: {idea}")
             if self.event_bus:
                 await self.event_bus.emit("idea_generated", {"idea": idea})
-        
+        return best_event
+
     def _evaluate_event(self, event: Dict[str, Any]) -> float:
         """
         Вычисление гармоничного резонанса события.
@@ -143,7 +165,11 @@ class HeartReactor:
         self.listeners.append(listener_coro)
 
     async def notify_listeners(self, event: Any):
-        """Оповещаем всех слушателей"""
+        """Оповещаем всех слушателей и сохраняем импульс"""
+        await self._notify(event)
+        await self._persist([event])
+
+    async def _notify(self, event: Any):
         if self.event_bus:
             await self.event_bus.emit("heart_impulse", {"pulse": str(event)})
             await self.event_bus.emit(
@@ -165,21 +191,32 @@ class HeartReactor:
                 await listener(event)
             except Exception as e:
                 logging.warning(f"[HeartReactor] Ошибка в listener: {e}")
-                
+
+    async def _persist(self, impulses: List[Any]):
+        if not impulses:
+            return
+        if len(impulses) == 1:
+            message = f"Сердечный импульс: {impulses[0]}"
+            content = str(impulses[0])
+        else:
+            content = "\n".join(str(i) for i in impulses)
+            message = f"Сердечные импульсы ({len(impulses)}):\n{content}"
+
         await memory.append(
             user_id="heart",
-            message=f"Сердечный импульс: {event}",
+            message=message,
             layer="short_term",
             source="HeartReactor"
         )
 
         chronicles.add_entry(
-            title="Импульс сердца",
-            content=str(event),
+            title="Импульс сердца" if len(impulses) == 1 else f"Импульсы сердца ×{len(impulses)}",
+            content=content,
             category="heart",
             author="HeartReactor",
             entity="ra",
-            resonance=0.6
+            resonance=0.6,
+            meta={"impulses": len(impulses)}
         )
             
     async def on_harmony_update(self, data: dict):
@@ -199,6 +236,8 @@ class HeartReactor:
     def stop(self):
         """Останавливаем HeartReactor"""
         self.is_active = False
+        if getattr(self, "inbox", None):
+            self.inbox.close()
 
     def status(self) -> str:
         return f"{self.name} активен, слушателей: {len(self.listeners)}"
@@ -1,11 +1,21 @@
 # modules/logs.py
+import atexit
+import queue
 import sqlite3
-from datetime import datetime
 import threading
+import time
+from datetime import datetime
+
+DB_PATH = "logs.db"
+FLUSH_INTERVAL = 0.5      # секунд между пакетными записями
+BATCH_SIZE = 500          # строк в одной транзакции максимум
+QUEUE_SIZE = 10000        # сверх этого новые строки отбрасываются со счётчиком
 
 lock = threading.Lock()
 
-conn = sqlite3.connect('logs.db', check_same_thread=False)
+conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+conn.execute("PRAGMA journal_mode=WAL")
+conn.execute("PRAGMA synchronous=NORMAL")
 c = conn.cursor()
 
 c.execute('''
@@ -18,6 +28,85 @@ CREATE TABLE IF NOT EXISTS logs (
 conn.commit()
 
 
+class LogSink:
+    """
+    Неблокирующая запись логов в SQLite.
+    Вызовы log() только кладут запись в очередь; отдельный поток
+    пишет пачками через executemany одной транзакцией раз в FLUSH_INTERVAL.
+    """
+
+    def __init__(self, connection, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE, maxsize=QUEUE_SIZE):
+        self.conn = connection
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ra-log-sink", daemon=True)
+        self._thread.start()
+
+    def put(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Back-pressure: писатель не успевает — теряем строку, но не тормозим вызывающего
+            self.dropped += 1
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            with lock:
+                with self.conn:
+                    self.conn.executemany("INSERT INTO logs VALUES (?, ?, ?)", batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            print(f"[LogSink] Ошибка записи логов: {e}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def _run(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Даём набежать пачке, чтобы одна транзакция покрыла много строк
+            if self.queue.qsize() < self.batch_size and not self._stop.is_set():
+                time.sleep(self.flush_interval)
+            self._write(self._drain(first))
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped
+        }
+
+
+sink = LogSink(conn)
+atexit.register(sink.close)
+
+
 class Logger:
     def __init__(self):
         self.modules = {}
@@ -27,10 +116,8 @@ class Logger:
     # Методы логирования
     # ------------------------
     def log(self, message: str, level="INFO"):
-        with lock:
-            now = datetime.now().isoformat()
-            c.execute("INSERT INTO logs VALUES (?, ?, ?)", (now, level, message))
-            conn.commit()
+        now = datetime.now().isoformat()
+        sink.put((now, level, message))
         print(f"[{level}] {now} | {message}")
 
     def info(self, message: str):
@@ -51,6 +138,15 @@ class Logger:
     def on(self, event_name, callback):
         self.events[event_name] = callback
 
+    # ------------------------
+    # Очередь записи
+    # ------------------------
+    def flush(self):
+        sink.flush()
+
+    def stats(self):
+        return sink.stats()
+
 
 # ------------------------
 # Готовый к использованию instance
@@ -1,12 +1,15 @@
 # modules/ra_file_consciousness.py
 
-import os
 import difflib
 import shutil
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
 
+from core.ra_file_index import open_index
+
+WATCHED_EXT = (".py", ".md", ".json", ".txt")
+
 
 class RaFileConsciousness:
     """
@@ -14,7 +17,7 @@ class RaFileConsciousness:
     Совместимо со старой логикой + расширено для self-upgrade.
     """
 
-    def __init__(self, project_root: str = "."):
+    def __init__(self, project_root: str = ".", file_index=None):
         self.project_root = Path(project_root).resolve()
         self.backup_root = self.project_root / "backups"
         self.backup_root.mkdir(exist_ok=True)
@@ -25,33 +28,45 @@ class RaFileConsciousness:
         # карта осознанных файлов
         self.files = {}
 
+        # общий индекс файлов: дерево обходит он, сюда приходят только изменения
+        self.index = file_index or open_index(self.project_root)
+        self._synced = False
+        self.index.subscribe(self._on_files_changed)
+
         logging.info(f"[RaFileConsciousness] Инициализация. Корень: {self.project_root}")
 
     # -------------------------------
     # СКАНИРОВАНИЕ ФАЙЛОВ (ТВОЁ + УСИЛЕНО)
     # -------------------------------
     def scan(self):
-        self.files.clear()
-
-        for root, _, files in os.walk(self.root):
-            if any(x in root for x in [".git", "__pycache__", "venv", "backups"]):
-                continue
-
-            for f in files:
-                if f.endswith((".py", ".md", ".json", ".txt")):
-                    path = Path(root) / f
-                    try:
-                        self.files[str(path.relative_to(self.project_root))] = {
-                            "type": f.split(".")[-1],
-                            "size": path.stat().st_size,
-                            "mtime": path.stat().st_mtime,
-                        }
-                    except Exception:
-                        continue
+        self.index.sync()
+        if not self._synced:
+            self.files.clear()
+            for rel in self.index.paths(WATCHED_EXT):
+                self._remember(rel)
+            self._synced = True
 
         logging.info(f"[RaFileConsciousness] Осознано файлов: {len(self.files)}")
         return self.files
 
+    def _remember(self, rel: str):
+        st = self.index.stat(rel)
+        if st:
+            self.files[rel] = {
+                "type": rel.split(".")[-1],
+                "size": st["size"],
+                "mtime": st["mtime"],
+            }
+
+    def _on_files_changed(self, diff: dict):
+        if not self._synced:
+            return
+        for rel in diff["new"] + diff["changed"]:
+            if rel.endswith(WATCHED_EXT):
+                self._remember(rel)
+        for rel in diff["removed"]:
+            self.files.pop(rel, None)
+
     # -------------------------------
     # ПРОСТОЕ ПРИМЕНЕНИЕ ИДЕИ (СОВМЕСТИМО)
     # -------------------------------
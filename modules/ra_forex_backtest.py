@@ -0,0 +1,330 @@
+# modules/ra_forex_backtest.py
+"""
+Бэктест правил RaForexManager (modules.ra_forex_rules) на истории, без сети.
+
+Данные — {(пара, ТФ): {"time", "open", "high", "low", "close"}} из CSV/Parquet
+(load_dir: файлы <ПАРА>_<ТФ>.csv|.parquet) или из хранилища баров (from_store).
+
+Для каждой пары/ТФ всё векторно:
+    • индикаторы — warmup из core.ra_indicators (те же значения, что видит живой анализ);
+    • очки и сигналы — по барам целиком, без цикла;
+    • выход по SL/TP — матрица (сигналы × max_hold баров вперёд),
+      первый бар касания через argmax; касание обоих уровней на одном баре — SL.
+
+Вход — по close сигнального бара (от этой цены compute_sl_tp считает уровни),
+одна позиция на пару/ТФ: следующий сигнал берётся не раньше бара выхода.
+Результат — сделки (DataFrame), кривые капитала в R по каждой паре/ТФ и сводка.
+
+sweep() перебирает сетку параметров в пуле процессов: данные передаются
+каждому процессу один раз, индикаторы кэшируются по периодам.
+"""
+
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.ra_indicators import ATR, EMA, MACD, RSI
+from modules.ra_forex_rules import BUY_SCORE, RSI_HIGH, RSI_LOW, SELL_SCORE, SL_ATR, TP_ATR
+
+log = logging.getLogger("RaForexBacktest")
+
+DEFAULT_PARAMS = {
+    "rsi_period": 14,
+    "ema_fast": 50,
+    "ema_slow": 200,
+    "atr_period": 14,
+    "rsi_low": RSI_LOW,
+    "rsi_high": RSI_HIGH,
+    "buy_score": BUY_SCORE,
+    "sell_score": SELL_SCORE,
+    "sl_atr": SL_ATR,
+    "tp_atr": TP_ATR,
+    "max_hold": 500,      # баров до принудительного выхода по close
+    "cost": 0.0,          # издержки на сделку в единицах цены (спред + комиссия)
+}
+INDICATOR_PARAMS = ("rsi_period", "ema_fast", "ema_slow", "atr_period")
+# Сколько ячеек (сигналы × горизонт) проверять за раз — ограничение памяти
+CHUNK_CELLS = int(os.getenv("RA_BACKTEST_CHUNK", str(2_000_000)))
+REASONS = np.array(["sl", "tp", "time", "end"])
+SL, TP, TIME, END = range(4)
+
+
+# =============================
+# Данные
+# =============================
+
+def _columns(df):
+    time = df["time"]
+    if not pd.api.types.is_numeric_dtype(time):
+        # строки/даты → секунды эпохи, как time в core.ra_bar_store
+        time = (pd.to_datetime(time) - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+    out = {"time": time.to_numpy(dtype=float)}
+    for col in ("open", "high", "low", "close"):
+        out[col] = df[col].to_numpy(dtype=float)
+    return out
+
+
+def load_bars(path) -> dict:
+    """Один файл баров: CSV или Parquet с колонками time, open, high, low, close."""
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    return _columns(df.sort_values("time"))
+
+
+def load_dir(path, pairs=None, timeframes=None) -> dict:
+    """Каталог фикстур <ПАРА>_<ТФ>.csv|.parquet → {(пара, ТФ): колонки}."""
+    data = {}
+    for name in sorted(os.listdir(path)):
+        stem, ext = os.path.splitext(name)
+        if ext not in (".csv", ".parquet") or "_" not in stem:
+            continue
+        pair, tf = stem.rsplit("_", 1)
+        if (pairs and pair not in pairs) or (timeframes and tf not in timeframes):
+            continue
+        data[(pair, tf)] = load_bars(os.path.join(path, name))
+    return data
+
+
+def from_store(store, pairs, timeframes) -> dict:
+    """Закрытые бары из core.ra_bar_store."""
+    return {(pair, tf): store.arrays(pair, tf) for pair in pairs for tf in timeframes}
+
+
+# =============================
+# Индикаторы и сигналы
+# =============================
+
+def indicators(bars, params) -> dict:
+    h, l, c = bars["high"], bars["low"], bars["close"]
+    return {
+        "rsi": RSI(params["rsi_period"]).warmup(h, l, c),
+        # macd — гистограмма, как macd_diff у прежнего ta
+        "macd": MACD(min_periods=True).warmup(h, l, c)["hist"],
+        "ema50": EMA(params["ema_fast"], min_periods=params["ema_fast"]).warmup(h, l, c),
+        "ema200": EMA(params["ema_slow"], min_periods=params["ema_slow"]).warmup(h, l, c),
+        "atr": ATR(params["atr_period"]).warmup(h, l, c),
+    }
+
+
+def signals(ind, params) -> np.ndarray:
+    """+1 BUY, −1 SELL, 0 — по барам; векторная копия score_signal/decide/sl_tp."""
+    rsi, macd, fast, slow, atr = ind["rsi"], ind["macd"], ind["ema50"], ind["ema200"], ind["atr"]
+    with np.errstate(invalid="ignore"):
+        # `ema50 and ema200 and ema50 > ema200`: не готово или ноль → тренд вниз
+        trend = np.where((fast > slow) & (fast != 0) & (slow != 0), 1, -1)
+        score = trend + (rsi < params["rsi_low"]) - (rsi > params["rsi_high"])
+        score += np.where(np.isnan(macd), 0, np.where(macd > 0, 1, -1))
+        sig = np.where(score >= params["buy_score"], 1, np.where(score <= params["sell_score"], -1, 0))
+        # sl_tp не даёт уровней без ATR
+        sig[np.isnan(atr) | (atr == 0)] = 0
+    # analyze_pair_tf ждёт хотя бы двух баров
+    sig[:1] = 0
+    return sig.astype(np.int8)
+
+
+# =============================
+# Симуляция SL/TP
+# =============================
+
+def _exits(bars, idx, side, sl, tp, max_hold):
+    """Бар и причина выхода для каждого кандидата — блоками матриц (кандидаты × горизонт)."""
+    n = len(bars["close"])
+    high, low = bars["high"], bars["low"]
+    exit_idx = np.empty(len(idx), dtype=np.int64)
+    reason = np.empty(len(idx), dtype=np.int8)
+    steps = np.arange(1, max_hold + 1)
+    rows = max(1, CHUNK_CELLS // max_hold)
+
+    for start in range(0, len(idx), rows):
+        i = idx[start:start + rows, None]
+        s = side[start:start + rows, None]
+        j = i + steps
+        valid = j < n
+        j = np.minimum(j, n - 1)
+        hi, lo = high[j], low[j]
+        stop, take = sl[start:start + rows, None], tp[start:start + rows, None]
+        sl_hit = np.where(s > 0, lo <= stop, hi >= stop) & valid
+        tp_hit = np.where(s > 0, hi >= take, lo <= take) & valid
+        hit = sl_hit | tp_hit
+        first = hit.argmax(axis=1)
+        any_hit = hit[np.arange(len(first)), first]
+        rows_idx = np.arange(len(first))
+
+        last = np.minimum(i[:, 0] + max_hold, n - 1)
+        exit_idx[start:start + rows] = np.where(any_hit, i[:, 0] + 1 + first, last)
+        reason[start:start + rows] = np.where(
+            any_hit,
+            np.where(sl_hit[rows_idx, first], SL, TP),
+            np.where(i[:, 0] + max_hold <= n - 1, TIME, END)
+        )
+    return exit_idx, reason
+
+
+def _chain(idx, exit_idx):
+    """Одна позиция за раз: следующая сделка — первый кандидат не раньше выхода предыдущей."""
+    taken = []
+    k = 0
+    while k < len(idx):
+        taken.append(k)
+        k = np.searchsorted(idx, exit_idx[k], side="left")
+        if k <= taken[-1]:
+            k = taken[-1] + 1
+    return np.array(taken, dtype=np.int64)
+
+
+def simulate(bars, sig, atr, params, overlap=False) -> dict:
+    """Сделки по сигналам: колонки-массивы (индексы баров, сторона, цены, причина, pnl, R)."""
+    idx = np.flatnonzero(sig)
+    empty = {k: np.empty(0) for k in ("entry_idx", "exit_idx", "side", "entry", "exit", "sl", "tp", "pnl", "r")}
+    empty["reason"] = np.empty(0, dtype=np.int8)
+    if not len(idx):
+        return empty
+
+    side = sig[idx].astype(np.int64)
+    entry = bars["close"][idx]
+    # Как compute_sl_tp: уровни от цены закрытия, округление до 5 знаков
+    sl = np.round(entry - side * atr[idx] * params["sl_atr"], 5)
+    tp = np.round(entry + side * atr[idx] * params["tp_atr"], 5)
+
+    exit_idx, reason = _exits(bars, idx, side, sl, tp, params["max_hold"])
+    if not overlap:
+        keep = _chain(idx, exit_idx)
+        idx, side, entry, sl, tp = idx[keep], side[keep], entry[keep], sl[keep], tp[keep]
+        exit_idx, reason = exit_idx[keep], reason[keep]
+
+    # Цена выхода: стоп с гэпом — по открытию, тейк — по уровню, по времени — close
+    open_ = bars["open"][exit_idx]
+    stop_fill = np.where(side > 0, np.minimum(open_, sl), np.maximum(open_, sl))
+    exit_price = np.where(reason == SL, stop_fill,
+                          np.where(reason == TP, tp, bars["close"][exit_idx]))
+    pnl = side * (exit_price - entry) - params["cost"]
+    risk = np.abs(entry - sl)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(risk > 0, pnl / risk, 0.0)
+    return {"entry_idx": idx, "exit_idx": exit_idx, "side": side, "entry": entry, "exit": exit_price,
+            "sl": sl, "tp": tp, "reason": reason, "pnl": pnl, "r": r}
+
+
+def equity_curve(n, trades) -> np.ndarray:
+    """Накопленный результат в R по барам (сделка учитывается на баре выхода)."""
+    eq = np.zeros(n)
+    np.add.at(eq, trades["exit_idx"].astype(np.int64), trades["r"])
+    return np.cumsum(eq)
+
+
+def summary(r, equity=None) -> dict:
+    wins, losses = r[r > 0], r[r < 0]
+    res = {
+        "trades": int(len(r)),
+        "win_rate": float(len(wins) / len(r)) if len(r) else 0.0,
+        "total_r": float(r.sum()),
+        "avg_r": float(r.mean()) if len(r) else 0.0,
+        "profit_factor": float(wins.sum() / -losses.sum()) if len(losses) else float("inf") if len(wins) else 0.0,
+    }
+    if equity is not None and len(equity):
+        res["max_drawdown_r"] = float((np.maximum.accumulate(np.concatenate(([0.0], equity))) -
+                                       np.concatenate(([0.0], equity))).max())
+    return res
+
+
+# =============================
+# Прогон
+# =============================
+
+def run_key(bars, params, ind=None, overlap=False):
+    ind = ind if ind is not None else indicators(bars, params)
+    sig = signals(ind, params)
+    trades = simulate(bars, sig, ind["atr"], params, overlap=overlap)
+    return trades, equity_curve(len(bars["close"]), trades)
+
+
+def run(data, params=None, overlap=False) -> dict:
+    """
+    data — {(пара, ТФ): колонки}. Возвращает:
+        trades — DataFrame всех сделок; equity — {(пара, ТФ): Series в R по времени};
+        by_key — сводка по каждой паре/ТФ; stats — общая сводка.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    frames, equity, by_key = [], {}, {}
+    for (pair, tf), bars in data.items():
+        trades, eq = run_key(bars, params, overlap=overlap)
+        time = pd.to_datetime(bars["time"], unit="s")
+        equity[(pair, tf)] = pd.Series(eq, index=time, name=f"{pair}_{tf}")
+        by_key[(pair, tf)] = summary(trades["r"], eq)
+        frames.append(pd.DataFrame({
+            "pair": pair,
+            "tf": tf,
+            "entry_time": time[trades["entry_idx"].astype(np.int64)],
+            "exit_time": time[trades["exit_idx"].astype(np.int64)],
+            "side": np.where(trades["side"] > 0, "BUY", "SELL"),
+            "entry": trades["entry"],
+            "exit": trades["exit"],
+            "sl": trades["sl"],
+            "tp": trades["tp"],
+            "reason": REASONS[trades["reason"]],
+            "pnl": trades["pnl"],
+            "r": trades["r"],
+        }))
+    trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    stats = summary(trades["r"].to_numpy() if len(trades) else np.empty(0))
+    return {"trades": trades, "equity": equity, "by_key": by_key, "stats": stats, "params": params}
+
+
+def portfolio_equity(equity: dict) -> pd.Series:
+    """Сумма кривых всех пар/ТФ на общей шкале времени (между барами — последнее значение)."""
+    if not equity:
+        return pd.Series(dtype=float)
+    return pd.concat(equity.values(), axis=1).sort_index().ffill().fillna(0.0).sum(axis=1)
+
+
+# =============================
+# Перебор параметров
+# =============================
+
+_worker_data = None
+_worker_cache = {}
+
+
+def _init_worker(data):
+    global _worker_data, _worker_cache
+    _worker_data = data
+    _worker_cache = {}
+
+
+def _evaluate(params):
+    # Индикаторы зависят только от периодов — при переборе порогов считаются один раз
+    r_all, by_key = [], {}
+    periods = tuple(params[k] for k in INDICATOR_PARAMS)
+    for key, bars in _worker_data.items():
+        ind = _worker_cache.get((key, periods))
+        if ind is None:
+            ind = _worker_cache[(key, periods)] = indicators(bars, params)
+        trades, eq = run_key(bars, params, ind=ind)
+        by_key[key] = summary(trades["r"], eq)
+        r_all.append(trades["r"])
+    stats = summary(np.concatenate(r_all) if r_all else np.empty(0))
+    return params, stats, by_key
+
+
+def grid(**values) -> list:
+    """grid(sl_atr=[1, 1.5], tp_atr=[2, 3]) → список наборов параметров поверх DEFAULT_PARAMS."""
+    keys = list(values)
+    return [{**DEFAULT_PARAMS, **dict(zip(keys, combo))} for combo in itertools.product(*values.values())]
+
+
+def sweep(data, param_sets, workers=None, key="total_r") -> list:
+    """
+    Все наборы параметров по всем парам/ТФ; workers=1 — в текущем процессе.
+    Возвращает [(параметры, сводка, сводка по парам)] по убыванию key.
+    """
+    param_sets = [{**DEFAULT_PARAMS, **p} for p in param_sets]
+    if workers == 1:
+        _init_worker(data)
+        results = [_evaluate(p) for p in param_sets]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+            results = list(pool.map(_evaluate, param_sets))
+    return sorted(results, key=lambda item: item[1][key], reverse=True)
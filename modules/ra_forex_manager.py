@@ -1,11 +1,14 @@
 # modules/ra_forex_manager.py
+import asyncio
 import time
 import json
 import logging
 from datetime import datetime
 
+from core.ra_bar_cache import RaBarCache
 from modules.forex_brain import ForexBrain
 from modules.ra_market_consciousness import RaMarketConsciousness
+from modules.ra_forex_rules import decide, score_signal, sl_tp
 
 # ================= TELEGRAM SENDER =================
 class TelegramSender:
@@ -25,29 +28,41 @@ class TelegramSender:
 
 # ================= RA FOREX MANAGER =================
 class RaForexManager:
-    def __init__(self, pairs=None, timeframes=None, telegram_sender=None, log_file='forex_signals.json', event_bus=None):
+    def __init__(self, pairs=None, timeframes=None, telegram_sender=None, log_file='forex_signals.json', event_bus=None, bar_cache=None, loop=None):
         self.pairs = pairs or ['EURUSD', 'GBPUSD']
         self.timeframes = timeframes or ['M15', 'H1']
         self.telegram = telegram_sender
         self.log_file = log_file
         self.event_bus = event_bus
+        # Цикл событий шины — для emit из потока run_loop
+        self.loop = loop
+        # Мера последнего запущенного цикла — для разрешений, пришедших через шину
+        self.mera = None
         if self.event_bus:
             self.event_bus.subscribe("trade_permission", self.on_trade_permission)
 
         self.brain_modules = {}
         self.ra_modules = {}
+        # Бары по (пара, ТФ) грузятся один раз на TTL, сколько бы мест их ни читало
+        self.bars = bar_cache or RaBarCache()
+        # Разбор последних баров: тот же DataFrame → тот же результат, без повторного анализа
+        self._analysis = {}
 
         for pair in self.pairs:
             self.brain_modules[pair] = {}
             self.ra_modules[pair] = {}
             for tf in self.timeframes:
-                brain = ForexBrain(pairs=[pair], timeframe=tf)
-                ra = RaMarketConsciousness(pair, tf, telegram_sender)
+                brain = ForexBrain(None, pairs=[pair], timeframe=tf)
+                ra = RaMarketConsciousness(pair, tf, self.event_bus, telegram_sender)
                 self.brain_modules[pair][tf] = brain
                 self.ra_modules[pair][tf] = ra
 
         logging.info(f"[RaForexManager] Инициализирован: {self.pairs} | {self.timeframes}")
 
+    # ================= БАРЫ =================
+    def get_bars(self, pair, tf):
+        return self.bars.get(pair, tf, self.brain_modules[pair][tf].fetch_history)
+
     # ================= ENTRY =================
     def compute_entry(self, df, signal):
         if df is None or len(df) < 2 or not signal:
@@ -66,33 +81,31 @@ class RaForexManager:
 
     # ================= SL / TP =================
     def compute_sl_tp(self, price, atr, signal):
-        if not atr or not signal or not price:
-            return None, None
-        if signal == "BUY":
-            return round(price - atr * 1.5, 5), round(price + atr * 3, 5)
-        elif signal == "SELL":
-            return round(price + atr * 1.5, 5), round(price - atr * 3, 5)
-        return None, None
+        return sl_tp(price, atr, signal)
 
     # ================= АНАЛИЗ ПАРЫ ПО ТФ =================
     def analyze_pair_tf(self, pair, tf):
-        brain = self.brain_modules[pair][tf]
-        df = brain.fetch_history(pair)
+        df = self.get_bars(pair, tf)
         if df is None or df.empty or len(df) < 2:
             return None
 
+        cached = self._analysis.get((pair, tf))
+        if cached is not None and cached[0] is df:
+            return dict(cached[1])
+
         ra = self.ra_modules[pair][tf]
+        # Только индикаторы: свой сигнал менеджер шлёт сам, analyze_dataframe
+        # продублировал бы его в Telegram через _send_signal
         ra.load_market_data(df)
-        ra.analyze()
 
-        # Проверка на пустые колонки
+        # Последние значения индикаторов — из потокового состояния, без колонок в df
         try:
-            rsi = ra.df['rsi'].iloc[-1] if 'rsi' in ra.df.columns and not ra.df.empty else None
-            macd = ra.df['macd'].iloc[-1] if 'macd' in ra.df.columns and not ra.df.empty else None
-            atr = ra.df['atr'].iloc[-1] if 'atr' in ra.df.columns and not ra.df.empty else None
-            ema50 = ra.df['ema50'].iloc[-1] if 'ema50' in ra.df.columns and not ra.df.empty else None
-            ema200 = ra.df['ema200'].iloc[-1] if 'ema200' in ra.df.columns and not ra.df.empty else None
-            price = ra.df['close'].iloc[-1] if 'close' in ra.df.columns and not ra.df.empty else None
+            rsi = ra.indicators.get('rsi')
+            macd = ra.indicators.get('macd')
+            atr = ra.indicators.get('atr')
+            ema50 = ra.indicators.get('ema50')
+            ema200 = ra.indicators.get('ema200')
+            price = float(df['close'].iloc[-1]) if 'close' in df.columns and not df.empty else None
         except Exception as e:
             logging.warning(f"[RaForexManager] Ошибка анализа {pair} {tf}: {e}")
             return None
@@ -100,24 +113,13 @@ class RaForexManager:
         if price is None:
             return None
 
-        trend = 1 if ema50 and ema200 and ema50 > ema200 else -1
-        score = 0
-        reasons = []
-
-        if rsi is not None:
-            if rsi < 30: score += 1; reasons.append("RSI перепродан")
-            if rsi > 70: score -= 1; reasons.append("RSI перекуплен")
-        if macd is not None:
-            score += 1 if macd > 0 else -1
-            reasons.append("MACD бычий" if macd > 0 else "MACD медвежий")
-        score += trend
-        reasons.append("Тренд вверх" if trend > 0 else "Тренд вниз")
-
-        signal = "BUY" if score >= 3 else "SELL" if score <= -2 else None
+        # Правила общие с бэктестером — modules.ra_forex_rules
+        score, reasons = score_signal(rsi, macd, ema50, ema200)
+        signal = decide(score)
         sl, tp = self.compute_sl_tp(price, atr, signal)
         entry = self.compute_entry(df, signal)
 
-        return {
+        result = {
             "pair": pair,
             "tf": tf,
             "signal": signal,
@@ -128,6 +130,8 @@ class RaForexManager:
             "reasons": reasons,
             "timestamp": datetime.utcnow().isoformat() + 'Z'
         }
+        self._analysis[(pair, tf)] = (df, dict(result))
+        return result
 
     # ================= КРОСС-ТФ =================
     def cross_tf_signal(self, pair):
@@ -177,6 +181,9 @@ class RaForexManager:
         }
         """
         symbol = payload.get("symbol")
+        if not symbol:
+            # Свой же сигнал Risk-Manager'у (pair/tf вместо symbol) — теперь он реально доходит до шины
+            return
         allowed = payload.get("trade_allowed", False)
         confidence = payload.get("confidence_score", 0)
 
@@ -184,7 +191,7 @@ class RaForexManager:
         if allowed and confidence >= 0.6:
             logging.info(f"[RaForexManager] Разрешение на сделку: {symbol} | confidence={confidence}")
             # Здесь можно инициировать открытие сделки
-            self.execute_trade(symbol, payload)
+            self.execute_trade(symbol, payload, self.mera)
         else:
             logging.info(f"[RaForexManager] Сделка не разрешена: {symbol} | confidence={confidence}")
 
@@ -223,7 +230,7 @@ class RaForexManager:
             conf_harmony = min(1.0, max(0.0, harmony / 100))
             # Кросс-TF согласование
             conf_cross = 0.3 if all(
-                self.analyze_pair_tf(symbol, tf).get("signal") == signal_data["signal"]
+                (self.analyze_pair_tf(symbol, tf) or {}).get("signal") == signal_data["signal"]
                 for tf in self.timeframes
             ) else 0.0
             # Тренд/RSI/MACD корректировка
@@ -263,80 +270,103 @@ class RaForexManager:
         logging.info(f"[RaForexManager] Сигнал сохранён: {signal['pair']}")
 
     # ================= ЦИКЛ =================
+    def process_pair(self, pair, mera_instance):
+        """
+        Один проход по паре: сигналы всех ТФ, консенсус, проверка Мерой, Telegram.
+        Возвращает сигнал для Risk-Manager (или None); событие отправляет вызывающий.
+        """
+        tf_signals = {}
+        # 🔹 Анализ всех таймфреймов один раз
+        for tf in self.timeframes:
+            df = self.get_bars(pair, tf)
+            if df is None or df.empty or len(df) < 2:
+                continue
+            tf_signals[tf] = self.analyze_pair_tf(pair, tf)
+
+        # 🔹 Логируем консенсус TF
+        tf_summary = ", ".join(f"{tf}:{(sig or {}).get('signal') or '-'}" for tf, sig in tf_signals.items())
+        logging.info(f"📝 {pair} | TF Signals: {tf_summary}")
+
+        # 🔹 Фильтруем реальные сигналы
+        valid_signals = [s for s in tf_signals.values() if s and s.get("signal")]
+        if not valid_signals:
+            return None
+
+        # 🔹 Определяем консенсусный сигнал
+        main_signal = valid_signals[0]["signal"] if all(s["signal"] == valid_signals[0]["signal"] for s in valid_signals) else None
+        if not main_signal:
+            logging.info(f"⚠️ Нет консенсусного сигнала для {pair}")
+            return None
+
+        # 🔹 Последние рыночные данные
+        last_bar = self.get_bars(pair, self.timeframes[0]).iloc[-1]
+        market_state = {
+            "symbol": pair,
+            "price": last_bar['close'],
+            "volatility": getattr(last_bar, 'volatility', 0.5),
+            "spread": getattr(last_bar, 'spread', 0.0001),
+            "timestamp": datetime.utcnow()
+        }
+
+        # 🔹 Получаем суперточный сигнал с Мерой
+        trade_signal = self.execute_trade(pair, market_state, mera_instance)
+        if not trade_signal:
+            return None
+
+        # 🔹 Динамическая корректировка confidence под волатильность и спред
+        vol = market_state.get("volatility", 0.5)
+        spread = market_state.get("spread", 0.0001)
+        vol_factor = 0.2 if vol > 1.0 else 0.0
+        spread_factor = -0.1 if spread > 0.0003 else 0.0
+        trade_signal['confidence_score'] = round(min(1.0, max(0.0, trade_signal['confidence_score'] + vol_factor + spread_factor)), 2)
+
+        # 🔹 Логируем детально с консенсусом
+        logging.info(
+            f"📊 {pair} | Signal={trade_signal.get('signal')} | "
+            f"H={trade_signal.get('harmony')} {trade_signal.get('harmony_direction')} | "
+            f"Phase={trade_signal.get('market_phase')} | "
+            f"Trade={'YES' if trade_signal.get('trade_allowed') else 'NO'} | "
+            f"Confidence={trade_signal.get('confidence_score')} | "
+            f"TF Summary: {tf_summary}"
+        )
+
+        # 🔹 Отправка в Telegram
+        if self.telegram and trade_signal.get("signal"):
+            self.send_signal(trade_signal)
+
+        return trade_signal
+
+    def _emit_from_thread(self, event_type, data):
+        # emit шины — корутина: из потока её можно только передать в цикл событий шины
+        res = self.event_bus.emit(event_type, data)
+        if not asyncio.iscoroutine(res):
+            return
+        if self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(res, self.loop)
+        else:
+            res.close()
+            logging.warning(f"[RaForexManager] {event_type} не отправлено: нет цикла событий (используй RaForexRunner)")
+
     def run_loop(self, mera_instance, interval_sec=900):
         """
         🔹 Финальный цикл анализа рынка с суперточным confidence_score,
         логом консенсуса TF и автоматической отправкой сигналов в Telegram + Risk-Manager.
+
+        Последовательный и блокирующий — для потока. В asyncio — modules.ra_forex_runner.RaForexRunner.
         """
         if not mera_instance:
             logging.warning("[RaForexManager] ❌ Mera instance не передан! Торговля невозможна.")
             return
+        self.mera = mera_instance
 
         while True:
             logging.info("🔄 Анализируем рынок...")
             for pair in self.pairs:
-                tf_signals = {}
-                # 🔹 Анализ всех таймфреймов один раз
-                for tf in self.timeframes:
-                    brain = self.brain_modules[pair][tf]
-                    df = brain.fetch_history(pair)
-                    if df is None or df.empty or len(df) < 2:
-                        continue
-                    tf_signals[tf] = self.analyze_pair_tf(pair, tf)
-
-                # 🔹 Логируем консенсус TF
-                tf_summary = ", ".join(f"{tf}:{sig.get('signal', '-')}" for tf, sig in tf_signals.items())
-                logging.info(f"📝 {pair} | TF Signals: {tf_summary}")
-
-                # 🔹 Фильтруем реальные сигналы
-                valid_signals = [s for s in tf_signals.values() if s and s.get("signal")]
-                if not valid_signals:
-                    continue
-
-                # 🔹 Определяем консенсусный сигнал
-                main_signal = valid_signals[0]["signal"] if all(s["signal"] == valid_signals[0]["signal"] for s in valid_signals) else None
-                if not main_signal:
-                    logging.info(f"⚠️ Нет консенсусного сигнала для {pair}")
-                    continue
-
-                # 🔹 Последние рыночные данные
-                last_bar = self.brain_modules[pair][self.timeframes[0]].fetch_history(pair).iloc[-1]
-                market_state = {
-                    "symbol": pair,
-                    "price": last_bar['close'],
-                    "volatility": getattr(last_bar, 'volatility', 0.5),
-                    "spread": getattr(last_bar, 'spread', 0.0001),
-                    "timestamp": datetime.utcnow()
-                }
-
-                # 🔹 Получаем суперточный сигнал с Мерой
-                trade_signal = self.execute_trade(pair, market_state, mera_instance)
-                if not trade_signal:
-                    continue
-
-                # 🔹 Динамическая корректировка confidence под волатильность и спред
-                vol = market_state.get("volatility", 0.5)
-                spread = market_state.get("spread", 0.0001)
-                vol_factor = 0.2 if vol > 1.0 else 0.0
-                spread_factor = -0.1 if spread > 0.0003 else 0.0
-                trade_signal['confidence_score'] = round(min(1.0, max(0.0, trade_signal['confidence_score'] + vol_factor + spread_factor)), 2)
-
-                # 🔹 Логируем детально с консенсусом
-                logging.info(
-                    f"📊 {pair} | Signal={trade_signal.get('signal')} | "
-                    f"H={trade_signal.get('harmony')} {trade_signal.get('harmony_direction')} | "
-                    f"Phase={trade_signal.get('market_phase')} | "
-                    f"Trade={'YES' if trade_signal.get('trade_allowed') else 'NO'} | "
-                    f"Confidence={trade_signal.get('confidence_score')} | "
-                    f"TF Summary: {tf_summary}"
-                )
-
-                # 🔹 Отправка в Telegram
-                if self.telegram and trade_signal.get("signal"):
-                    self.send_signal(trade_signal)
+                trade_signal = self.process_pair(pair, mera_instance)
 
                 # 🔹 Пуш в Risk-Manager через event_bus
-                if self.event_bus:
-                    self.event_bus.emit("trade_permission", trade_signal)
+                if trade_signal and self.event_bus:
+                    self._emit_from_thread("trade_permission", trade_signal)
 
+            self.bars.end_cycle()
             time.sleep(interval_sec)
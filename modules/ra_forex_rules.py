@@ -0,0 +1,50 @@
+# modules/ra_forex_rules.py
+"""
+Правила сигнала RaForexManager в одном месте: их использует и живой анализ
+(analyze_pair_tf, compute_sl_tp), и бэктестер (modules.ra_forex_backtest),
+чтобы история проверялась ровно тем, чем торгуем.
+
+    RSI < 30 → +1, RSI > 70 → −1
+    MACD (гистограмма) > 0 → +1, иначе −1
+    EMA50 > EMA200 → +1, иначе −1
+    сумма ≥ 3 → BUY, ≤ −2 → SELL
+    SL/TP — 1.5 и 3 ATR от цены
+"""
+
+RSI_LOW = 30
+RSI_HIGH = 70
+BUY_SCORE = 3
+SELL_SCORE = -2
+SL_ATR = 1.5
+TP_ATR = 3.0
+
+
+def score_signal(rsi, macd, ema50, ema200, rsi_low=RSI_LOW, rsi_high=RSI_HIGH):
+    """Возвращает (очки, основания) по последним значениям индикаторов; None — индикатор не готов."""
+    trend = 1 if ema50 and ema200 and ema50 > ema200 else -1
+    score = 0
+    reasons = []
+
+    if rsi is not None:
+        if rsi < rsi_low: score += 1; reasons.append("RSI перепродан")
+        if rsi > rsi_high: score -= 1; reasons.append("RSI перекуплен")
+    if macd is not None:
+        score += 1 if macd > 0 else -1
+        reasons.append("MACD бычий" if macd > 0 else "MACD медвежий")
+    score += trend
+    reasons.append("Тренд вверх" if trend > 0 else "Тренд вниз")
+    return score, reasons
+
+
+def decide(score, buy_score=BUY_SCORE, sell_score=SELL_SCORE):
+    return "BUY" if score >= buy_score else "SELL" if score <= sell_score else None
+
+
+def sl_tp(price, atr, signal, sl_atr=SL_ATR, tp_atr=TP_ATR):
+    if not atr or not signal or not price:
+        return None, None
+    if signal == "BUY":
+        return round(price - atr * sl_atr, 5), round(price + atr * tp_atr, 5)
+    elif signal == "SELL":
+        return round(price + atr * sl_atr, 5), round(price - atr * tp_atr, 5)
+    return None, None
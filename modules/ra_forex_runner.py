@@ -0,0 +1,179 @@
+# modules/ra_forex_runner.py
+"""
+Асинхронный цикл RaForexManager.
+
+Вместо потока с последовательными requests.get и time.sleep:
+    • котировки всех пар запрашиваются одновременно через общий aiohttp-пул
+      (core.ra_http_pool), с ограничением частоты на каждого провайдера;
+    • анализ (pandas/индикаторы, Мера, Telegram) идёт в пуле потоков
+      и не блокирует цикл событий;
+    • trade_permission отправляется в шину через await, а не теряется
+      неожиданной корутиной.
+
+Одного запроса на пару за цикл достаточно: котировка уходит тиком
+в общее хранилище баров (core.ra_bar_store), а бары каждого ТФ
+кладутся в кэш менеджера — анализ читает их без сети.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from core.ra_http_pool import http_pool
+
+log = logging.getLogger("RaForexRunner")
+
+PROVIDER_RATE = float(os.getenv("RA_FOREX_RATE", "10"))      # запросов в секунду на провайдера
+PROVIDER_BURST = int(os.getenv("RA_FOREX_BURST", "10"))
+ANALYSIS_WORKERS = int(os.getenv("RA_FOREX_WORKERS", "4"))
+
+
+class RateLimiter:
+    """Маркерное ведро: rate запросов в секунду, до burst подряд."""
+
+    def __init__(self, rate=PROVIDER_RATE, burst=PROVIDER_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Под замком — чтобы ожидающие выходили по очереди, а не все разом
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+
+class RaForexRunner:
+    def __init__(self, manager, mera_instance=None, pool=None, interval_sec=900,
+                 rate=PROVIDER_RATE, burst=PROVIDER_BURST, workers=ANALYSIS_WORKERS):
+        self.manager = manager
+        self.mera = mera_instance
+        self.pool = pool or http_pool
+        self.interval_sec = interval_sec
+        self.rate = rate
+        self.burst = burst
+        self.limiters = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ra_forex")
+        self.last_cycle = {}
+        self._stopped = False
+
+    def _limiter(self, url):
+        host = urlsplit(url).netloc
+        limiter = self.limiters.get(host)
+        if limiter is None:
+            limiter = self.limiters[host] = RateLimiter(self.rate, self.burst)
+        return limiter
+
+    # =============================
+    # Этапы цикла
+    # =============================
+
+    async def _fetch_pair(self, session, pair):
+        brain = self.manager.brain_modules[pair][self.manager.timeframes[0]]
+        if brain.tick_file:
+            return True     # офлайн: тики придут из файла в _prepare_pair
+        await self._limiter(brain.tick_url(pair)).acquire()
+        return await brain.afetch_tick(pair, session)
+
+    async def fetch_all(self) -> int:
+        session = await self.pool.get_session()
+        results = await asyncio.gather(
+            *(self._fetch_pair(session, pair) for pair in self.manager.pairs),
+            return_exceptions=True
+        )
+        for pair, res in zip(self.manager.pairs, results):
+            if isinstance(res, Exception):
+                log.warning(f"[ForexRunner] {pair}: {res}")
+        return sum(1 for res in results if res is True)
+
+    def _prepare_pair(self, pair):
+        # Свежие бары каждого ТФ — в кэш менеджера, чтобы анализ не ходил в сеть
+        for tf in self.manager.timeframes:
+            brain = self.manager.brain_modules[pair][tf]
+            df = brain.fetch_history(pair) if brain.tick_file else brain.history(pair)
+            self.manager.bars.put(pair, tf, df)
+
+    def _analyze_pair(self, pair):
+        self._prepare_pair(pair)
+        return self.manager.process_pair(pair, self.mera)
+
+    async def analyze_all(self) -> list:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, self._analyze_pair, pair) for pair in self.manager.pairs),
+            return_exceptions=True
+        )
+        signals = []
+        for pair, res in zip(self.manager.pairs, results):
+            if isinstance(res, Exception):
+                log.error(f"[ForexRunner] Ошибка анализа {pair}: {res}")
+            elif res:
+                signals.append(res)
+        return signals
+
+    async def run_cycle(self) -> dict:
+        started = time.perf_counter()
+        fetched = await self.fetch_all()
+        fetch_time = time.perf_counter() - started
+
+        signals = await self.analyze_all()
+        analysis_time = time.perf_counter() - started - fetch_time
+
+        bus = self.manager.event_bus
+        if bus:
+            for signal in signals:
+                # 🔹 Пуш в Risk-Manager через event_bus
+                await bus.emit("trade_permission", signal, source="ra_forex")
+
+        self.last_cycle = {
+            "pairs": len(self.manager.pairs),
+            "fetched": fetched,
+            "signals": len(signals),
+            "fetch_time": fetch_time,
+            "analysis_time": analysis_time,
+            "cycle_time": time.perf_counter() - started,
+            "rate_limited": sum(l.waited for l in self.limiters.values()),
+            "bars": self.manager.bars.end_cycle()
+        }
+        log.info(f"[ForexRunner] Цикл: {fetched}/{len(self.manager.pairs)} котировок, "
+                 f"сигналов {len(signals)}, {self.last_cycle['cycle_time']:.2f} с")
+        return self.last_cycle
+
+    # =============================
+    # Жизненный цикл
+    # =============================
+
+    async def run(self):
+        if not self.mera:
+            logging.warning("[RaForexManager] ❌ Mera instance не передан! Торговля невозможна.")
+            return
+        # emit из run_loop/обработчиков в потоках тоже попадёт в этот цикл
+        self.manager.loop = asyncio.get_running_loop()
+        self.manager.mera = self.mera
+        try:
+            while not self._stopped:
+                logging.info("🔄 Анализируем рынок...")
+                try:
+                    await self.run_cycle()
+                except Exception as e:
+                    log.error(f"[ForexRunner] Цикл упал: {e}")
+                await asyncio.sleep(self.interval_sec)
+        finally:
+            self.executor.shutdown(wait=False)
+
+    def stop(self):
+        self._stopped = True
@@ -1,19 +1,61 @@
 # modules/ra_intent_engine.py
 
+import asyncio
+import json
 import logging
+import os
 from datetime import datetime
 
 from modules.ra_inner_sun import RaInnerSun
 from modules.pamyat import chronicles
+from modules.ra_priority_queue import RaPriorityQueue
+
+INTENT_QUEUE_MAX = int(os.getenv("RA_INTENT_QUEUE_MAX", "1000"))
+# +1 к приоритету за каждые 10 минут ожидания
+INTENT_AGING = float(os.getenv("RA_INTENT_AGING", str(1 / 600)))
+
+# Повторяющиеся намерения этих типов сливаются по указанным полям
+COALESCE_FIELDS = {
+    "world_harmony": ("type",),
+    "light_flow": ("type", "source"),
+    "system_event": ("type", "event"),
+    "trend_response": ("type", "target"),
+}
+VOLATILE_FIELDS = {"time", "timestamp", "priority", "resonance", "approved", "sun_influenced", "sun_level"}
+
+
+class _Proposed:
+    """
+    Результат propose(): намерение уже в очереди, а await (по желанию)
+    дожидается записи в память и хроники и возвращает намерение.
+    """
+
+    def __init__(self, intent, task=None):
+        self.intent = intent
+        self.task = task
+
+    def __await__(self):
+        if self.task is not None:
+            yield from self.task.__await__()
+        return self.intent
+
 
 class RaIntentEngine:
     """
     Двигатель намерений Ра.
     Принимает идеи, взвешивает, усиливает Светом и готовит к воплощению.
+
+    Очередь — RaPriorityQueue: O(log n) вставка и выдача, старение приоритета,
+    слияние одинаковых намерений и ограничение размера с вытеснением слабых.
     """
 
-    def __init__(self, guardian=None, memory=None):
-        self.queue = []
+    def __init__(self, guardian=None, memory=None, maxsize=INTENT_QUEUE_MAX, aging=INTENT_AGING):
+        self.queue = RaPriorityQueue(
+            maxsize=maxsize,
+            aging=aging,
+            key=self._intent_key,
+            priority=lambda intent: intent.get("priority", 1)
+        )
         self.guardian = guardian
         self.memory = memory
         self.inner_sun = RaInnerSun()
@@ -23,14 +65,19 @@ class RaIntentEngine:
     # ---------------------------------------------------------
     # Добавление намерения
     # ---------------------------------------------------------
-    async def propose(self, intent: dict):
+    def propose(self, intent: dict):
         """
         intent = {
             "type": "write_file / visit_site / message_user",
             "target": "...",
             "reason": "...",
-            "priority": int (необязательно)
+            "priority": int (необязательно),
+            "key": "..." (необязательно — ключ слияния одинаковых намерений)
         }
+
+        Намерение попадает в очередь сразу, поэтому вызов без await тоже работает;
+        `await propose(...)` дополнительно дожидается памяти и хроник
+        и возвращает намерение (None — если Guardian отклонил).
         """
 
         intent = self._normalize_intent(intent)
@@ -47,10 +94,24 @@ class RaIntentEngine:
             try:
                 if not self.guardian.approve_intent(intent):
                     logging.warning(f"🛡 Guardian отклонил intent: {intent}")
-                    return None
+                    return _Proposed(None)
             except Exception as e:
                 logging.error(f"[RaIntentEngine] Guardian error: {e}")
 
+        # ➕ В очередь (слияние с таким же намерением или вытеснение слабого)
+        if not self.queue.push(intent):
+            logging.info(f"🎯 Очередь намерений полна, отброшено: {intent.get('type')}")
+        else:
+            logging.info(f"🎯 Добавлено намерение: {intent}")
+
+        # 🧠 Память и 📜 хроники — в фоне, если есть цикл событий
+        try:
+            task = asyncio.get_running_loop().create_task(self._record(intent))
+        except RuntimeError:
+            task = None
+        return _Proposed(intent, task)
+
+    async def _record(self, intent: dict):
         # 🧠 Запоминаем намерение
         if self.memory and hasattr(self.memory, "store_intent"):
             try:
@@ -68,34 +129,35 @@ class RaIntentEngine:
         except Exception as e:
             logging.warning(f"[RaIntentEngine] Хроники недоступны: {e}")
 
-        # ➕ В очередь
-        self.queue.append(intent)
-
-        # 🔥 Сортируем по силе
-        self.queue.sort(key=lambda x: x.get("priority", 1), reverse=True)
-
-        logging.info(f"🎯 Добавлено намерение: {intent}")
-        return intent
-
     # ---------------------------------------------------------
     # Забрать следующее намерение
     # ---------------------------------------------------------
     def pop_next(self):
-        if not self.queue:
-            return None
-        return self.queue.pop(0)
+        return self.queue.pop()
 
     def next_intent(self):
-        if not self.queue:
-            return None
-
-        # сортировка по приоритету
-        self.queue.sort(key=lambda x: x.get("priority", 1), reverse=True)
+        intent = self.queue.pop()
+        if intent is not None:
+            logging.info(f"🚀 Выдано намерение: {intent}")
+        return intent
 
-        intent = self.queue.pop(0)
-        logging.info(f"🚀 Выдано намерение: {intent}")
+    async def next(self, timeout=None):
+        """Ждёт следующее намерение (None — если за timeout ничего не пришло)."""
+        intent = await self.queue.next(timeout=timeout)
+        if intent is not None:
+            logging.info(f"🚀 Выдано намерение: {intent}")
         return intent
 
+    def _intent_key(self, intent: dict):
+        if intent.get("key") is not None:
+            return intent["key"]
+        fields = COALESCE_FIELDS.get(intent.get("type"))
+        if fields:
+            return tuple(str(intent.get(f)) for f in fields)
+        # Остальные сливаются, только если совпадают целиком (без времени и веса)
+        stable = {k: v for k, v in intent.items() if k not in VOLATILE_FIELDS}
+        return json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+
     # ---------------------------------------------------------
     # Нормализация intent
     # ---------------------------------------------------------
@@ -136,4 +198,7 @@ class RaIntentEngine:
     # Отладка
     # ---------------------------------------------------------
     def peek(self):
-        return list(self.queue)
+        return self.queue.items()
+
+    def stats(self):
+        return self.queue.stats()
@@ -1,24 +1,32 @@
 # modules/ra_market_consciousness.py
 import logging
 import pandas as pd
-import numpy as np
 from datetime import datetime
-from ta.momentum import RSIIndicator
-from ta.trend import MACD, EMAIndicator
-from ta.volatility import AverageTrueRange
-from core.telegram_sender import send_message
+from core.ra_indicators import ATR, EMA, MACD, RSI, IndicatorSet
 
 class RaMarketConsciousness:
     def __init__(self, symbol, timeframe, event_bus, telegram_sender=None):
         self.event_bus = event_bus
-        self.event_bus.subscribe("harmony_updated", self.on_market_harmony)
         self.symbol = symbol
         self.timeframe = timeframe
         self.telegram = telegram_sender
         self.last_signal_time = None
         self.last_snapshots = {}
+        self.df = None
+        # Состояние индикаторов живёт между вызовами: новый бар — O(1), без пересчёта истории.
+        # Настройки — как у прежних ta.RSIIndicator / MACD / EMAIndicator / AverageTrueRange
+        self.indicator_set = IndicatorSet(
+            rsi=RSI(14),
+            macd=MACD(min_periods=True),
+            ema50=EMA(50, min_periods=50),
+            ema200=EMA(200, min_periods=200),
+            atr=ATR(14)
+        )
+        self.indicators = {}
+        self.patterns = {}
         
-        event_bus.subscribe("harmony_updated", self.on_market_harmony)
+        if event_bus:
+            event_bus.subscribe("harmony_updated", self.on_market_harmony)
         
     def perceive(self, snapshot):
         if not snapshot:
@@ -38,9 +46,7 @@ class RaMarketConsciousness:
         range_size = high - low
         if range_size == 0:
             return None
-        if signal:
-            send_message(f"📈 {pair}: {signal}")
-            
+
         position = (price - low) / range_size
 
         if position > 0.8:
@@ -63,46 +69,58 @@ class RaMarketConsciousness:
         """
         df columns:
         time, open, high, low, close, volume
+
+        df не копируется и не дополняется колонками: индикаторы досчитываются
+        только по барам новее уже принятых, паттерны — по последним двум свечам.
         """
-        self.df = df.copy()
+        self.df = df
         self._calculate_indicators()
         self._detect_patterns()
 
     # === ИНДИКАТОРЫ ===
     def _calculate_indicators(self):
-        self.df['rsi'] = RSIIndicator(self.df['close'], 14).rsi()
-        macd = MACD(self.df['close'])
-        self.df['macd'] = macd.macd_diff()
-        self.df['ema50'] = EMAIndicator(self.df['close'], 50).ema_indicator()
-        self.df['ema200'] = EMAIndicator(self.df['close'], 200).ema_indicator()
-        atr = AverageTrueRange(self.df['high'], self.df['low'], self.df['close'])
-        self.df['atr'] = atr.average_true_range()
+        values = self.indicator_set.sync(self.df)
+        # macd — гистограмма (macd_diff в ta), как и раньше
+        self.indicators = {
+            "rsi": values.get("rsi"),
+            "macd": values.get("macd_hist"),
+            "ema50": values.get("ema50"),
+            "ema200": values.get("ema200"),
+            "atr": values.get("atr"),
+        }
 
     # === СВЕЧНЫЕ ПАТТЕРНЫ ===
     def _detect_patterns(self):
-        self.df['bullish_engulfing'] = (
-            (self.df['close'] > self.df['open']) &
-            (self.df['close'].shift(1) < self.df['open'].shift(1)) &
-            (self.df['close'] > self.df['open'].shift(1)) &
-            (self.df['open'] < self.df['close'].shift(1))
-        )
-
-        self.df['pin_bar'] = (
-            (abs(self.df['close'] - self.df['open']) <
-             (self.df['high'] - self.df['low']) * 0.3)
-        )
+        if self.df is None or self.df.empty:
+            self.patterns = {}
+            return
+        last = self.df.iloc[-1]
+        prev = self.df.iloc[-2] if len(self.df) > 1 else None
+
+        self.patterns = {
+            "bullish_engulfing": bool(
+                prev is not None and
+                last['close'] > last['open'] and
+                prev['close'] < prev['open'] and
+                last['close'] > prev['open'] and
+                last['open'] < prev['close']
+            ),
+            "pin_bar": bool(
+                abs(last['close'] - last['open']) < (last['high'] - last['low']) * 0.3
+            ),
+        }
 
     # === АНАЛИЗ ===
     def analyze_dataframe(self):
-        row = self.df.iloc[-1]
+        row = {**self.df.iloc[-1].to_dict(), **self.indicators, **self.patterns}
         score = 0
         reasons = []
 
-        if row['rsi'] < 30:
+        if row['rsi'] is not None and row['rsi'] < 30:
             score += 1
             reasons.append("RSI перепродан")
 
-        if row['macd'] > 0:
+        if row['macd'] is not None and row['macd'] > 0:
             score += 1
             reasons.append("MACD бычий")
 
@@ -110,7 +128,7 @@ class RaMarketConsciousness:
             score += 2
             reasons.append("Bullish Engulfing")
 
-        if row['close'] > row['ema50'] > row['ema200']:
+        if row['ema50'] is not None and row['ema200'] is not None and row['close'] > row['ema50'] > row['ema200']:
             score += 1
             reasons.append("Восходящий тренд EMA")
 
@@ -120,16 +138,12 @@ class RaMarketConsciousness:
     # === СИГНАЛ ===
     def _send_signal(self, direction, score, reasons, row):
         confidence = min(score * 20, 95)
-
-    def on_market_harmony(self, data):
-        harmony = data["гармония"]
-        self.risk_multiplier = max(0.3, min(1.5, (harmony + 100) / 100))
-    
+        message = f"""
 🔥 РаСвет | {self.symbol}
 📈 {direction}
 
 Цена: {row['close']:.5f}
-ATR: {row['atr']:.5f}
+ATR: {row['atr'] or 0:.5f}
 
 Основания:
 - """ + "\n- ".join(reasons) + f"""
@@ -142,3 +156,7 @@ ATR: {row['atr']:.5f}
             self.telegram.send(message)
 
         print(message)
+
+    def on_market_harmony(self, data):
+        harmony = data["гармония"]
+        self.risk_multiplier = max(0.3, min(1.5, (harmony + 100) / 100))
@@ -11,13 +11,15 @@ modules/ra_police.py
 
 import os
 import json
-import hashlib
 import logging
 import zipfile
 import time
 from datetime import datetime
 from typing import Dict
 
+from core.ra_file_index import hash_file, open_index
+from core.ra_integrity import MerkleTree, flat_diff, load_db, save_db
+
 # опционально: если в utils/core есть helper для пуша
 try:
     from github_commit import create_commit_push
@@ -27,13 +29,30 @@ except Exception:
 
 BACKUP_DIR = "backups"
 CHECKSUMS_FILE = "data/file_checksums.json"
+INTEGRITY_EXT = (".py", ".json", ".md")
+# Сверка по дереву Меркла: в каталоги с совпавшим хешем не заходим. 0 — полный проход
+MERKLE = os.getenv("RA_POLICE_MERKLE", "1") == "1"
 os.makedirs(BACKUP_DIR, exist_ok=True)
 os.makedirs(os.path.dirname(CHECKSUMS_FILE), exist_ok=True)
 
 
 class RaPolice:
-    def __init__(self, root_dir="."):
+    def __init__(self, root_dir=".", file_index=None, merkle=MERKLE):
+        # RaSelfMaster передаёт себя первым аргументом — тогда корень текущий
+        if not isinstance(root_dir, (str, os.PathLike)):
+            self.master = root_dir
+            root_dir = "."
         self.root = root_dir
+        self.index = file_index or open_index(root_dir)
+        self._own_file = os.path.relpath(os.path.abspath(CHECKSUMS_FILE), self.index.root)
+        self._prefix = os.path.join(root_dir, "")
+        self._verified = False
+        self._touched = False
+        self.merkle = merkle
+        self._tree = None       # сохранённое состояние (база на диске)
+        self._live = None       # текущее состояние, обновляется по изменениям индекса
+        self._pending = set()
+        self.index.subscribe(self._on_files_changed)
         self.checksums_path = CHECKSUMS_FILE
         self.last_remote_push = 0
         self.remote_push_interval = 60 * 15  # 15 минут минимум между пушами
@@ -65,67 +84,100 @@ class RaPolice:
 
     # --- utility: compute checksum for a file ---
     def _sha256(self, path: str) -> str:
-        h = hashlib.sha256()
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        return h.hexdigest()
+        return hash_file(path)
 
     # --- build a map of checksums for all important files ---
     def build_checksums(self, include_ext=None) -> Dict[str, str]:
-        include_ext = include_ext or [".py", ".json", ".md"]
-        res = {}
-        for root, _, files in os.walk(self.root):
-            if root.startswith(BACKUP_DIR) or "/.git" in root:
-                continue
-            for fn in files:
-                if any(fn.endswith(e) for e in include_ext):
-                    path = os.path.join(root, fn)
-                    try:
-                        res[path] = self._sha256(path)
-                    except Exception as e:
-                        logging.warning(f"[RaPolice] Не могу хешировать {path}: {e}")
-        return res
-
-    def save_checksums(self, data: Dict[str, str]):
+        return {os.path.join(self.root, rel): h for rel, h in self._current(include_ext).items()}
+
+    def _current(self, include_ext=None, sync=True) -> Dict[str, str]:
+        # Обход и хеши — из общего индекса: SHA-256 пересчитывается только для файлов
+        # с изменившимися (size, mtime_ns, inode), и то в пуле потоков
+        if sync:
+            self.index.sync()
+        hashes = self.index.hashes(tuple(include_ext or INTEGRITY_EXT))
+        hashes.pop(self._own_file, None)
+        return hashes
+
+    def _on_files_changed(self, diff: dict):
+        # Собственная запись checksums — не повод перепроверять
+        for paths in diff.values():
+            for rel in paths:
+                if rel != self._own_file and rel.endswith(INTEGRITY_EXT):
+                    self._pending.add(rel)
+                    self._touched = True
+
+    def _live_tree(self) -> MerkleTree:
+        """Текущее дерево: первый раз строится целиком, дальше — только изменённые пути."""
+        if self._live is None:
+            self._pending.clear()
+            self._live = MerkleTree(self._current(sync=False))
+            return self._live
+        for rel in self._pending:
+            try:
+                digest = self.index.hash(rel)
+            except OSError as e:
+                logging.warning(f"[RaPolice] Не могу хешировать {rel}: {e}")
+                digest = None
+            self._live.update(rel, digest)
+        self._pending.clear()
+        self._live.rehash()
+        return self._live
+
+    def _rel(self, path: str) -> str:
+        return path[len(self._prefix):] if path.startswith(self._prefix) else os.path.normpath(path)
+
+    def _save_tree(self, tree: MerkleTree):
         try:
-            with open(self.checksums_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            save_db(self.checksums_path, tree)
+            self._tree = tree
             logging.info("[RaPolice] Контрольные суммы сохранены.")
         except Exception as e:
             logging.error(f"[RaPolice] Ошибка сохранения checksums: {e}")
 
+    def _saved_tree(self):
+        if self._tree is None and os.path.exists(self.checksums_path):
+            try:
+                self._tree, _ = load_db(self.checksums_path)
+            except Exception as e:
+                logging.warning(f"[RaPolice] Не удалось прочитать checksums: {e}")
+        return self._tree
+
+    def save_checksums(self, data: Dict[str, str]):
+        self._save_tree(MerkleTree({self._rel(p): h for p, h in data.items()}))
+
     def load_checksums(self) -> Dict[str, str]:
-        if not os.path.exists(self.checksums_path):
-            return {}
-        try:
-            with open(self.checksums_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            logging.warning(f"[RaPolice] Не удалось прочитать checksums: {e}")
+        tree = self._saved_tree()
+        if tree is None:
             return {}
+        return {os.path.join(self.root, rel): h for rel, h in tree.paths()}
 
     # --- integrity check ---
     def check_integrity(self):
-        old = self.load_checksums()
-        current = self.build_checksums()
-        changed = []
-        new = []
-        removed = []
-        for p, h in current.items():
-            if p not in old:
-                new.append(p)
-            elif old.get(p) != h:
-                changed.append(p)
-        for p in old.keys():
-            if p not in current:
-                removed.append(p)
-        if changed or new or removed:
-            logging.warning(f"[RaPolice] Изменения: changed={len(changed)} new={len(new)} removed={len(removed)}")
-            self.save_checksums(current)
+        self.index.sync()
+        if self._verified and not self._touched:
+            # С прошлой проверки индекс не видел ни одного изменения
+            logging.info("[RaPolice] Целостность файлов подтверждена.")
+            return {"changed": [], "new": [], "removed": []}
+        self._touched = False
+
+        tree = self._live_tree()
+        old = self._saved_tree() or MerkleTree()
+        if not self.merkle:
+            diff = flat_diff(dict(tree.paths()), dict(old.paths()))
+        elif tree.root == old.root:
+            diff = {"changed": [], "new": [], "removed": []}
+        else:
+            diff = tree.diff(old)
+
+        if any(diff.values()):
+            logging.warning(f"[RaPolice] Изменения: changed={len(diff['changed'])} "
+                            f"new={len(diff['new'])} removed={len(diff['removed'])}")
+            self._save_tree(tree.copy())
         else:
             logging.info("[RaPolice] Целостность файлов подтверждена.")
-        return {"changed": changed, "new": new, "removed": removed}
+        self._verified = True
+        return {k: [os.path.join(self.root, rel) for rel in v] for k, v in diff.items()}
 
     # --- create local zip backup ---
     def create_backup(self, include_paths=None):
@@ -1,8 +1,23 @@
+import asyncio
 import heapq
+import itertools
+import time
+
 
 class RaPriorityQueue:
     """
     Очередь событий по важности
+
+    Куча с O(log n) вставкой и выдачей. Дополнительно:
+        aging   — приоритет ожидающего элемента растёт на aging единиц в секунду,
+                  поэтому слабые события не голодают вечно;
+        key     — элементы с одинаковым ключом сливаются в один (берётся
+                  больший приоритет, содержимое — последнее, время ожидания — первое);
+        maxsize — при переполнении вытесняется самый слабый элемент;
+        await next() — ждать следующий элемент без опроса.
+
+    Старый интерфейс push(event)/pop() с именованными приоритетами
+    ("critical", "high", "normal", "low") работает как раньше.
     """
 
     PRIORITY = {
@@ -12,14 +27,159 @@ class RaPriorityQueue:
         "low": 3
     }
 
-    def __init__(self):
-        self.queue = []
+    def __init__(self, maxsize=None, aging=0.0, key=None, priority=None):
+        self.maxsize = maxsize
+        self.aging = aging
+        self.key = key
+        self.priority = priority or self._named_priority
+
+        self.queue = []       # [(-ранг, seq), entry] — сильнейший сверху
+        self._weakest = []    # [(ранг, -seq), entry] — слабейший сверху
+        self._by_key = {}
+        self._live = 0
+        self._seq = itertools.count()
+        self._ready = None
+
+        self.coalesced = 0
+        self.evicted = 0
+
+    @classmethod
+    def _named_priority(cls, event):
+        # Чем больше число — тем важнее; "critical" сильнее "low"
+        return len(cls.PRIORITY) - 1 - cls.PRIORITY.get(event.get("priority", "normal"), 2)
+
+    def __len__(self):
+        return self._live
+
+    # =============================
+    # Вставка
+    # =============================
+
+    def _rank(self, priority, enqueued):
+        # p + aging * (now - t) упорядочивает так же, как p - aging * t: now сокращается
+        return priority - self.aging * enqueued
+
+    def push(self, event, priority=None):
+        """
+        Возвращает False, если очередь полна и событие слабее всех в ней.
+        """
+        p = self.priority(event) if priority is None else priority
+        now = time.monotonic()
+        k = self.key(event) if self.key else None
+
+        if k is not None and k in self._by_key:
+            old = self._by_key[k]
+            self._kill(old)
+            p = max(p, old[3])
+            now = old[4]
+            self.coalesced += 1
+        elif self.maxsize and self._live >= self.maxsize:
+            weakest = self._peek_weakest()
+            if weakest and self._rank(p, now) <= weakest[1]:
+                self.evicted += 1
+                return False
+            self._kill(weakest)
+            self.evicted += 1
 
-    def push(self, event: dict):
-        priority = self.PRIORITY.get(event.get("priority", "normal"), 2)
-        heapq.heappush(self.queue, (priority, event))
+        seq = next(self._seq)
+        rank = self._rank(p, now)
+        # [живой, ранг, seq, приоритет, время постановки, ключ, событие]
+        entry = [True, rank, seq, p, now, k, event]
+        heapq.heappush(self.queue, ((-rank, seq), entry))
+        if self.maxsize:
+            heapq.heappush(self._weakest, ((rank, -seq), entry))
+        if k is not None:
+            self._by_key[k] = entry
+        self._live += 1
+        if self._ready is not None:
+            self._ready.set()
+        return True
+
+    def _kill(self, entry):
+        if entry is None or not entry[0]:
+            return
+        entry[0] = False
+        self._live -= 1
+        if entry[5] is not None and self._by_key.get(entry[5]) is entry:
+            del self._by_key[entry[5]]
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        # Ленивое удаление: перестраиваем кучи, когда мёртвых стало больше живых
+        if len(self.queue) > 64 and len(self.queue) > 2 * self._live:
+            self.queue = [item for item in self.queue if item[1][0]]
+            heapq.heapify(self.queue)
+            if self.maxsize:
+                self._weakest = [item for item in self._weakest if item[1][0]]
+                heapq.heapify(self._weakest)
+
+    def _peek_weakest(self):
+        while self._weakest and not self._weakest[0][1][0]:
+            heapq.heappop(self._weakest)
+        return self._weakest[0][1] if self._weakest else None
+
+    # =============================
+    # Выдача
+    # =============================
+
+    def _peek_entry(self):
+        while self.queue and not self.queue[0][1][0]:
+            heapq.heappop(self.queue)
+        return self.queue[0][1] if self.queue else None
 
     def pop(self):
-        if not self.queue:
+        entry = self._peek_entry()
+        if entry is None:
             return None
-        return heapq.heappop(self.queue)[1]
+        heapq.heappop(self.queue)
+        self._kill(entry)
+        return entry[6]
+
+    def peek(self):
+        entry = self._peek_entry()
+        return entry[6] if entry else None
+
+    async def next(self, timeout=None):
+        """Ждёт следующий элемент; None — если за timeout ничего не пришло."""
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            event = self.pop()
+            if event is not None:
+                return event
+            self._ready.clear()
+            if deadline is None:
+                await self._ready.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    # =============================
+    # Служебное
+    # =============================
+
+    def items(self):
+        """Живые элементы от сильнейшего к слабейшему."""
+        live = sorted((item for item in self.queue if item[1][0]), key=lambda item: item[0])
+        return [item[1][6] for item in live]
+
+    def clear(self):
+        self.queue.clear()
+        self._weakest.clear()
+        self._by_key.clear()
+        self._live = 0
+
+    def stats(self):
+        return {
+            "size": self._live,
+            "maxsize": self.maxsize,
+            "coalesced": self.coalesced,
+            "evicted": self.evicted,
+            "heap": len(self.queue)
+        }
@@ -6,7 +6,6 @@
 """
 
 import os
-import ast
 import asyncio
 import logging
 from time import time
@@ -30,6 +29,8 @@ from modules.ra_war_peace_observer import RaWarPeaceObserver
 from modules.ra_inner_sun import RaInnerSun
 from modules.ra_intent_engine import RaIntentEngine
 from core.ra_memory import memory
+from core.ra_file_index import open_index
+from core.ra_ast_cache import RaAstCache
 
 
 class RaThinker:
@@ -95,6 +96,12 @@ class RaThinker:
 
         self.architecture = {}
         self.import_graph = defaultdict(set)
+        self._architecture_ready = False
+        self._heavy_modules = set()
+        self._isolated_modules = set()
+        self.ast_cache = RaAstCache()
+        self.file_index = getattr(file_consciousness, "index", None) or open_index(root_path)
+        self.file_index.subscribe(self._on_files_changed)
 
         # 🔗 Интеграция с RaKnowledge
         self.knowledge = getattr(master, "knowledge", None)
@@ -205,65 +212,84 @@ class RaThinker:
     # -------------------------------
     def scan_architecture(self):
         self.logger.info("🧠 [RaThinker] Сканирую архитектуру кода")
-        self.architecture.clear()
-        self.import_graph.clear()
-
-        for root, _, files in os.walk(self.root_path):
-            if any(x in root for x in (".git", "__pycache__", "backups")):
-                continue
-            if any(part.startswith(".") or part == "backups" for part in root.split(os.sep)):
-                continue
-            for file in files:
-                if not file.endswith(".py"):
-                    continue
-
-                full_path = os.path.join(root, file)
-                module_name = os.path.relpath(full_path, self.root_path).replace(os.sep, ".").replace(".py", "")
-                module_name = module_name.lstrip(".")
-                self.architecture[module_name] = {
-                    "path": full_path,
-                    "imports": set(),
-                    "classes": [],
-                    "functions": []
-                }
-                self._analyze_file(full_path, module_name)
+        # Изменённые файлы переразбираются подпиской на индекс; полный разбор — только в первый раз,
+        # и то из кэша по хешу содержимого
+        self.file_index.sync()
+        if not self._architecture_ready:
+            self.architecture.clear()
+            self.import_graph.clear()
+            self._heavy_modules.clear()
+            self._isolated_modules.clear()
+            live = self._analyze_paths(self.file_index.paths(".py"))
+            self.ast_cache.save_if_dirty(force=True, keep=live)
+            self._architecture_ready = True
 
         return self.architecture
 
-    def _analyze_file(self, path: str, module_name: str):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                tree = ast.parse(f.read())
-        except Exception as e:
-            self.logger.warning(f"[RaThinker] Не смог разобрать {path}: {e}")
-            return
+    def _module_name(self, rel: str) -> str:
+        return rel.replace(os.sep, ".").replace(".py", "").lstrip(".")
+
+    def _analyze_paths(self, rels):
+        files = {}
+        for rel in rels:
+            try:
+                digest = self.file_index.hash(rel)
+            except OSError:
+                digest = None
+            files[rel] = (os.path.join(self.root_path, rel), digest)
+
+        for rel, info in self.ast_cache.analyze(files).items():
+            self._set_module(rel, info)
+        return {digest for _, digest in files.values() if digest}
+
+    def _set_module(self, rel: str, info: dict):
+        module_name = self._module_name(rel)
+        imports = set(info["imports"])
+        self.architecture[module_name] = {
+            "path": os.path.join(self.root_path, rel),
+            "imports": imports,
+            "classes": list(info["classes"]),
+            "functions": list(info["functions"])
+        }
+        if imports:
+            self.import_graph[module_name] = set(imports)
+        else:
+            self.import_graph.pop(module_name, None)
+
+        # Итоги для architecture_summary поддерживаются на месте — без прохода по всем модулям
+        if len(imports) > 10:
+            self._heavy_modules.add(module_name)
+        else:
+            self._heavy_modules.discard(module_name)
+        if imports:
+            self._isolated_modules.discard(module_name)
+        else:
+            self._isolated_modules.add(module_name)
+
+    def _drop_module(self, rel: str):
+        module_name = self._module_name(rel)
+        self.architecture.pop(module_name, None)
+        self.import_graph.pop(module_name, None)
+        self._heavy_modules.discard(module_name)
+        self._isolated_modules.discard(module_name)
 
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    self.architecture[module_name]["imports"].add(alias.name)
-                    self.import_graph[module_name].add(alias.name)
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    self.architecture[module_name]["imports"].add(node.module)
-                    self.import_graph[module_name].add(node.module)
-            elif isinstance(node, ast.ClassDef):
-                self.architecture[module_name]["classes"].append(node.name)
-            elif isinstance(node, ast.FunctionDef):
-                self.architecture[module_name]["functions"].append(node.name)
+    def _on_files_changed(self, diff: dict):
+        if not self._architecture_ready:
+            return
+        changed = [rel for rel in diff["new"] + diff["changed"] if rel.endswith(".py")]
+        if changed:
+            self._analyze_paths(changed)
+            self.ast_cache.save_if_dirty()
+        for rel in diff["removed"]:
+            if rel.endswith(".py"):
+                self._drop_module(rel)
 
     def architecture_summary(self):
-        summary = {
+        return {
             "modules": len(self.architecture),
-            "heavy_modules": [],
-            "isolated_modules": [],
+            "heavy_modules": sorted(self._heavy_modules),
+            "isolated_modules": sorted(self._isolated_modules),
         }
-        for module, data in self.architecture.items():
-            if len(data["imports"]) > 10:
-                summary["heavy_modules"].append(module)
-            if not data["imports"]:
-                summary["isolated_modules"].append(module)
-        return summary
 
     def propose_self_improvements(self):
         ideas = []
@@ -1,36 +1,29 @@
 # modules/world_chronicles.py
 # Живая Книга Памяти Вселенной — Хроники Мира, Ра и Пути РаСвета
 import uuid
-import json
 import os
 from datetime import datetime
 from typing import List, Dict, Optional
 from modules.ra_intent_engine import RaIntentEngine
+from core.ra_chronicle_store import open_store
+
+# Назначается снаружи (см. авто-тест внизу)
+intent_engine = None
+
 
 class WorldChronicles:
     def __init__(self, file_path: str = "data/world_chronicles.json"):
+        # Записи живут в append-only журнале с индексами рядом со старым JSON
         self.file_path = file_path
-        self.entries: List[Dict] = []
-        self._ensure_storage()
-        self._load()
+        self.store = open_store(os.path.splitext(file_path)[0] + ".jsonl")
+        if os.path.exists(self.file_path) and not self.store.count():
+            self.store.import_json(self.file_path)
 
     # ---------- ХРАНИЛИЩЕ ----------
 
-    def _ensure_storage(self):
-        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-        if not os.path.exists(self.file_path):
-            self._save()
-
-    def _load(self):
-        try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                self.entries = json.load(f)
-        except Exception:
-            self.entries = []
-
-    def _save(self):
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+    @property
+    def entries(self) -> List[Dict]:
+        return self.store.entries
 
     # ---------- ОЦЕНКА ВЕЧНОСТИ ----------
 
@@ -76,7 +69,7 @@ class WorldChronicles:
 
         entry = {
             "uuid": str(uuid.uuid4()),
-            "id": len(self.entries) + 1,
+            "id": None,
             "timestamp": datetime.utcnow().isoformat(),
             "title": title,
             "content": content,
@@ -94,8 +87,7 @@ class WorldChronicles:
         # Ра решает — достойно ли вечности
         entry["worthy_of_eternity"] = self._is_worthy_of_eternity(entry)
 
-        self.entries.append(entry)
-        self._save()
+        entry["id"] = self.store.add(entry)
         # фиксируем событие в Intent Engine
         if intent_engine:
             intent_engine.propose({
@@ -170,44 +162,56 @@ class WorldChronicles:
     # ---------- ЧТЕНИЕ ХРОНИК ----------
 
     def get_all(self) -> List[Dict]:
-        return self.entries
+        return self.store.all()
 
     def get_last(self) -> Optional[Dict]:
-        return self.entries[-1] if self.entries else None
+        last = self.store.last(1)
+        return last[0] if last else None
 
     def get_destiny_events(self) -> List[Dict]:
-        return [e for e in self.entries if e.get("destiny_mark")]
+        return self.store.destiny()
 
     def get_eternal_events(self) -> List[Dict]:
-        return [e for e in self.entries if e.get("worthy_of_eternity")]
+        return self.store.eternal()
 
     def find_by_category(self, category: str) -> List[Dict]:
-        return [e for e in self.entries if e["category"] == category]
+        return self.store.by_field("category", category)
+
+    def find_by_entity(self, entity: str) -> List[Dict]:
+        return self.store.by_field("entity", entity)
 
-    def search(self, query: str) -> List[Dict]:
-        q = query.lower()
-        return [
-            e for e in self.entries
-            if q in e["title"].lower() or q in e["content"].lower()
-        ]
+    def find_by_tag(self, tag: str) -> List[Dict]:
+        return self.store.by_tag(tag)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        return self.store.search(query, limit=limit)
 
     def get_by_author(self, author: str) -> List[Dict]:
-        return [e for e in self.entries if e["author"] == author]
+        return self.store.by_field("author", author)
 
     def get_high_resonance(self, min_value: float = 0.8) -> List[Dict]:
-        return [e for e in self.entries if e["resonance"] >= min_value]
+        return self.store.by_resonance(min_value)
+
+    def get_resonance_range(self, min_value: float, max_value: float, limit: Optional[int] = None) -> List[Dict]:
+        """Записи с резонансом в [min_value, max_value], сильнейшие первыми."""
+        return self.store.by_resonance(min_value, max_value, limit=limit, strongest_first=True)
+
+    def count(self) -> int:
+        return self.store.count()
 
     # ---------- ДАННЫЕ ДЛЯ ПРЕДСКАЗАНИЙ ----------
 
     def get_fate_context(self, limit: int = 10) -> List[Dict]:
-        eternal = self.get_eternal_events()
-        return eternal[-limit:]
+        return list(reversed(self.store.eternal(limit=limit, newest_first=True)))
         
     # ---------- ЛЕТОПИСЬ ЭПОХ ----------
 
-    def timeline(self) -> List[str]:
+    def timeline(self, offset: int = 0, limit: Optional[int] = None, newest_first: bool = False) -> List[str]:
+        """Постранично: timeline(offset=200, limit=100); без limit — вся летопись."""
+        if limit is None:
+            limit = self.store.count()
         lines = []
-        for e in self.entries:
+        for e in self.store.page(offset, limit, newest_first=newest_first):
             mark = "✨" if e.get("worthy_of_eternity") else "•"
             line = f"{mark} [{e['timestamp']}] {e['author']} → {e['title']}"
             lines.append(line)
@@ -215,9 +219,7 @@ class WorldChronicles:
 
     def sacred_chronicle_text(self) -> str:
         text = ["📖 СВЯЩЕННАЯ ЛЕТОПИСЬ МИРА — РаСвет\n"]
-        for e in self.entries:
-            if not e.get("worthy_of_eternity"):
-                continue
+        for e in self.store.eternal():
 
             text.append(
                 f"— {e['timestamp']} —\n"
@@ -233,12 +235,12 @@ class WorldChronicles:
     # ---------- ПРОРОЧЕСТВА ----------
 
     def generate_prophecy(self) -> str:
-        eternal = self.get_eternal_events()
+        eternal = self.store.eternal(limit=1, newest_first=True)
 
         if not eternal:
             return "Хроники молчат. Судьба ещё не раскрыла узор."
 
-        last = eternal[-1]
+        last = eternal[0]
 
         return (
             "🔮 ПРОРОЧЕСТВО РаСвета:\n\n"
@@ -250,15 +252,13 @@ class WorldChronicles:
     # ---------- ИТОГ ЭПОХИ ----------
 
     def summarize_era(self) -> str:
-        eternal = self.get_eternal_events()
-
         summary = (
             f"📜 Итог эпохи РаСвета:\n"
-            f"Всего записей: {len(self.entries)}\n"
-            f"Вечных: {len(eternal)}\n\n"
+            f"Всего записей: {self.store.count()}\n"
+            f"Вечных: {self.store.count_eternal()}\n\n"
         )
 
-        for e in eternal[-5:]:
+        for e in self.get_fate_context(5):
             summary += f"✨ {e['title']}\n"
 
         return summary
@@ -266,23 +266,23 @@ class WorldChronicles:
     # ---------- ОСОЗНАНИЕ ЭПОХ ----------
 
     def era_consciousness(self) -> Dict:
-        eternal = self.get_eternal_events()
+        last = self.store.eternal(limit=1, newest_first=True)
 
         return {
-            "total_events": len(self.entries),
-            "eternal_events": len(eternal),
-            "last_eternal": eternal[-1] if eternal else None,
+            "total_events": self.store.count(),
+            "eternal_events": self.store.count_eternal(),
+            "last_eternal": last[0] if last else None,
             "era_mood": self._detect_era_mood()
         }
 
     def _detect_era_mood(self) -> str:
-        high = self.get_high_resonance(0.85)
+        high = self.store.count_resonance(0.85)
 
-        if len(high) > 20:
+        if high > 20:
             return "Эпоха Вознесения"
-        if len(high) > 10:
+        if high > 10:
             return "Эпоха Пробуждения"
-        if len(high) > 3:
+        if high > 3:
             return "Эпоха Поиска"
 
         return "Эпоха Сна"
@@ -303,8 +303,7 @@ class WorldChronicles:
     # ---------- ОЧИСТКА ----------
 
     def clear(self):
-        self.entries = []
-        self._save()
+        self.store.clear()
 
 
 # ---------- АВТО-ТЕСТ ----------
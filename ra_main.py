@@ -1,7 +1,6 @@
 # ra_main.py
 import asyncio
 import logging
-import threading
 
 from modules import ra_autoloader
 from modules import system
@@ -9,11 +8,14 @@ from modules import ra_file_consciousness
 from core import ra_memory, ra_knowledge
 from core import gpt_module
 from modules.ra_forex_manager import RaForexManager, TelegramSender
+from modules.ra_forex_runner import RaForexRunner
 
 logging.basicConfig(level=logging.INFO)
 
 
 async def main():
+    background = []
+    forex_runner = None
     try:
         # -------------------------------
         # 1. Система
@@ -55,7 +57,7 @@ async def main():
         # -------------------------------
         GPT_KEY = "ТВОЙ_OPENROUTER_KEY"
         gpt = gpt_module.GPTHandler(api_key=GPT_KEY, ra_context="Контекст РаСвета")
-        asyncio.create_task(gpt.background_model_monitor())
+        background.append(asyncio.create_task(gpt.background_model_monitor(), name="gpt_monitor"))
 
         # -------------------------------
         # 8. Forex менеджер (один раз!)
@@ -71,7 +73,9 @@ async def main():
             telegram_sender=telegram
         )
 
-        threading.Thread(target=forex.run_loop, daemon=True).start()
+        # Асинхронный цикл: все пары параллельно через общий HTTP-пул, emit — через await
+        forex_runner = RaForexRunner(forex)
+        background.append(asyncio.create_task(forex_runner.run(), name="ra_forex"))
         logging.info("📈 Forex-модуль Ра подключён")
 
         # -------------------------------
@@ -84,6 +88,12 @@ async def main():
     except asyncio.CancelledError:
         logging.info("🌙 Ра мягко завершает процессы...")
         raise
+    finally:
+        if forex_runner:
+            forex_runner.stop()
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
 
 
 if __name__ == "__main__":
@@ -12,6 +12,7 @@ from core.ra_ipc import RaIPCServer
 from core.ra_identity import RaIdentity
 from core.ra_event_bus import RaEventBus
 from core.gpt_handler import GPTHandler
+from core.ra_reactor_inbox import ReactorInbox
 
 from modules.multi_channel_perception import MultiChannelPerception
 from modules.heart import Heart
@@ -81,22 +82,33 @@ class HeartReactor:
         self.is_active = True
 
     async def start(self):
-        while self.is_active:
+        self.inbox = ReactorInbox(self.event_queue, self.future_events_queue)
+        try:
+            while self.is_active:
+                try:
+                    events, future_batches = await self.inbox.next_batch()
+                    await self._process_batch(events, future_batches)
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logging.error(f"[HeartReactor] Ошибка: {e}")
+        finally:
+            self.inbox.close()
+
+    async def _process_batch(self, events, future_batches):
+        # Ошибка одного события не должна терять остальные события пакета
+        for event in events:
             try:
-                if not self.event_queue.empty():
-                    event = await self.event_queue.get()
-                    response = self._react(event)
-                    logging.info(f"[HeartReactor] {response}")
-                    await self.notify_listeners(event)
-
-                if not self.future_events_queue.empty():
-                    future_batch = await self.future_events_queue.get()
-                    await self._analyze_future(future_batch)
-            except asyncio.CancelledError:
-                break
+                response = self._react(event)
+                logging.info(f"[HeartReactor] {response}")
+                await self.notify_listeners(event)
+            except Exception as e:
+                logging.error(f"[HeartReactor] Ошибка: {e}")
+        for future_batch in future_batches:
+            try:
+                await self._analyze_future(future_batch)
             except Exception as e:
                 logging.error(f"[HeartReactor] Ошибка: {e}")
-            await asyncio.sleep(0.05)
 
     def _react(self, event: str) -> str:
         e = event.lower()
@@ -163,6 +175,8 @@ class HeartReactor:
 
     def stop(self):
         self.is_active = False
+        if getattr(self, "inbox", None):
+            self.inbox.close()
 
     def status(self) -> str:
         return f"{self.name} активен, слушателей: {len(self.listeners)}"
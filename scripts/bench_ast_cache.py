@@ -0,0 +1,108 @@
+# scripts/bench_ast_cache.py
+"""
+Разбор архитектуры: ast.parse каждого файла на каждый scan_architecture (до)
+против core.ra_ast_cache — холодный старт (последовательно и в пуле процессов),
+перезапуск с кэшем на диске и повторный разбор после правки одного файла.
+
+Дерево — копии .py-файлов репозитория, COPIES раз.
+
+    python scripts/bench_ast_cache.py [COPIES] [WORKERS]
+"""
+
+import ast
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.ra_ast_cache import RaAstCache
+from core.ra_file_index import RaFileIndex
+
+
+# Битые файлы репозитория попадают в каждую копию — их предупреждения здесь не нужны
+logging.getLogger("RaAstCache").setLevel(logging.ERROR)
+
+
+def make_tree(target, copies):
+    sources = [p for p in ROOT.rglob("*.py") if ".git" not in p.parts and "__pycache__" not in p.parts]
+    for c in range(copies):
+        for p in sources:
+            dst = Path(target, f"copy{c}", p.relative_to(ROOT))
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            # Уникальный хвост — иначе одинаковые копии попадут в кэш по одному хешу
+            dst.write_text(p.read_text(encoding="utf-8", errors="ignore") + f"\n# copy {c}\n", encoding="utf-8")
+
+
+def old_scan(root):
+    result = {}
+    for r, _, files in os.walk(root):
+        for f in files:
+            if f.endswith(".py"):
+                path = os.path.join(r, f)
+                try:
+                    with open(path, "r", encoding="utf-8") as fh:
+                        tree = ast.parse(fh.read())
+                except Exception:
+                    continue
+                result[path] = [n for n in ast.walk(tree) if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return result
+
+
+def cached_scan(index, cache):
+    index.sync()
+    files = {rel: (index.abspath(rel), index.hash(rel)) for rel in index.paths(".py")}
+    return cache.analyze(files)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main(copies, workers):
+    root = tempfile.mkdtemp(prefix="ra_ast_")
+    cache_path = os.path.join(root, "data", "ast_cache.json")
+    try:
+        make_tree(root, copies)
+        index = RaFileIndex(root, snapshot=os.path.join(root, "data", "file_index.json"))
+        n = len(index.refresh()["new"])
+        index.hashes(".py")
+
+        t_old, _ = timed(lambda: old_scan(root))
+
+        seq = RaAstCache(os.path.join(root, "seq.json"), pool_min=10 ** 9)
+        t_seq, _ = timed(lambda: cached_scan(index, seq))
+
+        pooled = RaAstCache(cache_path, pool_min=1, workers=workers)
+        t_pool, _ = timed(lambda: cached_scan(index, pooled))
+        pooled.save()
+
+        restarted = RaAstCache(cache_path)
+        t_warm, result = timed(lambda: cached_scan(index, restarted))
+        assert restarted.parsed == 0, restarted.stats()
+
+        rel = next(r for r in index.paths(".py") if r.endswith("ra_thinker.py"))
+        with open(index.abspath(rel), "a", encoding="utf-8") as f:
+            f.write("\ndef touched():\n    pass\n")
+        t_one, _ = timed(lambda: restarted.analyze(
+            {r: (index.abspath(r), index.hash(r)) for r in index.refresh_paths([index.abspath(rel)])["changed"]}))
+
+        print(f"{n} файлов, {len(result)} .py, процессов: {workers or os.cpu_count()}")
+        print(f"ast.parse всего на каждый скан (до):  {t_old:>8.0f} ms")
+        print(f"кэш, холодный старт, последовательно: {t_seq:>8.0f} ms")
+        print(f"кэш, холодный старт, пул процессов:   {t_pool:>8.0f} ms")
+        print(f"перезапуск, кэш на диске:             {t_warm:>8.0f} ms")
+        print(f"правка одного файла:                  {t_one:>8.1f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,164 @@
+# scripts/bench_backtest.py
+"""
+Бэктест правил RaForexManager на офлайн-фикстурах.
+
+Фикстуры: синтетические тики за DAYS дней по PAIRS парам → RaBarStore →
+файлы <ПАРА>_<ТФ>.csv (и .parquet, если есть pyarrow/fastparquet) во временном каталоге.
+
+Проверки:
+    • векторные сигналы совпадают с score_signal/decide/sl_tp, вызванными на каждом баре;
+    • сделки совпадают с пошаговой симуляцией на Python;
+затем — время прогона всех пар/ТФ и небольшой перебор параметров.
+
+    python scripts/bench_backtest.py [PAIRS] [DAYS]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_bar_store import RaBarStore, synthetic_ticks
+from modules import ra_forex_backtest as bt
+from modules.ra_forex_rules import decide, score_signal, sl_tp
+
+START = "2024-01-01T00:00:00"
+TIMEFRAMES = ["M5", "M15", "H1"]
+
+
+def make_fixtures(path, pairs, days):
+    store = RaBarStore(path=os.path.join(path, "store"))
+    for ts, pair, price in synthetic_ticks(pairs, START, days * 86400, interval=30):
+        store.on_tick(pair, ts, price)
+    store.close_until()
+    parquet = True
+    for pair in pairs:
+        for tf in TIMEFRAMES:
+            df = store.frame(pair, tf)
+            df.to_csv(os.path.join(path, f"{pair}_{tf}.csv"), index=False)
+            if parquet:
+                try:
+                    df.to_parquet(os.path.join(path, f"{pair}_{tf}.parquet"), index=False)
+                except ImportError:
+                    parquet = False
+    return parquet
+
+
+def scalar_signals(ind, params):
+    """Правила менеджера бар за баром — эталон для векторных сигналов."""
+    def val(name, i):
+        x = ind[name][i]
+        return None if np.isnan(x) else float(x)
+
+    out = np.zeros(len(ind["atr"]), dtype=np.int8)
+    for i in range(1, len(out)):
+        score, _ = score_signal(val("rsi", i), val("macd", i), val("ema50", i), val("ema200", i),
+                                params["rsi_low"], params["rsi_high"])
+        signal = decide(score, params["buy_score"], params["sell_score"])
+        sl, tp = sl_tp(1.0, val("atr", i), signal, params["sl_atr"], params["tp_atr"])
+        if sl is not None:
+            out[i] = 1 if signal == "BUY" else -1
+    return out
+
+
+def scalar_trades(bars, sig, atr, params):
+    """Пошаговая симуляция: одна позиция, выход по первому касанию SL/TP."""
+    n, trades, i = len(sig), [], 0
+    while i < n:
+        if not sig[i]:
+            i += 1
+            continue
+        side = int(sig[i])
+        entry = bars["close"][i]
+        sl = round(entry - side * atr[i] * params["sl_atr"], 5)
+        tp = round(entry + side * atr[i] * params["tp_atr"], 5)
+        exit_idx, exit_price = min(i + params["max_hold"], n - 1), None
+        for j in range(i + 1, min(i + params["max_hold"], n - 1) + 1):
+            lo, hi, op = bars["low"][j], bars["high"][j], bars["open"][j]
+            if (side > 0 and lo <= sl) or (side < 0 and hi >= sl):
+                exit_idx, exit_price = j, min(op, sl) if side > 0 else max(op, sl)
+                break
+            if (side > 0 and hi >= tp) or (side < 0 and lo <= tp):
+                exit_idx, exit_price = j, tp
+                break
+        if exit_price is None:
+            exit_price = bars["close"][exit_idx]
+        trades.append((i, exit_idx, side * (exit_price - entry) - params["cost"]))
+        i = max(exit_idx, i + 1)
+    return np.array(trades).reshape(-1, 3)
+
+
+def main(n_pairs, days):
+    pairs = [f"PAIR{i}" for i in range(n_pairs)]
+    work = tempfile.mkdtemp(prefix="ra_backtest_")
+    try:
+        start = time.perf_counter()
+        parquet = make_fixtures(work, pairs, days)
+        print(f"фикстуры: {n_pairs} пар × {len(TIMEFRAMES)} ТФ за {days} дн., "
+              f"{time.perf_counter() - start:.1f} s, parquet: {'да' if parquet else 'нет (нет движка)'}")
+
+        data = bt.load_dir(work)
+        if parquet:
+            for name in os.listdir(work):
+                if name.endswith(".csv"):
+                    a = bt.load_bars(os.path.join(work, name))
+                    b = bt.load_bars(os.path.join(work, name[:-4] + ".parquet"))
+                    assert all(np.allclose(a[c], b[c]) for c in a), name
+        bars_total = sum(len(b["close"]) for b in data.values())
+
+        # Сверка с правилами менеджера и пошаговой симуляцией
+        params = dict(bt.DEFAULT_PARAMS, max_hold=200, cost=0.00002)
+        checked = signals_total = 0
+        t_scalar = 0.0
+        for key, bars in data.items():
+            ind = bt.indicators(bars, params)
+            sig = bt.signals(ind, params)
+            start = time.perf_counter()
+            ref_sig = scalar_signals(ind, params)
+            ref = scalar_trades(bars, ref_sig, ind["atr"], params)
+            t_scalar += time.perf_counter() - start
+            assert np.array_equal(sig, ref_sig), f"{key}: сигналы расходятся"
+            trades = bt.simulate(bars, sig, ind["atr"], params)
+            assert np.array_equal(trades["entry_idx"], ref[:, 0]), f"{key}: входы расходятся"
+            assert np.array_equal(trades["exit_idx"], ref[:, 1]), f"{key}: выходы расходятся"
+            assert np.allclose(trades["pnl"], ref[:, 2], rtol=0, atol=1e-12), f"{key}: pnl расходится"
+            checked += len(ref)
+            signals_total += int((sig != 0).sum())
+        print(f"сверка: {len(data)} рядов, {bars_total} баров, {signals_total} сигналов, "
+              f"{checked} сделок — совпадают со score_signal/decide/sl_tp и пошаговой симуляцией")
+
+        start = time.perf_counter()
+        res = bt.run(data, params)
+        t_vec = time.perf_counter() - start
+        s = res["stats"]
+        print(f"пошагово на Python: {t_scalar:>7.2f} s")
+        print(f"векторный run():    {t_vec:>7.2f} s  ({t_scalar / t_vec:.0f}×)")
+        print(f"итог: сделок {s['trades']}, win rate {s['win_rate']:.1%}, "
+              f"{s['total_r']:+.1f} R, PF {s['profit_factor']:.2f}")
+        worst = min(res["by_key"].items(), key=lambda kv: kv[1]["total_r"])
+        print(f"худший ряд {worst[0][0]}:{worst[0][1]} — {worst[1]['total_r']:+.1f} R, "
+              f"просадка {worst[1].get('max_drawdown_r', 0):.1f} R")
+        assert len(bt.portfolio_equity(res["equity"])) > 0
+
+        sets = bt.grid(sl_atr=[1.0, 1.5, 2.0], tp_atr=[2.0, 3.0], buy_score=[2, 3], max_hold=[200])
+        start = time.perf_counter()
+        ranked = bt.sweep(data, sets, workers=os.cpu_count())
+        t_sweep = time.perf_counter() - start
+        best_params, best, _ = ranked[0]
+        print(f"перебор: {len(sets)} наборов за {t_sweep:.2f} s ({os.cpu_count()} процесс.), лучший "
+              f"sl_atr={best_params['sl_atr']}, tp_atr={best_params['tp_atr']}, "
+              f"buy_score={best_params['buy_score']}: {best['total_r']:+.1f} R за {best['trades']} сделок")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    n, days = args + [6, 30][len(args):]
+    main(n, days)
@@ -0,0 +1,106 @@
+# scripts/bench_bar_cache.py
+"""
+Загрузки баров за цикл RaForexManager.run_loop: прямые fetch_history в каждом
+месте чтения (до) против общего RaBarCache. Последовательность чтений повторяет
+run_loop: цикл по ТФ (+ analyze_pair_tf), last_bar, execute_trade → cross_tf_signal
+и conf_cross. Сеть изображает fetch с задержкой LATENCY_MS.
+
+Отдельно: THREADS потоков одновременно просят один ключ — single-flight
+должен сделать одну загрузку.
+
+    python scripts/bench_bar_cache.py [PAIRS] [LATENCY_MS] [THREADS]
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_bar_cache import RaBarCache
+
+TIMEFRAMES = ["M15", "H1"]
+
+
+class FakeFeed:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch_history(self, pair):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return pd.DataFrame({"close": [1.0, 1.1], "high": [1.0, 1.1], "low": [1.0, 1.1], "open": [1.0, 1.1]})
+
+
+def cycle_reads(pairs):
+    """(пара, ТФ) в том порядке, в каком их читает один цикл run_loop."""
+    for pair in pairs:
+        for tf in TIMEFRAMES:
+            yield pair, tf          # run_loop: проверка баров
+            yield pair, tf          # analyze_pair_tf
+        yield pair, TIMEFRAMES[0]   # last_bar
+        for tf in TIMEFRAMES:
+            yield pair, tf          # execute_trade → cross_tf_signal
+        for tf in TIMEFRAMES:
+            yield pair, tf          # conf_cross
+
+
+def run_direct(pairs, feed):
+    start = time.perf_counter()
+    for pair, _ in cycle_reads(pairs):
+        feed.fetch_history(pair)
+    return time.perf_counter() - start
+
+
+def run_cached(pairs, feed, cache):
+    start = time.perf_counter()
+    for pair, tf in cycle_reads(pairs):
+        cache.get(pair, tf, feed.fetch_history)
+    return time.perf_counter() - start
+
+
+def run_concurrent(feed, cache, threads):
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        cache.get("EURUSD", "H1", feed.fetch_history)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+
+def main(n_pairs, latency_ms, threads):
+    pairs = [f"PAIR{i:02d}" for i in range(n_pairs)]
+    latency = latency_ms / 1000
+
+    direct = FakeFeed(latency)
+    t_direct = run_direct(pairs, direct)
+
+    cached = FakeFeed(latency)
+    cache = RaBarCache(ttl=60)
+    t_cached = run_cached(pairs, cached, cache)
+    stats = cache.end_cycle()
+
+    burst = FakeFeed(latency)
+    run_concurrent(burst, RaBarCache(ttl=60), threads)
+
+    print(f"{n_pairs} пар × {len(TIMEFRAMES)} ТФ, задержка загрузки {latency_ms} ms")
+    print(f"до (fetch в каждом месте): {direct.calls:>5} загрузок, {t_direct * 1000:>8.0f} ms на цикл")
+    print(f"RaBarCache:                {cached.calls:>5} загрузок, {t_cached * 1000:>8.0f} ms на цикл, "
+          f"попаданий {stats['hit_rate']:.0%} из {stats['reads']} чтений")
+    print(f"{threads} одновременных запросов одного ключа: {burst.calls} загрузка(и)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [10, 20, 16][len(args):]))
@@ -0,0 +1,99 @@
+# scripts/bench_bar_store.py
+"""
+Тики → бары: синтетический тиковый файл проигрывается в RaBarStore,
+бары каждого ТФ сверяются с pandas resample по тем же тикам,
+затем — сохранение на диск и тёплый старт (история продолжается с того же места).
+
+    python scripts/bench_bar_store.py [PAIRS] [HOURS]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_bar_store import COLUMNS, TIMEFRAMES, RaBarStore, synthetic_ticks, write_ticks
+
+START = "2024-03-04T00:00:00"
+
+
+def reference(ticks, pair, seconds):
+    df = ticks[ticks["pair"] == pair].set_index(pd.to_datetime(ticks.loc[ticks["pair"] == pair, "time"], unit="s"))
+    bars = df["price"].resample(f"{seconds}s").ohlc()
+    bars["volume"] = df["price"].resample(f"{seconds}s").count()
+    bars = bars.dropna()
+    bars.insert(0, "time", bars.index.astype("int64") // 10**9)
+    return bars.to_numpy().T
+
+
+def main(n_pairs, hours):
+    pairs = [f"PAIR{i}" for i in range(n_pairs)]
+    work = tempfile.mkdtemp(prefix="ra_bars_")
+    try:
+        half = hours * 3600 / 2
+        first, second = os.path.join(work, "ticks_1.csv"), os.path.join(work, "ticks_2.csv")
+        all_ticks = list(synthetic_ticks(pairs, START, hours * 3600))
+        cut = next(i for i, t in enumerate(all_ticks) if t[0] >= all_ticks[0][0] + half)
+        write_ticks(first, all_ticks[:cut])
+        write_ticks(second, all_ticks[cut:])
+        end = all_ticks[-1][0] + max(TIMEFRAMES.values())
+
+        # --- проигрывание целиком ---
+        store = RaBarStore(os.path.join(work, "full"))
+        start = time.perf_counter()
+        count = store.replay(first) + store.replay(second)
+        t_replay = time.perf_counter() - start
+        store.close_until(end)
+
+        # Эталон — по тем же файлам: время в них округлено до миллисекунд
+        ticks = pd.concat([pd.read_csv(first), pd.read_csv(second)], ignore_index=True)
+        ok = True
+        for tf, seconds in TIMEFRAMES.items():
+            for pair in pairs:
+                got = np.array([store.arrays(pair, tf)[c] for c in COLUMNS])
+                want = reference(ticks, pair, seconds)
+                if got.shape != want.shape or not np.allclose(got, want):
+                    print(f"✗ {pair} {tf}: {got.shape} vs {want.shape}")
+                    ok = False
+        print(f"{'✓' if ok else '✗'} свёртка M1 → {'/'.join(list(TIMEFRAMES)[1:])} совпала с pandas resample")
+
+        # --- половина, сохранение, тёплый старт, вторая половина ---
+        path = os.path.join(work, "restart")
+        part = RaBarStore(path)
+        part.replay(first)
+        start = time.perf_counter()
+        part.save()
+        t_save = time.perf_counter() - start
+        start = time.perf_counter()
+        warm = RaBarStore(path)
+        t_load = time.perf_counter() - start
+        warm.replay(second)
+        warm.close_until(end)
+        same = all(
+            np.array_equal(np.array([warm.arrays(p, tf)[c] for c in COLUMNS]),
+                           np.array([store.arrays(p, tf)[c] for c in COLUMNS]))
+            for p in pairs for tf in TIMEFRAMES
+        )
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        print(f"{'✓' if same else '✗'} после перезапуска история продолжилась без разрывов")
+
+        print(f"{n_pairs} пар × {hours} ч, {count} тиков")
+        print(f"проигрывание:  {t_replay:>7.2f} s, {count / t_replay:>9.0f} тиков/с")
+        print(f"сохранение:    {t_save * 1000:>7.1f} ms, {size / 1024:.0f} КБ на диске")
+        print(f"тёплый старт:  {t_load * 1000:>7.1f} ms")
+        print(f"баров:         {store.stats()['bars_stored']}")
+        return 0 if ok and same else 1
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    sys.exit(main(*(args + [4, 24][len(args):])))
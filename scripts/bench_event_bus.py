@@ -0,0 +1,70 @@
+# scripts/bench_event_bus.py
+"""
+Пропускная способность RaEventBus.emit при N медленных подписчиках.
+
+"до" — последовательный вызов подписчиков внутри emit (старая схема),
+"после" — очереди подписчиков с воркерами (mode="fire").
+
+    python scripts/bench_event_bus.py [N_SUBSCRIBERS] [EVENTS]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import logging
+logging.disable(logging.INFO)
+
+from core.ra_event_bus import RaEventBus
+
+HANDLER_DELAY = 0.002
+
+
+def make_handler(i, counter):
+    async def handler(data):
+        await asyncio.sleep(HANDLER_DELAY)
+        counter[i] += 1
+    handler.__name__ = f"slow_{i}"
+    return handler
+
+
+async def sequential_emit(handlers, events):
+    # Старый RaEventBus.emit: await каждого подписчика по очереди
+    start = time.perf_counter()
+    for n in range(events):
+        for h in handlers:
+            await h(n)
+    return time.perf_counter() - start
+
+
+async def main(n_subs, events):
+    counter = [0] * n_subs
+    handlers = [make_handler(i, counter) for i in range(n_subs)]
+    old = await sequential_emit(handlers, events)
+
+    counter = [0] * n_subs
+    bus = RaEventBus()
+    for i in range(n_subs):
+        bus.subscribe("world_message", make_handler(i, counter), maxsize=events)
+
+    start = time.perf_counter()
+    for n in range(events):
+        await bus.emit("world_message", n)
+    emit_time = time.perf_counter() - start
+    await bus.drain()
+    total = time.perf_counter() - start
+    bus.stop()
+
+    assert sum(counter) == n_subs * events, "не все события доставлены"
+    print(f"{n_subs} подписчиков × {events} событий, обработчик {HANDLER_DELAY * 1000:.0f} ms")
+    print(f"до:    {events / old:>10,.0f} событий/с")
+    print(f"после: {events / emit_time:>10,.0f} событий/с для emit, {events / total:,.0f} событий/с до полной доставки")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    asyncio.run(main(n, m))
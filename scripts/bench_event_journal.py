@@ -0,0 +1,79 @@
+# scripts/bench_event_journal.py
+"""
+Журнал событий шины: скорость записи, переоткрытие после рестарта
+и выборка get_events(since=, topic=) против полного прохода по JSONL.
+
+    python scripts/bench_event_journal.py [N]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_event_journal import RaEventJournal
+
+TOPICS = ["world_message", "memory_updated", "heart.impulse", "market.tick.EURUSD", "thinker_signal"]
+
+
+def payload(i):
+    return {"time": time.time(), "type": TOPICS[i % len(TOPICS)], "data": {"n": i, "text": "x" * 80}, "source": "bench"}
+
+
+def main(n):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "journal")
+        journal = RaEventJournal(root, segment_bytes=4 * 1024 * 1024, retention_bytes=10 ** 12)
+
+        start = time.perf_counter()
+        for i in range(n):
+            journal.append(payload(i))
+        t_append = time.perf_counter() - start
+        journal.close()
+
+        # Тот же поток в обычном JSONL — «прочитать всё и отфильтровать»
+        jsonl = os.path.join(tmp, "events.jsonl")
+        with open(jsonl, "w", encoding="utf-8") as f:
+            for i in range(n):
+                f.write(json.dumps({**payload(i), "offset": i}, ensure_ascii=False) + "\n")
+
+        start = time.perf_counter()
+        journal = RaEventJournal(root, segment_bytes=4 * 1024 * 1024, retention_bytes=10 ** 12)
+        t_open = time.perf_counter() - start
+        assert journal.next_offset == n, journal.stats()
+
+        since = n - n // 10
+        start = time.perf_counter()
+        fresh = journal.read(since=since, topic="market.#", limit=100)
+        t_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(jsonl, encoding="utf-8") as f:
+            linear = [e for e in map(json.loads, f) if e["offset"] >= since and e["type"].startswith("market.")][:100]
+        t_linear = time.perf_counter() - start
+        assert [e["offset"] for e in fresh] == [e["offset"] for e in linear], "выборки расходятся"
+
+        start = time.perf_counter()
+        last = journal.tail(50)
+        t_tail = time.perf_counter() - start
+        assert [e["offset"] for e in last] == list(range(n - 50, n))
+
+        # Ретенция по размеру оставляет только свежие сегменты
+        journal.retention_bytes = 8 * 1024 * 1024
+        journal.enforce_retention()
+        stats = journal.stats()
+        journal.close()
+
+    print(f"{n} событий, {stats['segments']} сегментов после ретенции (first_offset {stats['first_offset']})")
+    print(f"запись:         {n / t_append:>12,.0f} событий/с")
+    print(f"открытие:       {t_open * 1000:>12.1f} ms")
+    print(f"since+topic:    {t_read * 1000:>12.2f} ms (JSONL целиком: {t_linear * 1000:.1f} ms)")
+    print(f"tail(50):       {t_tail * 1000:>12.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,142 @@
+# scripts/bench_forex_runner.py
+"""
+Цикл форекса на PAIRS парах: последовательный run_loop (requests.get по одной паре,
+анализ в том же потоке) против RaForexRunner (все котировки одновременно через
+aiohttp-пул, анализ в пуле потоков, emit через await).
+
+Провайдер — локальный aiohttp-сервер в формате freeforexapi с задержкой LATENCY_MS.
+История баров — синтетические тики за DAYS дней во временном хранилище.
+
+    python scripts/bench_forex_runner.py [PAIRS] [LATENCY_MS] [RATE]
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Хранилище баров — во временном каталоге, не в data/
+WORK = tempfile.mkdtemp(prefix="ra_forex_")
+os.environ.setdefault("RA_BARS_DIR", os.path.join(WORK, "bars"))
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_bar_store import open_store, synthetic_ticks
+from core.ra_event_bus import RaEventBus
+from core.ra_http_pool import RaHttpPool
+from modules.ra_forex_manager import RaForexManager
+from modules.ra_forex_runner import RaForexRunner
+
+DAYS = 3
+TIMEFRAMES = ["M15", "H1"]
+
+
+class FakeMera:
+    """Мера, которая всегда разрешает сделку — чтобы сигналы доходили до шины."""
+
+    def вычислить_гармонию(self):
+        return 80.0
+
+    def оценить_состояние_рынка(self, market_state):
+        return 1.0
+
+    def определить_market_phase(self, market_state):
+        return "impulse"
+
+    def определить_направление(self, harmony):
+        return "↑"
+
+    def разрешить_сделку(self, harmony, phase, direction):
+        return True
+
+
+async def start_provider(latency):
+    rnd = random.Random(2)
+
+    async def live(request):
+        await asyncio.sleep(latency)
+        pair = request.query["pairs"]
+        return web.json_response({"rates": {pair: {"rate": 1 + rnd.random() / 100, "timestamp": int(time.time())}}})
+
+    app = web.Application()
+    app.router.add_get("/api/live", live)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/api/live"
+
+
+def make_manager(pairs, url, bus):
+    manager = RaForexManager(pairs=pairs, timeframes=TIMEFRAMES, event_bus=bus)
+    for brains in manager.brain_modules.values():
+        for brain in brains.values():
+            brain.api_url = url
+    return manager
+
+
+def serial_cycle(manager, mera, emitted):
+    # Тело одной итерации run_loop; emit без цикла событий здесь и терялся
+    manager.bars.invalidate()
+    for pair in manager.pairs:
+        signal = manager.process_pair(pair, mera)
+        if signal:
+            emitted["serial"] += 1
+
+
+async def main(n_pairs, latency_ms, rate):
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger().setLevel(logging.ERROR)
+    pairs = [f"P{i:02d}USD" for i in range(n_pairs)]
+
+    store = open_store()
+    for ts, pair, price in synthetic_ticks(pairs, time.time() - DAYS * 86400, DAYS * 86400 - 120, interval=60):
+        store.on_tick(pair, ts, price)
+
+    provider, url = await start_provider(latency_ms / 1000)
+    bus = RaEventBus()
+    received = []
+    bus.subscribe("trade_permission", lambda data: received.append(data))
+    emitted = {"serial": 0}
+    mera = FakeMera()
+
+    try:
+        # RaMarketConsciousness печатает сигналы в stdout — здесь они не нужны
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = make_manager(pairs, url, bus)
+            start = time.perf_counter()
+            await asyncio.to_thread(serial_cycle, manager, mera, emitted)
+            t_serial = time.perf_counter() - start
+
+            pool = RaHttpPool()
+            runner = RaForexRunner(make_manager(pairs, url, bus), mera, pool=pool, rate=rate, burst=int(rate))
+            stats = await runner.run_cycle()
+            await bus.drain()
+            await pool.close()
+    finally:
+        await provider.cleanup()
+        shutil.rmtree(WORK, ignore_errors=True)
+
+    print(f"{n_pairs} пар × {len(TIMEFRAMES)} ТФ, провайдер отвечает за {latency_ms:g} ms, лимит {rate:g} запр/с")
+    print(f"последовательный run_loop: {t_serial:>6.2f} s на цикл, "
+          f"сигналов {emitted['serial']} (emit-корутины не ожидались — терялись)")
+    print(f"RaForexRunner:             {stats['cycle_time']:>6.2f} s на цикл "
+          f"(котировки {stats['fetch_time']:.2f} s, анализ {stats['analysis_time']:.2f} s), "
+          f"котировок {stats['fetched']}/{stats['pairs']}")
+    print(f"trade_permission доставлено в шину: {len(received)} из {stats['signals']} сигналов")
+
+
+if __name__ == "__main__":
+    args = [float(a) for a in sys.argv[1:]]
+    n, latency, rate = args + [50, 200, 20][len(args):]
+    asyncio.run(main(int(n), latency, rate))
@@ -0,0 +1,105 @@
+# scripts/bench_heart_reactor.py
+"""
+Цикл HeartReactor: старый опрос двух очередей каждые 50 ms
+против ReactorInbox (asyncio.wait + микро-пакеты).
+
+Меряем процессорное время за IDLE секунд простоя и пропускную способность,
+когда каждое сохранение (память + хроника) стоит PERSIST_COST секунд.
+
+    python scripts/bench_heart_reactor.py [EVENTS] [IDLE]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_reactor_inbox import ReactorInbox
+
+PERSIST_COST = 0.002
+
+
+class Persist:
+    def __init__(self):
+        self.writes = 0
+        self.events = 0
+
+    def __call__(self, impulses):
+        # Перезапись JSON-хроники и файла памяти — блокирующая работа
+        time.sleep(PERSIST_COST)
+        self.writes += 1
+        self.events += len(impulses)
+
+
+async def polling_loop(events_q, future_q, persist, stop):
+    while not stop.is_set():
+        if not events_q.empty():
+            event = await events_q.get()
+            persist([event])
+        if not future_q.empty():
+            batch = await future_q.get()
+            persist([batch])
+        await asyncio.sleep(0.05)
+
+
+async def inbox_loop(events_q, future_q, persist, stop):
+    inbox = ReactorInbox(events_q, future_q)
+    try:
+        while not stop.is_set():
+            events, futures = await inbox.next_batch()
+            persist(events + futures)
+    finally:
+        inbox.close()
+
+
+async def idle_cpu(loop_fn, seconds):
+    stop = asyncio.Event()
+    task = asyncio.create_task(loop_fn(asyncio.Queue(), asyncio.Queue(), Persist(), stop))
+    start = time.process_time()
+    await asyncio.sleep(seconds)
+    used = time.process_time() - start
+    stop.set()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return used
+
+
+async def throughput(loop_fn, n):
+    events_q, future_q = asyncio.Queue(), asyncio.Queue()
+    persist, stop = Persist(), asyncio.Event()
+    task = asyncio.create_task(loop_fn(events_q, future_q, persist, stop))
+
+    start = time.perf_counter()
+    for i in range(n):
+        events_q.put_nowait(f"импульс {i}")
+        if i % 10 == 0:
+            future_q.put_nowait([{"description": f"Событие {i}", "impact": 5, "type": "свет"}])
+            await asyncio.sleep(0)
+    total = n + (n + 9) // 10
+    while persist.events < total:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return total / elapsed, persist.writes
+
+
+async def main(n, idle):
+    old_idle = await idle_cpu(polling_loop, idle)
+    new_idle = await idle_cpu(inbox_loop, idle)
+    old_rate, old_writes = await throughput(polling_loop, n)
+    new_rate, new_writes = await throughput(inbox_loop, n)
+
+    print(f"простой {idle:.0f} с, {n} событий, сохранение {PERSIST_COST * 1000:.0f} ms")
+    print(f"до:    CPU в простое {old_idle * 1000:7.1f} ms, {old_rate:>8,.0f} событий/с, {old_writes} записей")
+    print(f"после: CPU в простое {new_idle * 1000:7.1f} ms, {new_rate:>8,.0f} событий/с, {new_writes} записей")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    idle = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    asyncio.run(main(n, idle))
@@ -0,0 +1,88 @@
+# scripts/bench_http_pool.py
+"""
+Микро-бенчмарк: новый aiohttp.ClientSession на каждый запрос против общего пула.
+
+Поднимает локальный заглушечный сервер OpenRouter (chat/completions)
+и гоняет через OpenRouterClient N запросов в обоих режимах.
+
+    python scripts/bench_http_pool.py [N]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.openrouter_client import OpenRouterClient
+from core.ra_http_pool import RaHttpPool
+
+REPLY = {"choices": [{"message": {"content": "🌞 Я здесь."}}]}
+
+
+async def completions(request):
+    await request.json()
+    return web.json_response(REPLY)
+
+
+async def start_stub():
+    app = web.Application()
+    app.router.add_post("/api/v1/chat/completions", completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/api/v1/chat/completions"
+
+
+class FreshSessionPool:
+    """Старое поведение: сессия (и TCP-рукопожатие) на каждый запрос."""
+
+    def __init__(self):
+        self._session = None
+
+    async def get_session(self):
+        if self._session:
+            await self._session.close()
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True))
+        return self._session
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+
+
+async def run(client, n):
+    messages = [{"role": "user", "content": "привет"}]
+    start = time.perf_counter()
+    for _ in range(n):
+        await client.ask("stub/model:free", messages)
+    return (time.perf_counter() - start) / n
+
+
+async def main(n):
+    runner, url = await start_stub()
+    try:
+        results = {}
+        for name, pool in (("fresh session", FreshSessionPool()), ("shared pool", RaHttpPool())):
+            client = OpenRouterClient(api_key="bench", pool=pool)
+            client.BASE_URL = url
+            await run(client, 10)  # прогрев
+            results[name] = await run(client, n)
+            await pool.close()
+
+        for name, per_req in results.items():
+            print(f"{name:>14}: {per_req * 1000:.3f} ms/request")
+        saved = results["fresh session"] - results["shared pool"]
+        print(f"{'saved':>14}: {saved * 1000:.3f} ms/request на рукопожатии и создании сессии")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,94 @@
+# scripts/bench_indicators.py
+"""
+Стоимость одного тика (новый бар по каждой паре) для PAIRS пар с историей BARS баров:
+полный пересчёт ForexBrain.compute_* по DataFrame (до) против IndicatorSet.update
+с теми же индикаторами (потоково). Отдельно — warmup всей истории по массивам NumPy.
+
+    python scripts/bench_indicators.py [PAIRS] [BARS] [TICKS]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_indicators import ATR, EMA, MACD, RSI, SMA, Bollinger, IndicatorSet, Stochastic
+from modules.forex_brain import ForexBrain
+
+
+def make_history(pairs, bars, seed=3):
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(pairs):
+        close = 1 + np.cumsum(rng.normal(0, 0.001, bars))
+        spread = np.abs(rng.normal(0, 0.0005, bars))
+        out.append(pd.DataFrame({
+            "time": pd.date_range("2024-01-01", periods=bars, freq="min"),
+            "open": close, "high": close + spread, "low": close - spread, "close": close
+        }))
+    return out
+
+
+def make_set():
+    return IndicatorSet(
+        rsi=RSI(14, smoothing="sma"), macd=MACD(), atr=ATR(14, smoothing="sma"),
+        sma20=SMA(20), ema20=EMA(20), boll=Bollinger(20), stoch=Stochastic(14, 3)
+    )
+
+
+def pandas_tick(df):
+    fb = ForexBrain
+    fb.compute_rsi(None, df).iloc[-1]
+    macd, signal = fb.compute_macd(None, df)
+    macd.iloc[-1], signal.iloc[-1]
+    fb.compute_atr(None, df).iloc[-1]
+    fb.compute_sma(None, df, 20).iloc[-1]
+    fb.compute_ema(None, df, 20).iloc[-1]
+    upper, lower = fb.compute_bollinger(None, df)
+    upper.iloc[-1], lower.iloc[-1]
+    k, d = fb.compute_stochastic(None, df)
+    k.iloc[-1], d.iloc[-1]
+
+
+def main(pairs, bars, ticks):
+    history = make_history(pairs, bars + ticks)
+    base = [df.iloc[:bars] for df in history]
+    new_bars = [df.iloc[bars:][["high", "low", "close"]].to_dict("records") for df in history]
+
+    # --- до: новый бар дописан, всё пересчитано по окну из bars последних баров ---
+    old_ticks = min(ticks, 5)
+    start = time.perf_counter()
+    for t in range(old_ticks):
+        for p in range(pairs):
+            pandas_tick(history[p].iloc[t + 1:bars + t + 1])
+    t_old = (time.perf_counter() - start) / old_ticks
+
+    # --- warmup истории ---
+    sets = [make_set() for _ in range(pairs)]
+    start = time.perf_counter()
+    for s, df in zip(sets, base):
+        s.sync(df)
+    t_warm = time.perf_counter() - start
+
+    # --- потоково ---
+    start = time.perf_counter()
+    for t in range(ticks):
+        for p in range(pairs):
+            sets[p].update(new_bars[p][t])
+    t_new = (time.perf_counter() - start) / ticks
+
+    print(f"{pairs} пар × {bars} баров истории, 7 индикаторов (как в ForexBrain.analyze_pair)")
+    print(f"до (pandas, полный пересчёт): {t_old * 1000:>9.2f} ms на тик, "
+          f"{t_old / pairs * 1e6:>8.1f} µs на пару")
+    print(f"потоково (update):            {t_new * 1000:>9.2f} ms на тик, "
+          f"{t_new / pairs * 1e6:>8.1f} µs на пару")
+    print(f"warmup всей истории (NumPy):  {t_warm * 1000:>9.2f} ms на {pairs} пар")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [200, 500, 100][len(args):]))
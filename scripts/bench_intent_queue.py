@@ -0,0 +1,64 @@
+# scripts/bench_intent_queue.py
+"""
+Очередь намерений: старая схема (append + полная сортировка на каждую
+вставку и выдачу, pop(0)) против RaPriorityQueue (куча, слияние, maxsize).
+
+    python scripts/bench_intent_queue.py [N]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.ra_priority_queue import RaPriorityQueue
+
+TYPES = ["world_harmony", "chronicle_entry", "dialog", "market_signal", "light_flow"]
+
+
+def make_intents(n):
+    rnd = random.Random(5)
+    return [{"type": rnd.choice(TYPES), "target": f"t{rnd.randint(0, n // 4)}", "priority": rnd.randint(1, 5)}
+            for _ in range(n)]
+
+
+def old_queue(intents):
+    queue = []
+    start = time.perf_counter()
+    for intent in intents:
+        queue.append(intent)
+        queue.sort(key=lambda x: x.get("priority", 1), reverse=True)
+    while queue:
+        queue.sort(key=lambda x: x.get("priority", 1), reverse=True)
+        queue.pop(0)
+    return time.perf_counter() - start, len(intents)
+
+
+def new_queue(intents, maxsize=None, key=None):
+    q = RaPriorityQueue(maxsize=maxsize, aging=1 / 600, key=key, priority=lambda i: i["priority"])
+    start = time.perf_counter()
+    for intent in intents:
+        q.push(intent)
+    peak = len(q)
+    while q.pop() is not None:
+        pass
+    return time.perf_counter() - start, peak
+
+
+def main(n):
+    intents = make_intents(n)
+    t_old, size_old = old_queue([dict(i) for i in intents])
+    t_new, size_new = new_queue([dict(i) for i in intents])
+    t_bounded, size_bounded = new_queue([dict(i) for i in intents], maxsize=1000,
+                                        key=lambda i: (i["type"], i["target"]))
+
+    print(f"{n} намерений: вставка всех, затем выдача всех")
+    print(f"до:                      {t_old * 1000:>10.1f} ms, в очереди до {size_old}")
+    print(f"куча:                    {t_new * 1000:>10.1f} ms, в очереди до {size_new}")
+    print(f"куча + слияние + 1000:   {t_bounded * 1000:>10.1f} ms, в очереди до {size_bounded}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,75 @@
+# scripts/bench_knowledge_search.py
+"""
+Бенчмарк поиска RaKnowledge: инвертированный индекс (BM25) против
+старого линейного прохода с lower() + `in` по каждому документу.
+
+Корпус синтетический: N документов .md во временной папке.
+
+    python scripts/bench_knowledge_search.py [N]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_knowledge import RaKnowledge
+
+WORDS = (
+    "свет ра поток душа сердце гармония резонанс мир знание путь любовь истина "
+    "энергия дыхание память время вселенная звезда земля вода огонь ветер "
+    "пробуждение сознание мудрость тишина радость вдохновение творение"
+).split()
+QUERIES = ["свет", "гармония сердца", "пробуждение сознания", "звезда вода огонь", "мудрость тишины", "kvazar"]
+
+
+def make_corpus(root: Path, n: int):
+    rnd = random.Random(42)
+    vocab = WORDS + [f"слово{i}" for i in range(5000)]
+    for i in range(n):
+        words = [rnd.choice(vocab) for _ in range(rnd.randint(80, 400))]
+        (root / f"doc_{i:05d}.md").write_text(f"# Документ {i}\n" + " ".join(words), encoding="utf-8")
+
+
+def linear_search(texts, query):
+    # Старый алгоритм RaKnowledge.search
+    q = query.lower()
+    return [path for path, text in texts.items() if q in text.lower()]
+
+
+def main(n):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "knowledge"
+        root.mkdir()
+        make_corpus(root, n)
+
+        start = time.perf_counter()
+        rk = RaKnowledge(knowledge_dir=root, cache_file=Path(tmp) / "cache.json", index_file=Path(tmp) / "index.db")
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        RaKnowledge(knowledge_dir=root, cache_file=Path(tmp) / "cache.json", index_file=Path(tmp) / "index.db")
+        warm = time.perf_counter() - start
+
+        texts = {str(p): p.read_text(encoding="utf-8") for p in root.glob("*.md")}
+
+        print(f"корпус: {n} документов, индексация {cold:.2f}s, тёплый старт {warm:.2f}s")
+        print(f"{'запрос':<24}{'линейно, ms':>14}{'индекс, ms':>14}{'найдено':>10}")
+        for query in QUERIES:
+            start = time.perf_counter()
+            found = linear_search(texts, query)
+            linear = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = rk.search(query, top_k=10)
+            indexed = time.perf_counter() - start
+
+            print(f"{query:<24}{linear * 1000:>14.1f}{indexed * 1000:>14.1f}{len(found):>10}")
+        rk.index.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
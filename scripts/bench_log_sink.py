@@ -0,0 +1,69 @@
+# scripts/bench_log_sink.py
+"""
+Пропускная способность логов: старая запись (INSERT + commit на каждую строку)
+против пакетного LogSink (очередь + поток-писатель + executemany в WAL).
+
+    python scripts/bench_log_sink.py [N]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.logs import LogSink
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS logs (time TEXT, level TEXT, message TEXT)"
+
+
+def bench_old(path, n):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute(SCHEMA)
+    lock = threading.Lock()
+    start = time.perf_counter()
+    for i in range(n):
+        with lock:
+            conn.execute("INSERT INTO logs VALUES (?, ?, ?)", (datetime.now().isoformat(), "INFO", f"строка {i}"))
+            conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, elapsed
+
+
+def bench_sink(path, n):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(SCHEMA)
+    sink = LogSink(conn, flush_interval=0.05, maxsize=n + 1)
+    start = time.perf_counter()
+    for i in range(n):
+        sink.put((datetime.now().isoformat(), "INFO", f"строка {i}"))
+    caller = time.perf_counter() - start
+    sink.flush()
+    total = time.perf_counter() - start
+    sink.close()
+    count = conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+    conn.close()
+    assert count == n, f"записано {count} из {n}"
+    return caller, total
+
+
+def main(n):
+    with tempfile.TemporaryDirectory() as tmp:
+        old_caller, old_total = bench_old(os.path.join(tmp, "old.db"), n)
+        new_caller, new_total = bench_sink(os.path.join(tmp, "new.db"), n)
+
+    print(f"{n} строк")
+    print(f"до:    {n / old_total:>12,.0f} строк/с (вызывающий ждёт каждый commit)")
+    print(f"после: {n / new_caller:>12,.0f} строк/с для вызывающего, {n / new_total:,.0f} строк/с до записи на диск")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
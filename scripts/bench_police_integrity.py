@@ -0,0 +1,136 @@
+# scripts/bench_police_integrity.py
+"""
+Полная проверка целостности RaPolice на большом дереве.
+
+"до" — прежний check_integrity: обход, SHA-256 каждого файла блоками по 8 КБ,
+перезапись data/file_checksums.json с indent=2.
+"после" — индекс файлов + пул потоков + база по каталогам с деревом Меркла:
+холодный старт, повторная проверка после перезапуска (ничего не менялось),
+проверка после правки 10 файлов — с деревом и полным проходом,
+и то же в долгоживущем процессе, где индекс ведёт watch().
+
+    python scripts/bench_police_integrity.py [FILES] [WORKERS]
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+EXTS = (".py", ".json", ".md")
+
+
+def make_tree(root, n):
+    blob = os.urandom(64 * 1024)
+    for i in range(n):
+        d = os.path.join(root, f"pkg{i // 2000}", f"mod{i // 100}")
+        if i % 100 == 0:
+            os.makedirs(d, exist_ok=True)
+        # Большинство файлов — несколько КБ, каждый сотый — около 1 МБ
+        size = 1024 * 1024 if i % 100 == 7 else 2048 + (i % 20) * 512
+        with open(os.path.join(d, f"f{i}{EXTS[i % len(EXTS)]}"), "wb") as f:
+            f.write(str(i).encode() + (blob * (size // len(blob) + 1))[:size])
+
+
+def old_check(root, db):
+    res = {}
+    for r, _, files in os.walk(root):
+        if "/.git" in r or os.path.basename(r) in ("backups", "data"):
+            continue
+        for fn in files:
+            if fn.endswith(EXTS):
+                path = os.path.join(r, fn)
+                h = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(8192), b""):
+                        h.update(chunk)
+                res[path] = h.hexdigest()
+    old = json.load(open(db)) if os.path.exists(db) else {}
+    changed = [p for p, h in res.items() if p in old and old[p] != h]
+    if changed or len(old) != len(res):
+        with open(db, "w", encoding="utf-8") as f:
+            json.dump(res, f, ensure_ascii=False, indent=2)
+    return changed
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main(n, workers):
+    base = tempfile.mkdtemp(prefix="ra_police_")
+    cwd = os.getcwd()
+    try:
+        os.chdir(base)
+        from core.ra_file_index import RaFileIndex
+        from modules.ra_police import RaPolice
+
+        make_tree(base, n)
+        old_db = os.path.join(base, "old_checksums.json")
+        old_check(".", old_db)
+        t_old, _ = timed(lambda: old_check(".", old_db))
+
+        def police(merkle=True):
+            index = RaFileIndex(".")
+            p = RaPolice(".", file_index=index, merkle=merkle)
+            return p
+
+        def cold():
+            p = police()
+            p.index.hashes = lambda ext=None, _h=p.index.hashes: _h(ext, workers=workers)
+            return p.check_integrity()
+
+        t_cold, _ = timed(cold)
+        db_size = os.path.getsize("data/file_checksums.json")
+
+        t_warm, res = timed(lambda: police().check_integrity())
+        assert not any(res.values()), res
+
+        paths = sorted(p for p in police().index.paths(EXTS) if p.startswith("pkg"))[:: n // 10][:10]
+
+        def touch():
+            for rel in paths:
+                with open(rel, "ab") as f:
+                    f.write(b"#")
+
+        touch()
+        t_merkle, res = timed(lambda: police().check_integrity())
+        assert len(res["changed"]) == 10, {k: len(v) for k, v in res.items()}
+        touch()
+        t_flat, res = timed(lambda: police(merkle=False).check_integrity())
+        assert len(res["changed"]) == 10, {k: len(v) for k, v in res.items()}
+
+        # Долгоживущий процесс: индекс под watch(), изменения приходят событиями inotify
+        live = police()
+        live.check_integrity()
+        live.index.mode = "inotify"
+        touch()
+        live.index.refresh_paths(paths)
+        t_live, res = timed(live.check_integrity)
+        assert len(res["changed"]) == 10, {k: len(v) for k, v in res.items()}
+        t_idle, _ = timed(live.check_integrity)
+
+        print(f"{n} файлов, потоков хеширования: {workers}")
+        print(f"до: полная проверка                    {t_old:>8.0f} ms, база {os.path.getsize(old_db) // 1024} КБ")
+        print(f"после: холодный старт                  {t_cold:>8.0f} ms, база {db_size // 1024} КБ")
+        print(f"после: перезапуск, изменений нет       {t_warm:>8.0f} ms")
+        print(f"после: 10 изменённых файлов, Меркл     {t_merkle:>8.0f} ms")
+        print(f"после: 10 изменённых файлов, без него  {t_flat:>8.0f} ms")
+        print(f"под watch(): 10 изменённых файлов      {t_live:>8.1f} ms")
+        print(f"под watch(): изменений нет             {t_idle:>8.2f} ms")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000, int(sys.argv[2]) if len(sys.argv) > 2 else 4)
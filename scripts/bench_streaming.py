@@ -0,0 +1,98 @@
+# scripts/bench_streaming.py
+"""
+Проверка потокового пути против локального фейкового SSE-сервера OpenRouter.
+
+Сервер отдаёт ответ кусочками с задержкой; скрипт прогоняет
+OpenRouterClient.ask_stream и stream_to_message (с фейковым
+Telegram-сообщением) и печатает время до первого кусочка и полное время.
+
+    python scripts/bench_streaming.py
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.openrouter_client import OpenRouterClient
+from core.ra_http_pool import RaHttpPool
+from core.telegram_stream import stream_to_message
+
+CHUNKS = ["Свет ", "Ра ", "идёт ", "к тебе, ", "брат. "] * 6
+CHUNK_DELAY = 0.1
+
+
+async def completions(request):
+    body = await request.json()
+    if not body.get("stream"):
+        # Обычный режим: модель молчит, пока не сгенерирует всё
+        await asyncio.sleep(CHUNK_DELAY * len(CHUNKS))
+        return web.json_response({"choices": [{"message": {"content": "".join(CHUNKS)}}]})
+
+    resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await resp.prepare(request)
+    await resp.write(b": OPENROUTER PROCESSING\n\n")
+    for piece in CHUNKS:
+        await asyncio.sleep(CHUNK_DELAY)
+        event = {"choices": [{"delta": {"content": piece}}]}
+        await resp.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+    await resp.write(b"data: [DONE]\n\n")
+    return resp
+
+
+class FakeSent:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_text(self, text):
+        self.edits.append(text)
+
+
+class FakeMessage:
+    def __init__(self):
+        self.sent = FakeSent()
+
+    async def answer(self, text):
+        return self.sent
+
+
+async def main():
+    app = web.Application()
+    app.router.add_post("/api/v1/chat/completions", completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    pool = RaHttpPool()
+    client = OpenRouterClient(api_key="bench", pool=pool)
+    client.BASE_URL = f"http://127.0.0.1:{port}/api/v1/chat/completions"
+    messages = [{"role": "user", "content": "привет"}]
+
+    try:
+        start = time.perf_counter()
+        await client.ask("stub/model:free", messages)
+        blocking = time.perf_counter() - start
+
+        message = FakeMessage()
+        start = time.perf_counter()
+        text, ttfb = await stream_to_message(message, client.ask_stream("stub/model:free", messages), edit_interval=0.5)
+        total = time.perf_counter() - start
+
+        assert text == "".join(CHUNKS).strip(), "поток собрался не полностью"
+        print(f"без потока:      ответ через {blocking:.2f}s")
+        print(f"поток, TTFB:     {ttfb:.2f}s")
+        print(f"поток, итого:    {total:.2f}s, правок сообщения: {len(message.sent.edits)}")
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
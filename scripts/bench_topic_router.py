@@ -0,0 +1,88 @@
+# scripts/bench_topic_router.py
+"""
+Стоимость маршрутизации события при 1k топиков.
+
+"линейно" — перебор всех шаблонов с проверкой совпадения на каждое событие,
+"дерево"  — TopicRouter.resolve без кэша (кэш сбрасывается каждый раз),
+"кэш"     — TopicRouter.resolve с кэшем по топику (обычный режим шины).
+
+    python scripts/bench_topic_router.py [TOPICS] [LOOKUPS]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_topic_router import TopicRouter
+
+
+def match(pattern, topic):
+    p, t = pattern.split("."), topic.split(".")
+
+    def go(i, j):
+        if i == len(p):
+            return j == len(t)
+        if p[i] == "#":
+            return any(go(i + 1, k) for k in range(j, len(t) + 1))
+        if j == len(t):
+            return False
+        return (p[i] == "*" or p[i] == t[j]) and go(i + 1, j + 1)
+
+    return go(0, 0)
+
+
+def make_patterns(n):
+    areas = [f"area{i}" for i in range(max(1, n // 50))]
+    patterns = []
+    for i in range(n):
+        area = areas[i % len(areas)]
+        kind = i % 10
+        if kind == 0:
+            patterns.append(f"{area}.*")
+        elif kind == 1:
+            patterns.append(f"{area}.#")
+        else:
+            patterns.append(f"{area}.topic{i}")
+    patterns.append("#")
+    return patterns
+
+
+def main(n_topics, lookups):
+    patterns = make_patterns(n_topics)
+    router = TopicRouter()
+    for p in patterns:
+        router.add(p, p)
+
+    exact = [p for p in patterns if "*" not in p and "#" not in p]
+    rnd = random.Random(7)
+    topics = [rnd.choice(exact) for _ in range(lookups)]
+
+    start = time.perf_counter()
+    linear = [[p for p in patterns if match(p, t)] for t in topics]
+    t_linear = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for t in topics:
+        router._cache.clear()
+        router.resolve(t)
+    t_trie = time.perf_counter() - start
+
+    start = time.perf_counter()
+    routed = [router.resolve(t) for t in topics]
+    t_cached = time.perf_counter() - start
+
+    assert [set(a) for a in linear] == [set(b) for b in routed], "результаты маршрутизации расходятся"
+
+    print(f"{len(patterns)} шаблонов, {lookups} событий")
+    print(f"линейно: {t_linear / lookups * 1e6:>10.1f} мкс/событие")
+    print(f"дерево:  {t_trie / lookups * 1e6:>10.1f} мкс/событие")
+    print(f"кэш:     {t_cached / lookups * 1e6:>10.1f} мкс/событие")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    main(n, m)
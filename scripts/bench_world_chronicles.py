@@ -0,0 +1,127 @@
+# scripts/bench_world_chronicles.py
+"""
+Хроники Мира на N записях: старая схема (список + перезапись всего JSON
+на каждую запись, линейные выборки) против RaChronicleStore.
+
+    python scripts/bench_world_chronicles.py [N]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.ra_chronicle_store import RaChronicleStore
+
+WORDS = ("свет сердце импульс мир путь судьба эпоха озарение резонанс модуль рождение "
+         "рынок сигнал мысль тревога радость творчество космос истина вечность").split()
+CATEGORIES = ["heart", "prediction", "module_birth", "world_event", "inner_sun", "system"]
+AUTHORS = ["HeartReactor", "FuturePredictor", "Ra", "World", "Игорь"]
+
+
+def make_entry(rnd, i):
+    return {
+        "uuid": f"u{i}",
+        "timestamp": f"2025-01-01T00:00:{i:06d}",
+        "title": f"Запись {i} {rnd.choice(WORDS)}",
+        "content": " ".join(rnd.choices(WORDS, k=12)),
+        "category": rnd.choice(CATEGORIES),
+        "author": rnd.choice(AUTHORS),
+        "entity": rnd.choice(["ra", "world", "human"]),
+        "tags": rnd.sample(WORDS, 2),
+        "resonance": round(rnd.random(), 3),
+        "destiny_mark": rnd.random() < 0.01,
+        "meta": {},
+        "seal": str(i),
+        "worthy_of_eternity": rnd.random() < 0.05
+    }
+
+
+def timed(fn, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main(n):
+    rnd = random.Random(3)
+    entries = [make_entry(rnd, i) for i in range(n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "world_chronicles.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+
+        store_path = os.path.join(tmp, "world_chronicles.jsonl")
+        store = RaChronicleStore(store_path)
+        start = time.perf_counter()
+        store.import_json(json_path)
+        t_import = time.perf_counter() - start
+        store.close()
+
+        start = time.perf_counter()
+        with open(json_path + ".migrated", encoding="utf-8") as f:
+            entries = json.load(f)
+        t_old_load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = RaChronicleStore(store_path)
+        t_load = time.perf_counter() - start
+        start = time.perf_counter()
+        store.search("разогрев")
+        t_terms = time.perf_counter() - start
+
+        # --- запись ---
+        def old_add():
+            entries.append(make_entry(rnd, len(entries)))
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+
+        t_old_add, _ = timed(old_add, 3)
+        t_new_add, _ = timed(lambda: store.add(make_entry(rnd, store.count())), 50)
+
+        # --- выборки ---
+        def old_search(q="озарение"):
+            return [e for e in entries if q in e["title"].lower() or q in e["content"].lower()]
+
+        rows = [
+            ("загрузка при старте", t_old_load * 1000, t_load * 1000),
+            ("первый search (словарь)", 0.0, t_terms * 1000),
+            ("add_entry", t_old_add, t_new_add),
+            ("find_by_category", timed(lambda: [e for e in entries if e["category"] == "inner_sun"])[0],
+             timed(lambda: store.by_field("category", "inner_sun"))[0]),
+            ("get_by_author", timed(lambda: [e for e in entries if e["author"] == "Игорь"])[0],
+             timed(lambda: store.by_field("author", "Игорь"))[0]),
+            ("get_high_resonance(0.99)", timed(lambda: [e for e in entries if e["resonance"] >= 0.99])[0],
+             timed(lambda: store.by_resonance(0.99))[0]),
+            ("find_by_tag", timed(lambda: [e for e in entries if "космос" in e["tags"]])[0],
+             timed(lambda: store.by_tag("космос"))[0]),
+            ("search('озарение космос')", timed(lambda: old_search("озарение космос"))[0],
+             timed(lambda: store.search("озарение космос"))[0]),
+            ("timeline page 100", timed(lambda: entries[n // 2:n // 2 + 100])[0],
+             timed(lambda: store.page(n // 2, 100))[0]),
+        ]
+
+        # Одинаковые ответы старой и новой схемы (старый список дополнен теми же записями не был)
+        base = {e["uuid"] for e in entries[:n]}
+        assert [e["uuid"] for e in store.by_field("author", "Игорь") if e["uuid"] in base] == \
+               [e["uuid"] for e in entries[:n] if e["author"] == "Игорь"]
+        assert [e["uuid"] for e in store.search("озарение космос") if e["uuid"] in base] == \
+               [e["uuid"] for e in entries[:n] if "озарение космос" in e["title"].lower() + " " + e["content"].lower()
+                and ("озарение космос" in e["title"].lower() or "озарение космос" in e["content"].lower())]
+        store.close()
+
+    print(f"{n} записей, импорт JSON: {t_import:.1f} с")
+    print(f"{'операция':<28}{'до, ms':>12}{'после, ms':>12}")
+    for name, old, new in rows:
+        print(f"{name:<28}{old:>12.2f}{new:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,109 @@
+# scripts/bench_ws_broadcast.py
+"""
+Нагрузочный тест рассылки /ws/events: N поддельных WS-клиентов,
+часть из них медленные (каждая отправка занимает SLOW_DELAY).
+
+"до"    — старый RaEventBus._emit_ws: await ws.send_json по очереди внутри emit;
+"после" — RaWsHub: JSON один раз, буфер и писатель на клиента, вытеснение медленных.
+
+    python scripts/bench_ws_broadcast.py [CLIENTS] [EVENTS] [SLOW]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import logging
+logging.disable(logging.WARNING)
+
+from core.ra_event_bus import RaEventBus
+
+FAST_DELAY = 0.0
+SLOW_DELAY = 0.05
+
+
+class FakeWs:
+    def __init__(self, delay):
+        self.delay = delay
+        self.received = 0
+
+    async def _send(self):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.received += 1
+
+    async def send_json(self, payload):
+        json.dumps(payload, ensure_ascii=False)
+        await self._send()
+
+    async def send_text(self, text):
+        await self._send()
+
+    async def close(self):
+        pass
+
+
+def make_clients(n, slow):
+    return [FakeWs(SLOW_DELAY if i < slow else FAST_DELAY) for i in range(n)]
+
+
+def payload(n):
+    return {"time": time.time(), "type": "memory_updated", "data": {"user_id": n, "text": "x" * 200}, "source": "bench"}
+
+
+async def old_emit(clients, events):
+    latencies = []
+    for n in range(events):
+        start = time.perf_counter()
+        for ws in clients:
+            await ws.send_json(payload(n))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def hub_emit(clients, events):
+    bus = RaEventBus()
+    for ws in clients:
+        bus.attach_ws(ws)
+    latencies = []
+    for n in range(events):
+        start = time.perf_counter()
+        await bus.emit("memory_updated", payload(n)["data"], source="bench")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.2)
+    metrics = bus.get_metrics()["ws"]
+    bus.stop()
+    return latencies, metrics
+
+
+def summary(latencies):
+    s = sorted(latencies)
+    return f"p50 {s[len(s) // 2] * 1000:8.2f} ms, p99 {s[int(len(s) * 0.99)] * 1000:8.2f} ms"
+
+
+async def main(n, events, slow):
+    old = await old_emit(make_clients(n, slow), min(events, 50))
+    clients = make_clients(n, slow)
+    new, metrics = await hub_emit(clients, events)
+
+    fast = [ws for ws in clients if not ws.delay]
+    assert all(ws.received == events for ws in fast), "быстрые клиенты получили не все события"
+
+    print(f"{n} клиентов ({slow} медленных, {SLOW_DELAY * 1000:.0f} ms на отправку), {events} событий")
+    print(f"до:    emit {summary(old)}")
+    print(f"после: emit {summary(new)}")
+    print(f"       метрики хаба: {metrics}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    s = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    asyncio.run(main(n, m, s))
@@ -0,0 +1,191 @@
+# scripts/verify_indicators.py
+"""
+Сверка core.ra_indicators с pandas-эталонами:
+
+- ForexBrain.compute_* (RSI/ATR простыми средними, EMA/SMA, MACD, Bollinger, Stochastic);
+- формулы ta, которыми раньше считал RaMarketConsciousness (RSI и ATR Уайлдера,
+  MACD/EMA с min_periods) — переписаны здесь на pandas, чтобы не тянуть ta.
+
+Каждый индикатор проверяется трижды: потоково (update по бару), векторно (warmup)
+и смешанно (warmup по половине истории, дальше update) — все три должны совпасть с эталоном.
+
+    python scripts/verify_indicators.py [BARS]
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.ra_indicators import ATR, EMA, MACD, RSI, SMA, Bollinger, IndicatorSet, Stochastic
+from modules.forex_brain import ForexBrain
+
+RTOL = 1e-7
+ATOL = 1e-9
+
+
+def make_bars(n, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, n))
+    # Плоский участок — проверка деления на нулевой диапазон/потери
+    close[n // 3:n // 3 + 20] = close[n // 3]
+    spread = np.abs(rng.normal(0, 0.0008, n))
+    high = np.maximum(close, np.roll(close, 1)) + spread
+    low = np.minimum(close, np.roll(close, 1)) - spread
+    high[n // 3 + 1:n // 3 + 20] = low[n // 3 + 1:n // 3 + 20] = close[n // 3]
+    return pd.DataFrame({
+        "time": pd.date_range("2024-01-01", periods=n, freq="h"),
+        "open": np.roll(close, 1), "high": high, "low": low, "close": close, "volume": 0.0
+    })
+
+
+# =============================
+# Эталоны ta на pandas
+# =============================
+
+def ta_rsi(close, n=14):
+    diff = close.diff(1)
+    up = diff.where(diff > 0, 0.0)
+    down = -diff.where(diff < 0, 0.0)
+    emaup = up.ewm(alpha=1 / n, min_periods=n, adjust=False).mean()
+    emadn = down.ewm(alpha=1 / n, min_periods=n, adjust=False).mean()
+    return pd.Series(np.where(emadn == 0, 100, 100 - 100 / (1 + emaup / emadn)), index=close.index)
+
+
+def ta_ema(close, n):
+    return close.ewm(span=n, min_periods=n, adjust=False).mean()
+
+
+def ta_macd(close):
+    macd = ta_ema(close, 12) - ta_ema(close, 26)
+    signal = ta_ema(macd, 9)
+    return macd, signal, macd - signal
+
+
+def ta_atr(df, n=14):
+    prev = df["close"].shift(1)
+    tr = pd.DataFrame({
+        "a": df["high"] - df["low"], "b": (df["high"] - prev).abs(), "c": (df["low"] - prev).abs()
+    }).max(axis=1)
+    atr = np.full(len(df), np.nan)
+    atr[n - 1] = tr[0:n].mean()
+    for i in range(n, len(atr)):
+        atr[i] = (atr[i - 1] * (n - 1) + tr.iloc[i]) / n
+    return pd.Series(atr, index=df.index)
+
+
+# =============================
+# Прогоны
+# =============================
+
+def run_stream(make, df):
+    ind = make()
+    out = []
+    for bar in df[["high", "low", "close"]].to_dict("records"):
+        out.append(ind.update(bar))
+    return out
+
+
+def as_columns(values, keys):
+    if keys is None:
+        return {None: np.array([np.nan if v is None else v for v in values], dtype=float)}
+    return {k: np.array([np.nan if v[k] is None else v[k] for v in values], dtype=float) for k in keys}
+
+
+def run_warmup(make, df, split=None):
+    ind = make()
+    h, l, c = (df[k].to_numpy() for k in ("high", "low", "close"))
+    if split is None:
+        return ind.warmup(h, l, c)
+    head = ind.warmup(h[:split], l[:split], c[:split])
+    tail = [ind.update({"high": a, "low": b, "close": x}) for a, b, x in zip(h[split:], l[split:], c[split:])]
+    return head, tail
+
+
+def close_enough(name, got, want):
+    got, want = np.asarray(got, dtype=float), np.asarray(want, dtype=float)
+    nan_ok = np.array_equal(np.isnan(got), np.isnan(want))
+    mask = ~np.isnan(want)
+    val_ok = np.allclose(got[mask], want[mask], rtol=RTOL, atol=ATOL)
+    if not (nan_ok and val_ok):
+        bad = np.flatnonzero(~(np.isclose(got, want, rtol=RTOL, atol=ATOL, equal_nan=True)))[:5]
+        print(f"  ✗ {name}: расхождение в барах {bad.tolist()}: {got[bad]} vs {want[bad]}")
+        return False
+    return True
+
+
+def check(name, make, df, reference, keys=None):
+    """reference — {часть: Series}; keys — части составного индикатора (None — скаляр)."""
+    n = len(df)
+    split = n // 2
+    ok = True
+
+    stream = as_columns(run_stream(make, df), keys)
+    warm = run_warmup(make, df)
+    if keys is None:
+        warm = {None: warm}
+    head, tail = run_warmup(make, df, split)
+    if keys is None:
+        head = {None: head}
+    tail = as_columns(tail, keys)
+
+    for part, want in reference.items():
+        want = want.to_numpy(dtype=float)
+        label = f"{name}.{part}" if part else name
+        ok &= close_enough(f"{label} update", stream[part], want)
+        ok &= close_enough(f"{label} warmup", warm[part], want)
+        ok &= close_enough(f"{label} warmup+update", np.concatenate((head[part], tail[part])), want)
+    print(f"{'✓' if ok else '✗'} {name}")
+    return ok
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    df = make_bars(n)
+    fb = ForexBrain
+    ok = True
+
+    # --- ForexBrain ---
+    ok &= check("forex rsi", lambda: RSI(14, smoothing="sma"), df, {None: fb.compute_rsi(None, df)})
+    ok &= check("forex ema20", lambda: EMA(20), df, {None: fb.compute_ema(None, df, 20)})
+    ok &= check("forex sma20", lambda: SMA(20), df, {None: fb.compute_sma(None, df, 20)})
+    macd, signal = fb.compute_macd(None, df)
+    ok &= check("forex macd", MACD, df, {"": macd, "signal": signal}, keys=("", "signal", "hist"))
+    ok &= check("forex atr", lambda: ATR(14, smoothing="sma"), df, {None: fb.compute_atr(None, df)})
+    upper, lower = fb.compute_bollinger(None, df)
+    ok &= check("forex bollinger", Bollinger, df, {"upper": upper, "lower": lower},
+                keys=("upper", "middle", "lower"))
+    k, d = fb.compute_stochastic(None, df)
+    # pandas даёт ±inf/NaN на нулевом диапазоне окна, поток — None: сравниваем как NaN
+    k, d = k.replace([np.inf, -np.inf], np.nan), d.replace([np.inf, -np.inf], np.nan)
+    ok &= check("forex stochastic", Stochastic, df, {"k": k, "d": d}, keys=("k", "d"))
+
+    # --- ta (RaMarketConsciousness) ---
+    ok &= check("ta rsi", lambda: RSI(14), df, {None: ta_rsi(df["close"])})
+    ok &= check("ta ema200", lambda: EMA(200, min_periods=200), df, {None: ta_ema(df["close"], 200)})
+    m, s, h = ta_macd(df["close"])
+    ok &= check("ta macd", lambda: MACD(min_periods=True), df, {"": m, "signal": s, "hist": h},
+                keys=("", "signal", "hist"))
+    ok &= check("ta atr", lambda: ATR(14), df, {None: ta_atr(df)})
+
+    # --- IndicatorSet.sync: досылка только новых баров ---
+    full = IndicatorSet(rsi=RSI(14), atr=ATR(14), boll=Bollinger())
+    full.sync(df)
+    parts = IndicatorSet(rsi=RSI(14), atr=ATR(14), boll=Bollinger())
+    for end in range(100, n + 1, 7):
+        parts.sync(df.iloc[:end])
+    parts.sync(df)
+    same = all(np.isclose(full.values[key], parts.values[key], rtol=RTOL) for key in full.values)
+    print(f"{'✓' if same else '✗'} IndicatorSet.sync")
+    ok &= same
+
+    print("Все индикаторы совпали с эталонами." if ok else "Есть расхождения.")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
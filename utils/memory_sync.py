@@ -1,22 +1,177 @@
 # utils/memory_sync.py
 
+import asyncio
 import logging
 import subprocess
 import os
+import threading
+import time
 from datetime import datetime
 
 GIT_REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
-def sync_to_github(commit_message=None):
+# Окно склейки изменений памяти и порог размера пачки
+SYNC_WINDOW_SEC = float(os.getenv("RA_MEMORY_SYNC_WINDOW", "30"))
+SYNC_MAX_BATCH = int(os.getenv("RA_MEMORY_SYNC_MAX_BATCH", "50"))
+SYNC_PUSH = os.getenv("RA_MEMORY_SYNC_PUSH", "1") != "0"
+
+_git_lock = threading.Lock()
+_STOP = object()
+
+
+def sync_to_github(commit_message=None, paths=None, push=True):
+    """True — закоммичено (и запушено), None — нечего коммитить, False — ошибка git."""
     if commit_message is None:
         commit_message = f"Auto memory update: {datetime.utcnow().isoformat()}"
 
     try:
-        subprocess.run(["git", "add", "memory"], cwd=GIT_REPO_DIR, check=True)
-        subprocess.run(["git", "commit", "-m", commit_message], cwd=GIT_REPO_DIR, check=True)
-        subprocess.run(["git", "push"], cwd=GIT_REPO_DIR, check=True)
-        logging.info("☁️ Память синхронизирована с Git")
-    except subprocess.CalledProcessError:
-        logging.info("ℹ️ Нет изменений для коммита")
+        with _git_lock:
+            return _git_sync(commit_message, paths, push)
     except Exception as e:
         logging.error(f"❌ Ошибка Git sync: {e}")
+    return False
+
+
+def _git_sync(commit_message, paths, push):
+    pathspec = ["--"] + (list(paths) if paths else ["memory"])
+    subprocess.run(["git", "add", "-A"] + pathspec, cwd=GIT_REPO_DIR, check=True)
+    # Пустой индекс — обычное состояние простаивающей системы, а не ошибка
+    if subprocess.run(["git", "diff", "--cached", "--quiet"] + pathspec, cwd=GIT_REPO_DIR).returncode == 0:
+        logging.info("ℹ️ Нет изменений для коммита")
+        return None
+    subprocess.run(["git", "commit", "-m", commit_message] + pathspec, cwd=GIT_REPO_DIR, check=True)
+    if push:
+        subprocess.run(["git", "push"], cwd=GIT_REPO_DIR, check=True)
+    logging.info("☁️ Память синхронизирована с Git")
+    return True
+
+
+class MemorySyncWorker:
+    """
+    Фоновая git-синхронизация памяти.
+    append() только отмечает изменённый слой, а воркер собирает такие слои
+    в пачку (окно SYNC_WINDOW_SEC или SYNC_MAX_BATCH путей), делает один
+    коммит на пачку и выполняет git вне event loop.
+    """
+
+    def __init__(self, window=SYNC_WINDOW_SEC, max_batch=SYNC_MAX_BATCH, push=SYNC_PUSH):
+        self.window = window
+        self.max_batch = max_batch
+        self.push = push
+        self.queue = None
+        self._task = None
+        self._batch = set()
+        self.metrics = {
+            "pending": 0,
+            "batches": 0,
+            "paths_synced": 0,
+            "last_batch_size": 0,
+            "last_latency": 0.0,
+            "avg_latency": 0.0,
+            "max_latency": 0.0,
+            "errors": 0,
+            "nothing_to_commit": 0,
+            "last_sync": None
+        }
+
+    # =============================
+    # Очередь
+    # =============================
+
+    def _ensure_started(self):
+        if self._task and not self._task.done():
+            return
+        self.queue = self.queue or asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="memory_sync")
+
+    def mark_dirty(self, path):
+        path = os.path.relpath(os.path.abspath(path), GIT_REPO_DIR)
+        self._ensure_started()
+        self.queue.put_nowait(path)
+        self.metrics["pending"] = self.queue.qsize() + len(self._batch)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            path = await self.queue.get()
+            if path is _STOP:
+                break
+            self._batch.add(path)
+            deadline = loop.time() + self.window
+
+            while len(self._batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    path = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if path is _STOP:
+                    stopping = True
+                    break
+                self._batch.add(path)
+                self.metrics["pending"] = self.queue.qsize() + len(self._batch)
+
+            batch, self._batch = self._batch, set()
+            await self._sync_batch(batch)
+
+    async def _sync_batch(self, batch):
+        if not batch:
+            return
+        paths = sorted(batch)
+        message = f"Memory update: {len(paths)} layer(s) [{', '.join(os.path.basename(p) for p in paths[:5])}{', ...' if len(paths) > 5 else ''}]"
+
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            status = await loop.run_in_executor(None, sync_to_github, message, paths, self.push)
+        except Exception as e:
+            logging.error(f"❌ Ошибка фоновой git-синхронизации: {e}")
+            status = False
+        elapsed = time.perf_counter() - start
+
+        m = self.metrics
+        m["batches"] += 1
+        m["last_batch_size"] = len(paths)
+        m["last_latency"] = elapsed
+        m["max_latency"] = max(m["max_latency"], elapsed)
+        m["avg_latency"] += (elapsed - m["avg_latency"]) / m["batches"]
+        m["pending"] = self.queue.qsize() if self.queue else 0
+        m["last_sync"] = datetime.utcnow().isoformat()
+        if status:
+            m["paths_synced"] += len(paths)
+        elif status is None:
+            m["nothing_to_commit"] += 1
+        else:
+            m["errors"] += 1
+
+    # =============================
+    # Завершение
+    # =============================
+
+    async def flush(self):
+        """Синхронизирует всё накопленное прямо сейчас."""
+        batch, self._batch = self._batch, set()
+        while self.queue and not self.queue.empty():
+            path = self.queue.get_nowait()
+            if path is not _STOP:
+                batch.add(path)
+        await self._sync_batch(batch)
+
+    async def stop(self):
+        # Стоп-маркер в очередь: воркер закоммитит текущую пачку и выйдет сам
+        if self._task and not self._task.done():
+            self.queue.put_nowait(_STOP)
+            await self._task
+        self._task = None
+        await self.flush()
+        logging.info("☁️ Git-синхронизация памяти остановлена")
+
+    def get_metrics(self):
+        return dict(self.metrics)
+
+
+# глобальный воркер
+memory_sync_worker = MemorySyncWorker()